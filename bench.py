@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+End-to-end throughput benchmark: runs clone.py in headless Chrome against a local fake_drive.py tree.
+
+Builds a synthetic tree, serves it on a free port, runs the crawler in a
+scratch directory with a fresh profile, manifest and trace, and reports
+folders/s, files/s, MB/s and WebDriver round trips per item, so a change can
+be measured without a Google account. Arguments after "--" go to clone.py.
+
+    python bench.py --depth 2 --fanout 4 --files 10 --docs 2 --latency 0.05 --virtualize 30
+    python bench.py --files 40 -- --workers 4 --bulk-download 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import fake_drive
+
+PARTIAL_SUFFIXES = (".crdownload", ".part") # Downloads that never finished
+STAGING_DIR_NAME = ".staging" # clone.py's STAGING_ROOT inside the backup
+
+def expected_totals(tree):
+    """(folder count, file count, byte count) the crawler should produce for tree"""
+    folders = [n for n in tree.values() if n["kind"] == "folder"]
+    files = [n for n in tree.values() if n["kind"] == "file"]
+    return len(folders), len(files), sum(n["size"] for n in files)
+
+def files_on_disk(root):
+    """(file count, byte count) of the finished files below root, leaving out Chrome's staging directory"""
+    count = byte_count = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root and STAGING_DIR_NAME in dirnames:
+            dirnames.remove(STAGING_DIR_NAME) # Downloads still running or never moved into place
+        for name in filenames:
+            if name.endswith(PARTIAL_SUFFIXES):
+                continue
+            count += 1
+            byte_count += os.path.getsize(os.path.join(dirpath, name))
+    return count, byte_count
+
+def read_trace(path):
+    """Folder spans, file outcomes and WebDriver commands issued inside folder spans, from a clone.py trace"""
+    folders = 0
+    outcomes = {}
+    commands = 0
+    if not os.path.exists(path):
+        return folders, outcomes, commands
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            record = json.loads(line)
+            if record["phase"] == "folder":
+                folders += 1
+                commands += record.get("commands", 0)
+            elif record["phase"] == "file":
+                outcome = record.get("outcome")
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return folders, outcomes, commands
+
+def run_clone(base_url, workdir, clone_args, timeout):
+    """Runs clone.py in workdir against base_url; returns (exit code or None on timeout, seconds, log path)"""
+    log_path = os.path.join(workdir, "clone.log")
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "clone.py"),
+        "--drive-url", base_url,
+        "--headless",
+        "--session-dir", os.path.join(workdir, "profile"),
+        "--manifest", os.path.join(workdir, "manifest.sqlite"),
+        "--trace", os.path.join(workdir, "trace.jsonl"),
+        *clone_args,
+    ]
+    print(f"Running: {' '.join(command)}")
+    started = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        try:
+            # The fake Drive needs no login, so clone.py skips its login prompt; the newline answers it if it appears
+            result = subprocess.run(command, cwd=workdir, input="\n", text=True, stdout=log_file,
+                                    stderr=subprocess.STDOUT, timeout=timeout)
+            returncode = result.returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+    return returncode, time.monotonic() - started, log_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark clone.py against a local fake Drive tree.")
+    fake_drive.add_tree_arguments(parser)
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds before the crawler run is abandoned")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory (backup, trace, log)")
+    parser.add_argument("clone_args", nargs="*", help="Extra clone.py arguments, after --")
+    cli_args = parser.parse_args()
+
+    tree = fake_drive.tree_from_args(cli_args)
+    folder_total, file_total, byte_total = expected_totals(tree)
+    server, base_url = fake_drive.start_in_background(tree, **fake_drive.server_options(cli_args))
+    print(f"Fake Drive at {base_url}: {folder_total} folders, {file_total} files, {byte_total} bytes")
+
+    workdir = tempfile.mkdtemp(prefix="clone-bench-")
+    try:
+        returncode, elapsed, log_path = run_clone(base_url, workdir, cli_args.clone_args, cli_args.timeout)
+        folders, outcomes, commands = read_trace(os.path.join(workdir, "trace.jsonl"))
+        file_count, byte_count = files_on_disk(os.path.join(workdir, "gdrive_backup"))
+        items = folders + sum(outcomes.values())
+
+        print("-" * 40)
+        print(f"Exit code: {'timeout' if returncode is None else returncode} after {elapsed:.1f}s (log: {log_path})")
+        print(f"Folders: {folders}/{folder_total} ({folders / elapsed:.2f}/s)")
+        print(f"Files:   {file_count}/{file_total} on disk ({file_count / elapsed:.2f}/s) {outcomes}")
+        print(f"Bytes:   {byte_count}/{byte_total} ({byte_count / elapsed / 1024 / 1024:.2f} MB/s)")
+        print(f"Round trips: {commands} WebDriver commands in folder spans "
+              f"({commands / items if items else 0:.1f} per item)")
+        if cli_args.keep:
+            print(f"Scratch directory kept: {workdir}")
+        complete = returncode == 0 and file_count == file_total
+    finally:
+        server.shutdown()
+        if not cli_args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if complete else 1)
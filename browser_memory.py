@@ -0,0 +1,83 @@
+"""
+Memory use of a browser's process tree, for recycling long-running sessions.
+
+Chrome runs as a browser process plus renderer, GPU and utility processes, all
+descendants of the chromedriver process that started it. On Linux the tree is
+read from /proc, using the proportional set size (PSS) so pages shared between
+Chrome's processes are not counted once per process, or VmRSS where
+smaps_rollup is unavailable. Elsewhere psutil is used if it is installed.
+"""
+
+import os
+
+try:
+    import psutil
+except ImportError: # Optional; /proc covers Linux without it
+    psutil = None
+
+def _proc_parents():
+    """pid -> parent pid of every process visible in /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            continue # Exited meanwhile
+        # The command name is in parentheses and may itself contain spaces or parentheses
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(entry)] = int(fields[1])
+    return parents
+
+def _proc_memory(pid):
+    """PSS (or RSS) of one process in bytes, 0 if it is gone"""
+    for path, key in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as proc_file:
+                for line in proc_file:
+                    if line.startswith(key):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+def process_tree(root_pid):
+    """root_pid and all of its descendants"""
+    if os.path.isdir("/proc"):
+        children = {}
+        for pid, parent in _proc_parents().items():
+            children.setdefault(parent, []).append(pid)
+        tree, pending = [], [root_pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(children.get(pid, ()))
+        return tree
+    if psutil:
+        try:
+            root = psutil.Process(root_pid)
+            return [root_pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+    return []
+
+def tree_memory(root_pid):
+    """
+    (total bytes, largest single process in bytes) of the process tree under root_pid,
+    or None where memory cannot be measured (no /proc and no psutil).
+    """
+    pids = process_tree(root_pid)
+    if not pids:
+        return None
+    if os.path.isdir("/proc"):
+        sizes = [_proc_memory(pid) for pid in pids]
+    else:
+        sizes = []
+        for pid in pids:
+            try:
+                sizes.append(psutil.Process(pid).memory_info().rss)
+            except psutil.Error:
+                continue
+    return sum(sizes), max(sizes, default=0)
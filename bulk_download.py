@@ -0,0 +1,65 @@
+"""
+Unpacking of Drive multi-file downloads.
+
+When several files are selected and downloaded together, Drive zips them on
+the server and delivers one or more parts (drive-download-<stamp>-001.zip,
+-002.zip, ...). The parts are streamed member by member into the destination
+folder and the member names are checked against the items that were selected,
+so anything Drive left out can still be fetched on its own. Members are hashed
+(SHA-256) while they are written.
+"""
+
+import hashlib
+import os
+import zipfile
+
+CHUNK_SIZE = 256 * 1024
+
+def zip_parts(directory):
+    """The zip files Chrome finished downloading into directory, in part order"""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith(".zip"))
+
+def extract_members(zip_paths, dest_dir, expected_names):
+    """
+    Streams the members of the zip parts whose base name is in expected_names (member name ->
+    file name to save it as in dest_dir, as planned for the item) into dest_dir.
+    Returns (extracted, missing, unexpected): extracted maps name -> (path, byte_count, sha256 hex),
+    missing is the set of expected names no part delivered intact and unexpected lists
+    the members nobody asked for (or a second member of the same name), which are left unextracted.
+    """
+    extracted = {}
+    unexpected = []
+    for zip_path in zip_paths:
+        try:
+            archive = zipfile.ZipFile(zip_path)
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"Cannot open archive part {zip_path}: {e.__class__.__name__} - {e}")
+            continue
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                name = os.path.basename(info.filename)
+                if name not in expected_names or name in extracted:
+                    unexpected.append(info.filename)
+                    continue
+                out_path = os.path.join(dest_dir, expected_names[name])
+                part_path = out_path + ".part"
+                try:
+                    # Reading a member to the end checks its CRC; a damaged member raises BadZipFile
+                    digest = hashlib.sha256()
+                    with archive.open(info) as source, open(part_path, "wb") as target:
+                        while True:
+                            chunk = source.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            target.write(chunk)
+                            digest.update(chunk)
+                    os.replace(part_path, out_path)
+                except (zipfile.BadZipFile, OSError) as e:
+                    print(f"Could not extract '{info.filename}' from {zip_path}: {e.__class__.__name__} - {e}")
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    continue
+                extracted[name] = (out_path, info.file_size, digest.hexdigest())
+    return extracted, set(expected_names) - set(extracted), unexpected
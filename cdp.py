@@ -0,0 +1,150 @@
+"""
+Minimal synchronous Chrome DevTools Protocol client.
+
+Selenium's execute_cdp_cmd can send commands but never delivers events, so this
+opens a separate websocket to the browser target of a Chrome started by
+chromedriver. Responses and events are read on a background thread; events are
+handed to callbacks registered with on().
+"""
+
+import itertools
+import json
+import threading
+import urllib.request
+
+import websocket # websocket-client, installed as a selenium dependency
+
+class CDPError(Exception):
+    """A DevTools command returned an error or the connection went away"""
+
+def debugger_address(driver):
+    """host:port of the DevTools endpoint of the Chrome controlled by driver"""
+    return driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+def browser_websocket_url(address):
+    """Websocket URL of the browser-level target behind a DevTools address"""
+    with urllib.request.urlopen(f"http://{address}/json/version", timeout=10) as response:
+        return json.load(response)["webSocketDebuggerUrl"]
+
+class CDPConnection:
+    """One DevTools websocket with blocking send() and background event dispatch."""
+
+    def __init__(self, ws_url):
+        self.ws_url = ws_url
+        # No Origin header, otherwise Chrome rejects the socket unless started with --remote-allow-origins
+        self._ws = websocket.create_connection(ws_url, suppress_origin=True, enable_multithread=True)
+        self._ids = itertools.count(1)
+        self._pending = {} # message id -> {"event": threading.Event, "response": dict}
+        self._handlers = {} # event method -> list of callbacks
+        self._lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def for_driver(cls, driver):
+        return cls(browser_websocket_url(debugger_address(driver)))
+
+    def on(self, method, callback):
+        """Calls callback(params, session_id) for every event with the given method name"""
+        with self._lock:
+            self._handlers.setdefault(method, []).append(callback)
+
+    def send(self, method, params=None, session_id=None, timeout=30):
+        """Sends a command and blocks until its result arrives"""
+        if self.closed:
+            raise CDPError(f"Connection closed; cannot send {method}")
+        message_id = next(self._ids)
+        waiter = {"event": threading.Event(), "response": None}
+        with self._lock:
+            self._pending[message_id] = waiter
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        try:
+            self._ws.send(json.dumps(message))
+            if not waiter["event"].wait(timeout):
+                raise CDPError(f"Timeout ({timeout}s) waiting for {method}")
+        finally:
+            with self._lock:
+                self._pending.pop(message_id, None)
+        response = waiter["response"]
+        if response is None:
+            raise CDPError(f"Connection closed while waiting for {method}")
+        if "error" in response:
+            raise CDPError(f"{method} failed: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    def _read_loop(self):
+        while not self.closed:
+            try:
+                raw = self._ws.recv()
+            except Exception:
+                break
+            if not raw:
+                continue
+            message = json.loads(raw)
+            if "id" in message:
+                with self._lock:
+                    waiter = self._pending.get(message["id"])
+                if waiter:
+                    waiter["response"] = message
+                    waiter["event"].set()
+                continue
+            with self._lock:
+                callbacks = list(self._handlers.get(message.get("method"), ()))
+            for callback in callbacks:
+                try:
+                    callback(message.get("params", {}), message.get("sessionId"))
+                except Exception as e:
+                    print(f"Error in CDP event handler for {message.get('method')}: {e.__class__.__name__} - {e}")
+        self.closed = True
+        # Wake up anybody still waiting for a response
+        with self._lock:
+            for waiter in self._pending.values():
+                waiter["event"].set()
+
+    def close(self):
+        self.closed = True
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+class PageRequestBlocker:
+    """
+    Keeps Network.setBlockedURLs applied in every page target of a browser.
+
+    Blocking is a per-page setting, and the crawl keeps opening tabs (editor
+    tabs, pooled export tabs), so the blocker discovers page targets as they
+    appear and attaches a session to each one. The first requests of a brand
+    new tab may slip through before it is attached.
+    """
+
+    def __init__(self, connection, patterns):
+        self.connection = connection
+        self.patterns = list(patterns)
+        self._attached = set() # target IDs already configured
+        self._lock = threading.Lock()
+        connection.on("Target.targetCreated", self._on_target_created)
+        connection.send("Target.setDiscoverTargets", {"discover": True}) # Also reports the targets that exist already
+
+    def _on_target_created(self, params, session_id):
+        target = params.get("targetInfo", {})
+        if target.get("type") != "page":
+            return
+        with self._lock:
+            if target["targetId"] in self._attached:
+                return
+            self._attached.add(target["targetId"])
+        # Events arrive on the reader thread, which must stay free to deliver the responses send() waits for
+        threading.Thread(target=self._block_in_target, args=(target["targetId"],), daemon=True).start()
+
+    def _block_in_target(self, target_id):
+        try:
+            page_session = self.connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})["sessionId"]
+            self.connection.send("Network.enable", {}, session_id=page_session)
+            self.connection.send("Network.setBlockedURLs", {"urls": self.patterns}, session_id=page_session)
+        except CDPError as e:
+            # The tab may already be gone
+            print(f"Could not block requests in target {target_id}: {e}")
@@ -0,0 +1,188 @@
+"""
+Asyncio Chrome DevTools Protocol client for the --engine cdp crawl.
+
+Every Selenium call is a blocking HTTP round trip to chromedriver, which then
+talks to Chrome; one session can do one thing at a time. This client speaks
+the DevTools protocol over a single websocket to the browser target and drives
+any number of tabs through flattened sessions on it, so folder views and
+downloads in several tabs proceed concurrently. Waiting happens in Chrome:
+page loads are awaited as Page.loadEventFired events, and page scripts may
+return promises (e.g. one that scrolls a whole folder view and resolves when
+its DOM has settled), so a folder costs a couple of round trips instead of
+dozens of polls.
+
+Needs the websockets package.
+"""
+
+import asyncio
+import itertools
+import json
+
+try:
+    import websockets
+except ImportError: # Optional; only the cdp engine needs it
+    websockets = None
+
+from cdp import CDPError
+
+class AsyncCDPConnection:
+    """One DevTools websocket; commands are awaited and events dispatched on the event loop."""
+
+    def __init__(self, ws):
+        self._ws = ws
+        self._ids = itertools.count(1)
+        self._pending = {} # message id -> future of the response
+        self._handlers = {} # event method -> list of callbacks
+        self.closed = False
+        self.command_count = 0
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, ws_url):
+        if websockets is None:
+            raise CDPError("The cdp engine needs the websockets package (pip install websockets)")
+        # No Origin header, otherwise Chrome rejects the socket unless started with --remote-allow-origins
+        ws = await websockets.connect(ws_url, max_size=None, ping_interval=None)
+        return cls(ws)
+
+    def on(self, method, callback):
+        """Calls callback(params, session_id) for every event with the given method name"""
+        self._handlers.setdefault(method, []).append(callback)
+
+    def off(self, method, callback):
+        callbacks = self._handlers.get(method, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def next_event(self, method, session_id=None):
+        """
+        Future of the params of the next event with the given method (from session_id if given).
+        Create it before sending the command that causes the event, so the event cannot be missed.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def resolve(params, event_session_id):
+            if session_id is not None and event_session_id != session_id:
+                return
+            self.off(method, resolve)
+            if not future.done():
+                future.set_result(params)
+        self.on(method, resolve)
+        future.add_done_callback(lambda _: self.off(method, resolve))
+        return future
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        """Sends a command and returns its result"""
+        if self.closed:
+            raise CDPError(f"Connection closed; cannot send {method}")
+        message_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        self.command_count += 1
+        try:
+            await self._ws.send(json.dumps(message))
+            response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"Timeout ({timeout}s) waiting for {method}") from None
+        finally:
+            self._pending.pop(message_id, None)
+        if response is None:
+            raise CDPError(f"Connection closed while waiting for {method}")
+        if "error" in response:
+            raise CDPError(f"{method} failed: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    async def _read_loop(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self._pending.get(message["id"])
+                    if future and not future.done():
+                        future.set_result(message)
+                    continue
+                for callback in list(self._handlers.get(message.get("method"), ())):
+                    try:
+                        callback(message.get("params", {}), message.get("sessionId"))
+                    except Exception as e:
+                        print(f"Error in CDP event handler for {message.get('method')}: {e.__class__.__name__} - {e}")
+        except Exception:
+            pass # Connection lost; the waiters below find out
+        self.closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self):
+        self.closed = True
+        try:
+            await self._ws.close()
+        except Exception:
+            pass
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+class PageTarget:
+    """One tab of the browser, driven through a flattened session of an AsyncCDPConnection."""
+
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id # Also the frame ID of the tab's main frame, as in Browser.downloadWillBegin
+        self.session_id = session_id
+        self.commands = 0 # DevTools commands sent for this tab
+
+    @classmethod
+    async def create(cls, connection, url="about:blank"):
+        """Opens a background tab and enables the page events the crawl awaits"""
+        target_id = (await connection.send("Target.createTarget", {"url": url, "background": True}))["targetId"]
+        session_id = (await connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True}))["sessionId"]
+        page = cls(connection, target_id, session_id)
+        await page.send("Page.enable")
+        return page
+
+    async def send(self, method, params=None, timeout=30):
+        self.commands += 1
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def navigate(self, url, timeout=30):
+        """Loads url and waits for its load event; raises CDPError if it cannot be loaded"""
+        loaded = self.connection.next_event("Page.loadEventFired", self.session_id)
+        try:
+            result = await self.send("Page.navigate", {"url": url}, timeout)
+            if result.get("errorText"):
+                raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"Timeout ({timeout}s) waiting for {url} to load") from None
+        finally:
+            loaded.cancel()
+
+    async def start_download(self, url):
+        """
+        Navigates to a URL that answers with a download. Chrome aborts such a navigation
+        (net::ERR_ABORTED) once the download takes over, which is not an error here.
+        """
+        result = await self.send("Page.navigate", {"url": url})
+        error = result.get("errorText")
+        if error and error != "net::ERR_ABORTED":
+            raise CDPError(f"Navigation to {url} failed: {error}")
+
+    async def evaluate(self, expression, timeout=30):
+        """Value of a page expression; a promise is awaited in the page first"""
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "awaitPromise": True,
+            "returnByValue": True,
+        }, timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CDPError(f"Page script failed: {details.get('exception', {}).get('description') or details.get('text')}")
+        return result.get("result", {}).get("value")
+
+    async def close(self):
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+        except CDPError:
+            pass # Already gone with its browser
@@ -1,52 +1,505 @@
 #!/usr/bin/env python
 
+import argparse
+import asyncio
+import collections
+import contextlib
+import glob
+import itertools
 import os
+import queue
+import shutil
+import tempfile
+import threading
 import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver import ActionChains
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.keys import Keys
 
-SCRIPT_VERSION = "24" # Use a string for the version number
-print(f"Starting Google Drive Clone Script Version: {SCRIPT_VERSION}")
-print("-" * 40) # Add a separator line for clarity
+from cdp import CDPConnection, CDPError, PageRequestBlocker, browser_websocket_url, debugger_address
+from cdp_engine import AsyncCDPConnection, PageTarget
+from downloads import DownloadTracker
+from manifest import CrawlManifest, file_key
+from http_engine import HttpFetchEngine, GOOGLE_URLS, stand_in_urls, export_url, safe_filename
+from bulk_download import zip_parts, extract_members
+from waits import AdaptiveWaits, script_value_stable, script_value_changed, any_clickable
+from tracing import Tracer
+from browser_memory import tree_memory
+from content_store import ContentStore
+from output_sink import ArchiveSink, DirectorySink
+from retry_queue import RetryQueue, MAX_ATTEMPTS
+from work_queue import SharedFrontier
+from inventory import measured_costs, write_report, largest_subtrees, schedule_folders, interleave_exports
 
+SCRIPT_VERSION = "49" # Use a string for the version number
+
+parser = argparse.ArgumentParser(description="Back up a Google Drive tree by driving the Drive web UI.")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Number of parallel browser sessions crawling a shared folder frontier (default: 1)")
+parser.add_argument("--drive-url", default="https://drive.google.com",
+                    help="Base URL of the Drive web UI; point it at fake_drive.py to test without a Google account")
+parser.add_argument("--manifest", default="./gdrive_manifest.sqlite",
+                    help="SQLite crawl manifest used to checkpoint progress and resume an interrupted run")
+parser.add_argument("--engine", choices=["ui", "http", "cdp"], default="ui",
+                    help="How files are fetched: 'ui' clicks through Drive and the editors, 'http' requests export and "
+                         "download URLs directly with the browser session's cookies, 'cdp' crawls several folder "
+                         "tabs per browser at once over the DevTools protocol and lets Chrome download the export "
+                         "and download URLs (needs the websockets package) (default: ui)")
+parser.add_argument("--cdp-tabs", type=int, default=4,
+                    help="Folder tabs crawled at once per browser, and as many download tabs, for --engine cdp "
+                         "(default: 4)")
+parser.add_argument("--http-concurrency", type=int, default=4,
+                    help="Parallel direct fetches for --engine http (default: 4)")
+parser.add_argument("--sync", action="store_true",
+                    help="Incremental run: start at My Drive, skip complete sub-trees whose folder modified stamp is "
+                         "unchanged and re-fetch only files whose modified stamp or size changed")
+parser.add_argument("--export-tabs", type=int, default=3,
+                    help="Background tabs per browser in which the next Docs/Sheets/Slides editors load while the "
+                         "current export runs; 0 opens each editor by double-click instead (default: 3)")
+parser.add_argument("--bulk-download", type=int, default=0, metavar="N",
+                    help="Select up to N plain files at a time and fetch them with one multi-file download, "
+                         "unpacking Drive's zip parts into the folder; 0 downloads every file on its own (default: 0)")
+parser.add_argument("--trace", default="./gdrive_trace.jsonl",
+                    help="JSON-lines file receiving a timing span per phase (navigation, scans, relocation, exports, "
+                         "downloads); an empty value turns the file off (default: ./gdrive_trace.jsonl)")
+parser.add_argument("--content-store", default="", metavar="DIR",
+                    help="Keep one copy of every distinct file content in DIR (same filesystem as the backup) and "
+                         "hardlink it into each folder where it appears; a Drive item already stored is linked "
+                         "instead of fetched again. Off by default")
+parser.add_argument("--output", choices=["tree", "archive"], default="tree",
+                    help="Where finished files go: 'tree' keeps them in the backup folder tree, 'archive' streams "
+                         "them into size-capped tar volumes in --archive-dir with an index of every file's volume "
+                         "and offset, and removes them from the tree (default: tree)")
+parser.add_argument("--archive-dir", default="./gdrive_archive", metavar="DIR",
+                    help="Volumes and index of --output archive (default: ./gdrive_archive)")
+parser.add_argument("--volume-size-mb", type=int, default=1024,
+                    help="Size at which --output archive starts its next volume (default: 1024)")
+parser.add_argument("--zstd", action="store_true",
+                    help="Compress --output archive volumes with zstd, one frame per file so they stay seekable "
+                         "(needs the zstandard package)")
+parser.add_argument("--headless", action="store_true",
+                    help="Run Chrome without a window, e.g. for bench.py runs against fake_drive.py")
+parser.add_argument("--lean", action="store_true",
+                    help="Resource-lean browsers: headless, thumbnails/media/fonts/telemetry blocked, small caches and "
+                         "no GPU or background extras. The profile in --session-dir must already be logged in")
+parser.add_argument("--recycle-memory-mb", type=int, default=4096,
+                    help="Restart a browser whose processes together use more than this many MB; 0 turns the "
+                         "check off (default: 4096)")
+parser.add_argument("--recycle-items", type=int, default=0, metavar="N",
+                    help="Restart each browser after it has handled N files; 0 never does (default: 0)")
+parser.add_argument("--session-dir", default="/tmp/chrome-user-data",
+                    help="Chrome user-data directory holding the logged-in profile (default: /tmp/chrome-user-data)")
+parser.add_argument("--chromedriver", default="",
+                    help="Path of the chromedriver binary (default: installed by webdriver_manager if available, "
+                         "else found by Selenium)")
+parser.add_argument("--debugger-address", default="", metavar="HOST:PORT",
+                    help="Attach to a running Chrome started with --remote-debugging-port instead of launching one "
+                         "for the main session, e.g. 127.0.0.1:9222; its login is reused and it stays open "
+                         "after the run")
+parser.add_argument("--retries", type=int, default=MAX_ATTEMPTS - 1, metavar="N",
+                    help="Retry a failed file up to N times after the crawl, with growing delays; 0 gives up on "
+                         f"the first failure and keeps full timeouts; files --engine cdp leaves to the UI still get "
+                         f"their one attempt after the crawl (default: {MAX_ATTEMPTS - 1})")
+parser.add_argument("--queue", default="", metavar="PATH",
+                    help="Crawl together with other hosts through a shared SQLite work queue at PATH (on shared "
+                         "storage, or a local disk for several processes on one machine); all hosts should also "
+                         "share --manifest. Use a fresh queue file for each run")
+parser.add_argument("--queue-role", choices=["coordinator", "worker"], default="coordinator",
+                    help="With --queue: the coordinator seeds the queue and retries deferred files after the "
+                         "crawl; workers only lease folders (default: coordinator)")
+parser.add_argument("--inventory", action="store_true",
+                    help="Dry run: walk the tree and record every folder and file in the manifest without fetching "
+                         "anything, then report counts, sizes and a projected runtime per subtree")
+parser.add_argument("--inventory-report", default="./gdrive_inventory.json", metavar="PATH",
+                    help="Where --inventory writes its per-subtree totals (default: ./gdrive_inventory.json)")
+parser.add_argument("--schedule", action="store_true",
+                    help="Order a run that resumes from a manifest (e.g. after --inventory): priority paths first, "
+                         "then the folders with the most work, with slow exports interleaved with cheap files")
+parser.add_argument("--priority", action="append", default=[], metavar="PATH",
+                    help="With --schedule: crawl this folder (relative to the backup root, e.g. 'Projects/2024') "
+                         "and everything below it first; may be given several times")
+parser.add_argument("--export-formats", action="append", default=[], metavar="TYPE=FORMAT,...",
+                    help="Formats to export Docs/Sheets/Slides in, all from one open editor, e.g. doc=docx,pdf or "
+                         "sheet=xlsx,csv (CSV/TSV give one file per sheet); may be given once per type "
+                         "(default: doc=docx, sheet=xlsx, slide=pptx)")
 # Configuration
 BASE_DOWNLOAD_DIR = os.path.abspath("./gdrive_backup")
-SESSION_DIR = "/tmp/chrome-user-data"
-WAIT_TIME = 3  # Adjust for slower internet
-
-# Setup browser profile
-options = webdriver.ChromeOptions()
-options.add_argument(f"--user-data-dir={SESSION_DIR}")
-options.add_argument("--profile-directory=Default")
-options.add_argument("--start-maximized")
-
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-options.add_experimental_option("detach", True)
-
-prefs = {
-    "download.prompt_for_download": False,
-    "download.directory_upgrade": True,
-    "safebrowsing.enabled": True
+# Chrome saves every download here first (one sub-directory per session); inside the backup so moves are renames
+STAGING_ROOT = os.path.join(BASE_DOWNLOAD_DIR, ".staging")
+WAIT_TIME = 3  # Ceiling for optional waits (rows, dialogs, menus); shorter learned timeouts take over during the run
+ROOT_FOLDER_ID = "my-drive"
+MAX_FOLDER_DEPTH = 10 # Safety limit against runaway recursion
+DOWNLOAD_BEGIN_TIMEOUT = 30 # Seconds for Chrome to accept a download after the virus scan dialog
+EXPORT_BEGIN_TIMEOUT = 60 # Seconds for Docs/Sheets/Slides to produce the export and start its download
+DOWNLOAD_DRAIN_TIMEOUT = 600 # Seconds to let running downloads finish before quitting a browser
+DRIVE_READY_TIMEOUT = 10 # Seconds for a signed-in profile to show the file list, after which the login prompt appears
+BULK_PREPARE_TIMEOUT = 300 # Seconds for Drive to zip a multi-file download before it begins
+
+# Requests a backup never needs, blocked in every tab in --lean mode (Network.setBlockedURLs wildcards).
+# File downloads come from *-docs.googleusercontent.com and exports from docs.google.com, which stay allowed.
+LEAN_BLOCKED_URLS = [
+    # Thumbnails, previews and avatars
+    "*://lh3.google.com/*", "*://lh3.googleusercontent.com/*", "*://lh4.googleusercontent.com/*",
+    "*://lh5.googleusercontent.com/*", "*://lh6.googleusercontent.com/*", "*://drive.google.com/thumbnail*",
+    # File-type icons (Drive's and fake_drive.py's); the crawler only reads their src attribute
+    "*://drive-thirdparty.googleusercontent.com/*", "*/icons/16/type/*",
+    # Media and web fonts
+    "*.mp4*", "*.webm*", "*.mp3*", "*.woff2*", "*.woff*", "*.ttf*", "*://fonts.gstatic.com/*",
+    # Telemetry and ads
+    "*://www.google-analytics.com/*", "*://www.googletagmanager.com/*", "*://*.doubleclick.net/*",
+    "*://play.google.com/log*", "*/gen_204*", "*://csp.withgoogle.com/*",
+]
+LEAN_CACHE_BYTES = 32 * 1024 * 1024
+MEMORY_CHECK_INTERVAL = 30 # Seconds between measurements of a browser's process tree
+# Export formats per Workspace type: format -> (file extension, text identifying its entry in File > Download)
+EXPORT_FORMAT_MENU = {
+    "doc": {"docx": ("docx", "(.docx)"), "odt": ("odt", "(.odt)"), "rtf": ("rtf", "(.rtf)"), "pdf": ("pdf", "(.pdf)"),
+            "txt": ("txt", "(.txt)"), "html": ("zip", "(.html"), "epub": ("epub", "(.epub)"), "md": ("md", "(.md)")},
+    "sheet": {"xlsx": ("xlsx", "(.xlsx)"), "ods": ("ods", "(.ods)"), "pdf": ("pdf", "(.pdf)"), "html": ("zip", "(.html"),
+              "csv": ("csv", "(.csv"), "tsv": ("tsv", "(.tsv")},
+    "slide": {"pptx": ("pptx", "(.pptx)"), "odp": ("odp", "(.odp)"), "pdf": ("pdf", "(.pdf)"), "txt": ("txt", "(.txt)")},
 }
-options.add_experimental_option("prefs", prefs)
+PER_SHEET_FORMATS = ("csv", "tsv") # Sheets export only the active sheet in these
+RETRY_POLL_INTERVAL = 60 # Longest sleep of the retry pass while waiting for the next retry to come due
+
+def configure(argv=None):
+    """
+    Sets the command-line dependent configuration from argv (sys.argv[1:] if None).
+    Runs with the defaults on import, so the crawl functions can be used from other scripts.
+    """
+    global SESSION_DIR, DEBUGGER_ADDRESS, WORKER_COUNT, DRIVE_BASE_URL, DRIVE_ROOT_URL, MANIFEST_PATH, TRACE_PATH
+    global CONTENT_STORE_DIR, SYNC_MODE, ARCHIVE_DIR, ARCHIVE_VOLUME_BYTES, ARCHIVE_ZSTD, FETCH_ENGINE
+    global HTTP_CONCURRENCY, CDP_TABS, EXPORT_TABS, BULK_BATCH_SIZE, DOCS_BASE_URL, FETCH_URLS, CHROMEDRIVER_PATH
+    global LEAN_MODE, HEADLESS, RECYCLE_MEMORY_BYTES, RECYCLE_AFTER_ITEMS, EXPORT_FORMATS, RETRY_ATTEMPTS
+    global QUEUE_PATH, QUEUE_ROLE, INVENTORY_MODE, INVENTORY_REPORT_PATH, SCHEDULE_MODE, PRIORITY_PATHS
+    args = parser.parse_args(argv)
+    SESSION_DIR = args.session_dir
+    DEBUGGER_ADDRESS = args.debugger_address or None
+    WORKER_COUNT = max(1, args.workers)
+    DRIVE_BASE_URL = args.drive_url.rstrip("/")
+    DRIVE_ROOT_URL = f"{DRIVE_BASE_URL}/drive/my-drive"
+    MANIFEST_PATH = os.path.abspath(args.manifest)
+    TRACE_PATH = os.path.abspath(args.trace) if args.trace else None
+    CONTENT_STORE_DIR = os.path.abspath(args.content_store) if args.content_store else None
+    SYNC_MODE = args.sync
+    ARCHIVE_DIR = os.path.abspath(args.archive_dir) if args.output == "archive" else None
+    ARCHIVE_VOLUME_BYTES = max(1, args.volume_size_mb) * 1024 * 1024
+    ARCHIVE_ZSTD = args.zstd
+    if ARCHIVE_DIR and CONTENT_STORE_DIR:
+        parser.error("--content-store hardlinks files in the backup tree, which --output archive empties")
+    FETCH_ENGINE = args.engine
+    HTTP_CONCURRENCY = max(1, args.http_concurrency)
+    CDP_TABS = max(1, args.cdp_tabs)
+    EXPORT_TABS = max(0, args.export_tabs)
+    BULK_BATCH_SIZE = max(0, args.bulk_download)
+    # Editors live on docs.google.com; a local stand-in serves them from its own host
+    DOCS_BASE_URL = "https://docs.google.com" if DRIVE_BASE_URL == "https://drive.google.com" else DRIVE_BASE_URL
+    # Export and download URLs of the http and cdp engines; a non-Google --drive-url is a local stand-in serving them too
+    FETCH_URLS = GOOGLE_URLS if DRIVE_BASE_URL == "https://drive.google.com" else stand_in_urls(DRIVE_BASE_URL)
+    CHROMEDRIVER_PATH = args.chromedriver or None
+    LEAN_MODE = args.lean
+    HEADLESS = args.headless or LEAN_MODE
+    RECYCLE_MEMORY_BYTES = max(0, args.recycle_memory_mb) * 1024 * 1024
+    RECYCLE_AFTER_ITEMS = max(0, args.recycle_items)
+    EXPORT_FORMATS = {"doc": ["docx"], "sheet": ["xlsx"], "slide": ["pptx"]} # The first one is the item's manifest path
+    for format_spec in args.export_formats:
+        spec_type, _, spec_formats = format_spec.partition("=")
+        spec_formats = [f.strip().lower() for f in spec_formats.split(",") if f.strip()]
+        if spec_type not in EXPORT_FORMAT_MENU or not spec_formats:
+            parser.error(f"--export-formats {format_spec}: expected doc=..., sheet=... or slide=... with a list of formats")
+        unknown = [f for f in spec_formats if f not in EXPORT_FORMAT_MENU[spec_type]]
+        if unknown:
+            parser.error(f"--export-formats {format_spec}: unknown {spec_type} format(s) {', '.join(unknown)}; "
+                         f"known: {', '.join(EXPORT_FORMAT_MENU[spec_type])}")
+        EXPORT_FORMATS[spec_type] = list(dict.fromkeys(spec_formats))
+    RETRY_ATTEMPTS = max(0, args.retries)
+    QUEUE_PATH = os.path.abspath(args.queue) if args.queue else None
+    QUEUE_ROLE = args.queue_role
+    INVENTORY_MODE = args.inventory
+    INVENTORY_REPORT_PATH = os.path.abspath(args.inventory_report)
+    SCHEDULE_MODE = args.schedule or bool(args.priority)
+    PRIORITY_PATHS = args.priority
+    if SCHEDULE_MODE:
+        # The schedule orders the frontier a run resumes from; the other runs start with My Drive alone
+        if SYNC_MODE or INVENTORY_MODE:
+            parser.error("--schedule and --priority order a resumed run; they cannot be combined with --sync or --inventory")
+        if not os.path.exists(MANIFEST_PATH):
+            parser.error(f"--schedule and --priority order a run resuming from --manifest, but {MANIFEST_PATH} "
+                         "does not exist yet (run --inventory first)")
+
+configure([])
+
+# Profile sub-directories that are pure cache; skipping them keeps worker profile copies small and fast
+PROFILE_COPY_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "*.lock", "Cache", "Code Cache", "GPUCache", "Service Worker", "DawnCache", "GrShaderCache"
+)
+
+# Cookie fields accepted by Network.setCookies (Network.getAllCookies returns a few more)
+COOKIE_PARAM_KEYS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires", "priority")
+
+def build_chrome_options(session_dir):
+    """Chrome options for one browser session using the given user-data directory"""
+    options = webdriver.ChromeOptions()
+    options.add_argument(f"--user-data-dir={session_dir}")
+    options.add_argument("--profile-directory=Default")
+    if HEADLESS:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("--start-maximized")
+
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    # Editors preloading in background tabs must not be throttled while the foreground tab exports
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-renderer-backgrounding')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    if LEAN_MODE:
+        # Small caches and none of the GPU, extension, sync or background services a backup never uses
+        options.add_argument(f"--disk-cache-size={LEAN_CACHE_BYTES}")
+        options.add_argument("--media-cache-size=1")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-software-rasterizer")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-component-extensions-with-background-pages")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-sync")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--mute-audio")
+        options.add_argument("--no-first-run")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication")
+    else:
+        options.add_experimental_option("detach", True)
+
+    prefs = {
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    options.add_experimental_option("prefs", prefs)
+    return options
+
+_installed_chromedriver = None
+
+def chromedriver_service():
+    """chromedriver from --chromedriver, webdriver_manager (installed once per run) or Selenium Manager"""
+    global _installed_chromedriver
+    if CHROMEDRIVER_PATH:
+        return Service(CHROMEDRIVER_PATH)
+    if _installed_chromedriver is None:
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager # Optional; slow to import and to run
+        except ImportError:
+            _installed_chromedriver = ""
+        else:
+            _installed_chromedriver = ChromeDriverManager().install()
+    return Service(_installed_chromedriver or None) # None: Selenium Manager finds or fetches a matching driver
 
-# driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver = webdriver.Chrome(service=Service("/home/yena/Documents/2025/xiao-hu-school-documents/chromedriver-linux64/chromedriver"), options=options)
+def launch_driver(session_dir, debugger_address=None):
+    """A WebDriver for a new browser on session_dir, or for the running one at debugger_address"""
+    if debugger_address:
+        options = webdriver.ChromeOptions()
+        options.debugger_address = debugger_address
+        return webdriver.Chrome(service=chromedriver_service(), options=options)
+    return webdriver.Chrome(service=chromedriver_service(), options=build_chrome_options(session_dir))
 
-# Navigate to Google Drive
-driver.get("https://drive.google.com/drive/my-drive")
-input("Login and press Enter when Drive is ready...")
+def record_file_failure(item_key, reason):
+    """
+    Marks a file failed with reason; unless it has used up its attempts it is also queued for a retry.
+    Returns True if it was queued. With --retries 0 every failure uses up the file's one attempt,
+    which also closes the retry of an item the cdp engine deferred to the UI.
+    """
+    manifest.set_file_status(item_key, "failed", error=reason)
+    return retry_queue.defer(item_key, reason)
+
+def record_output_done(item_key, path, byte_count, digest=None):
+    """
+    Marks a file done once one of its outputs is fetched; returns True if path is its manifest path.
+    An item exported in several formats has one download per format: a failure of any of them
+    wins (the retry fetches the formats still missing), and only the first format sets the
+    size, path and digest.
+    """
+    record = manifest.file_record(item_key)
+    if record and record["status"] == "failed":
+        return False
+    primary = not record or record.get("path") in (None, path)
+    if primary:
+        manifest.set_file_status(item_key, "done", byte_count=byte_count, path=path, digest=digest)
+        retry_queue.resolve(item_key)
+    elif record["status"] != "done":
+        manifest.set_file_status(item_key, "done")
+        retry_queue.resolve(item_key)
+    return primary
+
+def record_download_result(ticket):
+    """Download tracker listener: stores the final outcome of a download in the manifest and the trace"""
+    tracer.event("download_complete", time.monotonic() - ticket["created_at"], session="downloads",
+                 item_key=ticket["item_key"], outcome=ticket["state"],
+                 bytes=ticket["received"] if ticket["state"] == "completed" else 0)
+    if not ticket["item_key"]:
+        return
+    if ticket["state"] == "completed":
+        primary = record_output_done(ticket["item_key"], ticket["path"], ticket["received"])
+        if ticket["path"]:
+            output_sink.add(ticket["path"], ticket["item_key"])
+        if content_store and ticket["path"]:
+            # Hashing a large file must not hold up the CDP reader thread this listener runs on
+            item_key = ticket["item_key"]
+
+            def store_digest(digest):
+                if digest and primary:
+                    manifest.set_file_digest(item_key, digest)
+            content_store.ingest_later(ticket["path"], store_digest)
+    elif ticket["state"] != "not_started":
+        # A download that never began was canceled by its caller, which records the failure itself
+        record_file_failure(ticket["item_key"], f"download {ticket['state']}")
+
+class BrowserSession:
+    """One Chrome instance, its download tracker and the name used for it in log output."""
+
+    def __init__(self, name, session_dir, debugger_address=None):
+        self.name = name
+        self.session_dir = session_dir
+        self.debugger_address = debugger_address # Set for a running browser this session attaches to
+        self.launch()
+
+    def launch(self):
+        """Starts the browser (or attaches to it) and its CDP helpers; the profile in session_dir carries the login"""
+        if self.debugger_address:
+            print(f"[{self.name}] Attaching to the running browser at {self.debugger_address}")
+        else:
+            print(f"[{self.name}] Launching browser with profile {self.session_dir}")
+        self.driver = launch_driver(self.session_dir, self.debugger_address)
+        tracer.count_commands(self.driver)
+        staging_dir = None # An inventory downloads nothing and leaves the backup directory alone
+        if not INVENTORY_MODE:
+            staging_dir = os.path.join(STAGING_ROOT, self.name)
+            # Whatever is left there belongs to downloads of a browser that is gone
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.downloads = DownloadTracker(CDPConnection.for_driver(self.driver), self.name, staging_dir)
+        self.downloads.add_listener(record_download_result)
+        self.request_blocker = None
+        if LEAN_MODE:
+            # A connection of its own keeps the blocked pages' network events off the download tracker's reader
+            self.request_blocker = PageRequestBlocker(CDPConnection.for_driver(self.driver), LEAN_BLOCKED_URLS)
+        self.tab_pool = None # EditorTabPool, created on the first pooled export
+        self.element_index = {} # Drive ID -> name element of the rendered rows, rebuilt by every harvest
+        self.items_since_launch = 0
+        self._memory_checked_at = time.monotonic()
+
+    def quit(self, drain_timeout=DOWNLOAD_DRAIN_TIMEOUT):
+        if self.tab_pool:
+            self.tab_pool.close()
+        print(f"[{self.name}] Waiting for running downloads to finish (up to {drain_timeout}s)...")
+        if not self.downloads.wait_all(drain_timeout):
+            print(f"[{self.name}] Some downloads were still running when the browser was closed.")
+        print(self.downloads.summary())
+        self.downloads.connection.close()
+        if self.request_blocker:
+            self.request_blocker.connection.close()
+        try:
+            self.driver.quit() # An attached browser keeps running; chromedriver only lets go of it
+        except Exception as e:
+            print(f"[{self.name}] Error while quitting browser: {e}")
+
+    def is_alive(self):
+        """False once the browser has crashed or stopped answering chromedriver"""
+        try:
+            self.driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    def recycle_reason(self):
+        """Why the browser should be restarted now (item count or memory ceiling), or None"""
+        if self.debugger_address:
+            return None # Not ours to restart, and its processes are not below chromedriver
+        if RECYCLE_AFTER_ITEMS and self.items_since_launch >= RECYCLE_AFTER_ITEMS:
+            return f"{self.items_since_launch} files handled"
+        if not RECYCLE_MEMORY_BYTES or time.monotonic() - self._memory_checked_at < MEMORY_CHECK_INTERVAL:
+            return None
+        self._memory_checked_at = time.monotonic()
+        memory = tree_memory(self.driver.service.process.pid)
+        if memory is None:
+            return None
+        total, largest = memory
+        tracer.event("browser_memory", session=self.name, bytes_total=total, bytes_largest=largest)
+        if total > RECYCLE_MEMORY_BYTES:
+            return f"{total / 1024 / 1024:.0f} MB in use, largest process {largest / 1024 / 1024:.0f} MB"
+        return None
+
+    def restart(self, reason):
+        """
+        Replaces the browser with a fresh one on the same profile, carrying the cookies over,
+        so the crawl continues without a new login. The caller reopens the folder it was in.
+        """
+        print(f"[{self.name}] Restarting browser: {reason}")
+        with tracer.span("restart", reason=reason):
+            alive = self.is_alive()
+            cookies = []
+            if alive:
+                try:
+                    cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+                except WebDriverException as e:
+                    print(f"[{self.name}] Could not save cookies before the restart: {e.__class__.__name__}")
+            # Downloads of a crashed browser will never finish, so only a live one is drained
+            self.quit(DOWNLOAD_DRAIN_TIMEOUT if alive else 0)
+            self.launch()
+            if cookies:
+                self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookie_params(cookies)})
+            print(f"[{self.name}] Browser restarted with {len(cookies)} cookies restored.")
+
+def prepare_worker_profile(worker_idx):
+    """
+    Copies the logged-in SESSION_DIR profile for an extra worker.
+    Chrome locks a user-data directory to a single running instance, so every
+    additional session needs its own copy of the profile.
+    """
+    worker_dir = f"{SESSION_DIR}-worker{worker_idx}"
+    print(f"Copying browser profile {SESSION_DIR} -> {worker_dir}")
+    shutil.copytree(SESSION_DIR, worker_dir, ignore=PROFILE_COPY_IGNORE, dirs_exist_ok=True)
+    return worker_dir
+
+def cookie_params(cookies):
+    """Network.getAllCookies results reduced to the fields Network.setCookies accepts"""
+    return [{k: c[k] for k in COOKIE_PARAM_KEYS if k in c} for c in cookies]
+
+def copy_login_cookies(source_session, target_session):
+    """
+    Transplants the cookies of the logged-in session into another one.
+    Chrome only flushes cookies to disk periodically, so a fresh profile copy
+    may still be missing the login that was just completed.
+    """
+    cookies = source_session.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    target_session.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookie_params(cookies)})
+    print(f"[{target_session.name}] Copied {len(cookies)} cookies from [{source_session.name}]")
+
+def drive_session_ready(driver):
+    """Wait condition: Drive shows its file list, i.e. the profile is signed in (not on a sign-in page)"""
+    return "accounts.google.com" not in driver.current_url and bool(driver.find_elements(By.CSS_SELECTOR, 'div[role="main"]'))
+
+def open_drive(session):
+    """Opens My Drive in the session's browser and asks for a login only if the profile is not signed in"""
+    session.driver.get(DRIVE_ROOT_URL)
+    if waits.optional(session.driver, "drive_ready", drive_session_ready, DRIVE_READY_TIMEOUT):
+        print(f"[{session.name}] Drive is open and signed in.")
+        return
+    input("Login and press Enter when Drive is ready...")
 
-# Global variable for the first PDF download attempt diagnostic
-_first_pdf_download_attempt = True
+# Run state, opened by main(); waits and tracer work without it for scripts importing this module
+waits = AdaptiveWaits() # Shared by all sessions, so every worker benefits from the learned latencies
+tracer = Tracer()
+manifest = None
+content_store = None
+output_sink = DirectorySink()
+retry_queue = None
+main_session = None
+fetch_engine = None
+run_costs = None
 
 # Pre-defined list of UI elements to fully skip
 SYSTEM_UI_ELEMENTS_TO_SKIP = [
@@ -55,60 +508,256 @@ SYSTEM_UI_ELEMENTS_TO_SKIP = [
     'sort direction', 'select', 'view', 'list view', 'grid view' 
 ]
 
-def collect_current_items_in_view(depth: int) -> list[dict]:
+# Harvests every candidate item in the view in a single WebDriver round trip.
+# Modified/size come from the row's grid cells and the MIME type from the Drive
+# file-type icon URL (.../type/<mime>); any of them may be null. The element
+# itself comes back as a WebElement handle for the session's element index.
+HARVEST_ITEMS_JS = r"""
+const SIZE_RE = /^\d[\d.,]*\s*(bytes|B|KB|MB|GB|TB)$/i;
+const DATE_RE = /\d{1,2}:\d{2}|\b(19|20)\d{2}\b|^[A-Z][a-z]{2} \d{1,2}$/;
+return Array.from(document.querySelectorAll('div[role="main"] div[data-tooltip]')).map(el => {
+  const row = el.closest('[data-id]');
+  let modified = null, size = null, mime = null;
+  if (row) {
+    for (const cell of row.querySelectorAll('[role="gridcell"]')) {
+      const text = (cell.textContent || '').trim();
+      if (size === null && SIZE_RE.test(text)) size = text;
+      else if (modified === null && DATE_RE.test(text)) modified = text;
+    }
+    const icon = row.querySelector('img[src*="/type/"]');
+    const m = icon && icon.getAttribute('src').match(/\/type\/([^?#]+)/);
+    if (m) mime = decodeURIComponent(m[1]);
+  }
+  return {
+    id: row ? row.getAttribute('data-id') : null,
+    tooltip: el.getAttribute('data-tooltip'),
+    label: el.getAttribute('aria-label'),
+    mime: mime,
+    modified: modified,
+    size: size,
+    element: el
+  };
+});
+"""
+
+# Name element of the row with the given Drive ID, or null if it is not rendered
+FIND_ITEM_JS = r"""
+const row = document.querySelector('div[role="main"] [data-id="' + CSS.escape(arguments[0]) + '"]');
+if (!row) return null;
+return row.matches('[data-tooltip]') ? row : row.querySelector('[data-tooltip]');
+"""
+
+SIZE_UNITS = {"bytes": 1, "b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+
+def parse_size_text(size_text):
+    """Converts a Drive size column value like '1.5 MB' to bytes; None if it can't be parsed"""
+    if not size_text:
+        return None
+    parts = size_text.replace(",", "").split()
+    if len(parts) != 2 or parts[1].lower() not in SIZE_UNITS:
+        return None
+    try:
+        return int(float(parts[0]) * SIZE_UNITS[parts[1].lower()])
+    except ValueError:
+        return None
+
+# Scrolls the list of the folder view by most of a screen. Drive renders long
+# folders virtually and loads more rows near the bottom, so items past the first
+# screen only exist in the DOM after scrolling. Returns whether it moved.
+SCROLL_VIEW_JS = r"""
+const rows = document.querySelectorAll('div[role="main"] [data-id]');
+let el = rows.length ? rows[rows.length - 1].parentElement : null;
+while (el && !(el.scrollHeight > el.clientHeight + 1 && /(auto|scroll)/.test(getComputedStyle(el).overflowY))) {
+  el = el.parentElement;
+}
+el = el || document.scrollingElement;
+const before = el.scrollTop;
+el.scrollTop = before + Math.max(el.clientHeight * 0.8, 100);
+return el.scrollTop > before;
+"""
+
+# Cheap fingerprint of the rendered rows: their count and first and last ID
+VIEW_SIGNATURE_JS = r"""
+const rows = document.querySelectorAll('div[role="main"] [data-id]');
+return [rows.length,
+        rows.length ? rows[0].getAttribute('data-id') : null,
+        rows.length ? rows[rows.length - 1].getAttribute('data-id') : null];
+"""
+
+# Number of menus currently shown (context menu, File menu, Download submenu)
+VISIBLE_MENUS_JS = r"""
+return Array.from(document.querySelectorAll('[role="menu"]')).filter(m => m.offsetParent !== null).length;
+"""
+
+# Names of a spreadsheet's sheet tabs, in tab order, and the name of the active one (per-sheet exports)
+SHEET_TAB_NAMES_JS = r"""
+return Array.from(document.querySelectorAll('.docs-sheet-tab .docs-sheet-tab-name')).map(t => t.textContent.trim());
+"""
+ACTIVE_SHEET_NAME_JS = r"""
+const tab = document.querySelector('.docs-sheet-tab.docs-sheet-active-tab .docs-sheet-tab-name');
+return tab ? tab.textContent.trim() : null;
+"""
+
+# Highlighted entry of an open menu, in Docs/Drive (goog-menuitem) or fake_drive.py markup
+HIGHLIGHTED_MENU_ITEM_CSS = ('[role="menu"] .goog-menuitem-highlight, [role="menu"] [role="menuitem"].active, '
+                             '[role="menu"] [role="menuitem"][aria-selected="true"]')
+
+def menu_item_highlighted(driver):
+    """Wait condition: an entry of an open menu is highlighted after keyboard navigation"""
+    return driver.execute_script("return !!document.querySelector(arguments[0]);", HIGHLIGHTED_MENU_ITEM_CSS)
+
+SCROLL_SETTLE_TIME = 1 # Ceiling in seconds for newly rendered or lazily loaded rows to appear after a scroll
+SETTLE_QUIET_MS = 150 # A view counts as rendered once its DOM has not changed for this long (--engine cdp)
+
+# Harvests a whole folder view in one DevTools round trip (--engine cdp). The same scroll-and-collect loop
+# as harvest_view_batches runs inside the page, and settling is awaited with a MutationObserver rather
+# than polled. Resolves to the HARVEST_ITEMS_JS records of every row, without their elements.
+HARVEST_ALL_JS = r"""
+(async () => {
+  const harvest = () => { %HARVEST% };
+  const scroll = () => { %SCROLL% };
+  const signature = () => JSON.stringify((() => { %SIGNATURE% })());
+  // Resolves true as soon as cond() holds after a DOM change, false after limitMs
+  const waitFor = (cond, limitMs) => new Promise(resolve => {
+    if (cond()) return resolve(true);
+    const observer = new MutationObserver(() => { if (cond()) finish(true); });
+    const cap = setTimeout(() => finish(false), limitMs);
+    function finish(value) { observer.disconnect(); clearTimeout(cap); resolve(value); }
+    observer.observe(document, {childList: true, subtree: true, attributes: true});
+  });
+  // Resolves once the DOM has been quiet for quietMs, or after limitMs
+  const settle = (quietMs, limitMs) => new Promise(resolve => {
+    let quiet = setTimeout(finish, quietMs);
+    const observer = new MutationObserver(() => { clearTimeout(quiet); quiet = setTimeout(finish, quietMs); });
+    const cap = setTimeout(finish, limitMs);
+    function finish() { observer.disconnect(); clearTimeout(quiet); clearTimeout(cap); resolve(); }
+    observer.observe(document, {childList: true, subtree: true});
+  });
+  const rowCount = () => document.querySelectorAll('div[role="main"] [data-id]').length;
+  if (await waitFor(() => rowCount() > 0, %WAIT_MS%)) await settle(%QUIET_MS%, %SETTLE_MS%);
+  const items = new Map();
+  while (true) {
+    for (const item of harvest()) {
+      delete item.element;
+      const key = item.id || item.tooltip + '\n' + item.label;
+      if (!items.has(key)) items.set(key, item);
+    }
+    if (scroll()) { await settle(%QUIET_MS%, %SETTLE_MS%); continue; }
+    // At the bottom, wait for lazily loaded rows before the list counts as complete
+    const bottom = signature();
+    if (!await waitFor(() => signature() !== bottom, %SETTLE_MS%)) break;
+    await settle(%QUIET_MS%, %SETTLE_MS%);
+  }
+  return Array.from(items.values());
+})()
+""".replace("%HARVEST%", HARVEST_ITEMS_JS).replace("%SCROLL%", SCROLL_VIEW_JS).replace(
+    "%SIGNATURE%", VIEW_SIGNATURE_JS).replace("%WAIT_MS%", str(WAIT_TIME * 1000)).replace(
+    "%QUIET_MS%", str(SETTLE_QUIET_MS)).replace("%SETTLE_MS%", str(SCROLL_SETTLE_TIME * 1000))
+
+def filter_view_items(raw_items):
     """
-    Scans the current view for file/folder items, filters out UI elements and shortcuts,
-    and returns a list of attribute dictionaries for processable items.
+    Filters UI elements and shortcuts out of HARVEST_ITEMS_JS results and returns attribute dictionaries.
+    Each item carries "id" (row data-id), "tooltip", "label", "clean_name", "file_name", "mime",
+    "modified" (column text) and "size" (bytes); the last four may be None. clean_name names
+    folders and exports; file_name, the label with only path-unsafe characters replaced, names
+    downloaded files, so "report.v2.pdf" keeps its dots and extension.
     """
-    print(f"{'  ' * depth}Collecting items in current view...")
-    time.sleep(WAIT_TIME) # Allow time for items to load
-
-    current_view_elements = driver.find_elements(By.XPATH, '//div[@role="main"]//div[@data-tooltip]')
-    print(f"{'  ' * depth}Found {len(current_view_elements)} potential items in current view scan.")
-    
     collected_items_attrs = []
-    for elem_idx, initial_elem in enumerate(current_view_elements):
-        try:
-            tooltip = initial_elem.get_attribute("data-tooltip")
-            label = initial_elem.get_attribute("aria-label")
+    for raw_item in raw_items:
+        tooltip = raw_item.get("tooltip")
+        label = raw_item.get("label")
 
-            if not label or not tooltip:
-                # print(f"{'  ' * depth}Skipping element with missing tooltip/label (index {elem_idx})")
-                continue
+        if not label or not tooltip:
+            continue
 
-            tooltip_lower_for_check = tooltip.lower()
-            label_lower_for_check = label.lower() if label else ""
+        tooltip_lower_for_check = tooltip.lower()
+        label_lower_for_check = label.lower()
 
-            # Filter UI elements
-            if any(skip_text in tooltip_lower_for_check or skip_text in label_lower_for_check for skip_text in SYSTEM_UI_ELEMENTS_TO_SKIP):
-                # print(f"{'  ' * depth}Skipping UI element during collection: {tooltip}")
-                continue
-            
-            # Filter Google Drive shortcuts
-            if tooltip.startswith("Google Drive shortcut:"):
-                # print(f"{'  ' * depth}Skipping Google Drive shortcut during collection: {label}")
-                continue
-            
-            clean_name = sanitize(label) # Sanitize after ensuring it's not a UI/shortcut
-            if not clean_name:
-                # print(f"{'  ' * depth}Skipping element with empty sanitized name (tooltip: {tooltip}, label: {label})")
-                continue
-            
-            collected_items_attrs.append({
-                "tooltip": tooltip,
-                "label": label,
-                "clean_name": clean_name
-            })
-        except StaleElementReferenceException:
-            print(f"{'  ' * depth}StaleElementReferenceException during item collection for element index {elem_idx}. Skipping this item.")
+        # Filter UI elements
+        if any(skip_text in tooltip_lower_for_check or skip_text in label_lower_for_check for skip_text in SYSTEM_UI_ELEMENTS_TO_SKIP):
             continue
-        except Exception as e:
-            print(f"{'  ' * depth}Unexpected error during item collection for element index {elem_idx}: {e}. Skipping this item.")
+        
+        # Filter Google Drive shortcuts
+        if tooltip.startswith("Google Drive shortcut:"):
             continue
-            
-    print(f"{'  ' * depth}Collected {len(collected_items_attrs)} processable items from current view.")
+        
+        clean_name = sanitize(label) # Sanitize after ensuring it's not a UI/shortcut
+        if not clean_name:
+            continue
+
+        collected_items_attrs.append({
+            "id": raw_item.get("id"),
+            "tooltip": tooltip,
+            "label": label,
+            "clean_name": clean_name,
+            "file_name": safe_filename(label) or clean_name,
+            "mime": raw_item.get("mime"),
+            "modified": raw_item.get("modified"),
+            "size": parse_size_text(raw_item.get("size"))
+        })
     return collected_items_attrs
 
+def harvest_view_batches(session, depth: int):
+    """
+    Scans the current view for file/folder items while scrolling it, yielding each batch of
+    newly seen processable items (see filter_view_items) as soon as it is rendered.
+    Items are deduplicated by Drive ID (tooltip and label when a row has none); the scan
+    ends once the list cannot scroll any further and no lazily loaded rows arrive.
+    The caller may work on a batch before the next one is harvested; the view is not
+    scrolled meanwhile, so the batch's rows are still rendered and session.element_index
+    holds their elements. The caller may also restart the browser between batches and
+    reopen the folder; the scan then continues from the top of the new view, skipping
+    the items it has already yielded.
+    """
+    print(f"{'  ' * depth}Collecting items in current view...")
+    # Rows have loaded once they are present and unchanged over two polls; an empty folder waits the learned timeout
+    with tracer.span("rows_wait"):
+        waits.optional(session.driver, "view_rows", script_value_stable(VIEW_SIGNATURE_JS, lambda rows: rows[0] > 0), WAIT_TIME)
+
+    seen_keys = set()
+    total = 0
+    while True:
+        driver = session.driver # A new browser after a restart between batches
+        # No span may stay open across the yield below, so harvesting and scrolling are timed separately
+        with tracer.span("harvest") as span:
+            try:
+                raw_items = driver.execute_script(HARVEST_ITEMS_JS) or []
+            except Exception as e:
+                print(f"{'  ' * depth}Error harvesting items from current view: {e.__class__.__name__} - {e}. Stopping the scan.")
+                return
+            # Element handles are only valid for the rows rendered now
+            session.element_index = {}
+            new_raw_items = []
+            for raw_item in raw_items:
+                if raw_item.get("id"):
+                    session.element_index.setdefault(raw_item["id"], raw_item.get("element"))
+                key = raw_item.get("id") or (raw_item.get("tooltip"), raw_item.get("label"))
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    new_raw_items.append(raw_item)
+            batch = filter_view_items(new_raw_items)
+            span["rendered"] = len(raw_items)
+            span["new"] = len(batch)
+        if batch:
+            total += len(batch)
+            print(f"{'  ' * depth}Harvested {len(batch)} new items ({total} so far, {len(raw_items)} rendered).")
+            yield batch
+
+        with tracer.span("scroll"):
+            try:
+                moved = driver.execute_script(SCROLL_VIEW_JS)
+                if moved:
+                    waits.optional(driver, "scroll_render", script_value_stable(VIEW_SIGNATURE_JS), SCROLL_SETTLE_TIME)
+                    continue
+                # At the bottom, wait for lazily loaded rows before the list counts as complete
+                bottom_rows = driver.execute_script(VIEW_SIGNATURE_JS)
+                if not waits.optional(driver, "lazy_load", script_value_changed(VIEW_SIGNATURE_JS, bottom_rows), SCROLL_SETTLE_TIME):
+                    break
+            except Exception as e:
+                print(f"{'  ' * depth}Error scrolling the current view: {e.__class__.__name__} - {e}. Stopping the scan.")
+                return
+    print(f"{'  ' * depth}Collected {total} processable items from current view.")
+
 def escape_xpath_value(value: str) -> str:
     """
     Escapes a string value for safe use in an XPath expression.
@@ -209,202 +858,457 @@ def is_folder(tooltip: str, aria_label: str):
     # Default to file if we can't determine (safer than infinite recursion)
     return False
 
-def ensure_download_dir(path):
-    prefs = {
-        "download.default_directory": path,
-        "download.prompt_for_download": False,
-        "directory_upgrade": True,
-        "safebrowsing.enabled": True
-    }
-    driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": path})
-
-def export_google_file(file_elem, file_type, path, base_name):
-    ext_map = {"doc": "docx", "sheet": "xlsx", "slide": "pptx"}
-    expected_ext = ext_map[file_type]
-    out_file = os.path.join(path, f"{base_name}.{expected_ext}")
-    if os.path.exists(out_file):
-        print(f"SKIPPED (exists): {out_file}")
-        return
+def export_output_path(base_name, path, file_type, export_format, sheet_name=None):
+    """File an export is saved as; per-sheet exports are named '<base name> - <sheet>.<ext>'"""
+    extension = EXPORT_FORMAT_MENU[file_type][export_format][0]
+    if sheet_name:
+        return os.path.join(path, f"{base_name} - {safe_filename(sheet_name) or 'sheet'}.{extension}")
+    return os.path.join(path, f"{base_name}.{extension}")
 
-    ensure_download_dir(path)
+def export_exists(base_name, path, file_type, export_format, item_done=False):
+    """
+    Skip-if-exists check of one export format. The sheets of a per-sheet format cannot be told
+    from the files alone (an export may have stopped after some of them), so it only counts once
+    the manifest has the item done (item_done) and one of its sheets is there; until then the
+    editor is opened and exports the sheets still missing.
+    """
+    if output_sink.exists(export_output_path(base_name, path, file_type, export_format)):
+        return True
+    if file_type == "sheet" and export_format in PER_SHEET_FORMATS and item_done:
+        extension = EXPORT_FORMAT_MENU[file_type][export_format][0]
+        return bool(output_sink.glob(os.path.join(glob.escape(path), f"{glob.escape(base_name)} - *.{extension}")))
+    return False
+
+def missing_export_formats(item_attrs, path, item_done=False):
+    """Configured export formats of a Docs/Sheets/Slides item that are not on disk yet (see export_exists)"""
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    return [f for f in EXPORT_FORMATS[file_type]
+            if not export_exists(item_attrs["clean_name"], path, file_type, f, item_done)]
+
+def expected_output_path(item_attrs, path):
+    """Where an item is saved: a file's download, or the first configured export format of a Workspace file"""
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    if file_type:
+        return export_output_path(item_attrs["clean_name"], path, file_type, EXPORT_FORMATS[file_type][0])
+    return os.path.join(path, item_attrs["file_name"])
+
+def item_outputs(item_attrs, path):
+    """Every file an item may have been saved as: its download, or its exports in all configured formats"""
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    if not file_type:
+        return {expected_output_path(item_attrs, path)}
+    outputs = set()
+    for export_format in EXPORT_FORMATS[file_type]:
+        outputs.add(export_output_path(item_attrs["clean_name"], path, file_type, export_format))
+        if file_type == "sheet" and export_format in PER_SHEET_FORMATS:
+            extension = EXPORT_FORMAT_MENU[file_type][export_format][0]
+            outputs.update(output_sink.glob(os.path.join(glob.escape(path), f"{glob.escape(item_attrs['clean_name'])} - *.{extension}")))
+    return outputs
+
+def item_on_disk(item_attrs, path):
+    """Skip-if-exists check of an item: its download, or every configured export format"""
+    if get_google_file_type(item_attrs["tooltip"]):
+        return not missing_export_formats(item_attrs, path)
+    return output_sink.exists(expected_output_path(item_attrs, path))
+
+def item_changed(record, item_attrs):
+    """
+    True if the harvested modified stamp or size differs from the manifest record.
+    Values the view did not show (None) on either side count as unchanged.
+    """
+    for field in ("modified", "size"):
+        if record.get(field) is not None and item_attrs.get(field) is not None and record[field] != item_attrs[field]:
+            return True
+    return False
+
+def remove_stale_copies(paths, depth):
+    """Deletes earlier downloads of a changed item so the fresh copy is not skipped or renamed by Chrome"""
+    for stale_path in paths:
+        if stale_path and output_sink.exists(stale_path):
+            print(f"{'  ' * depth}Removing outdated copy: {stale_path}")
+            output_sink.discard(stale_path)
+
+EDITOR_PATHS = {"doc": "document", "sheet": "spreadsheets", "slide": "presentation"}
+
+def editor_url(file_type, item_id):
+    """URL that opens a Docs/Sheets/Slides item in its editor"""
+    return f"{DOCS_BASE_URL}/{EDITOR_PATHS[file_type]}/d/{item_id}/edit"
+
+class EditorTabPool:
+    """
+    A bounded set of reusable background tabs of one browser session.
+    The editors of upcoming exports load in idle tabs while the current export
+    runs; a tab whose export is over is recycled for the next editor instead of
+    being closed, so tabs are only opened up to the pool size and closed at the end.
+    """
+
+    def __init__(self, session, size):
+        self.session = session
+        self.size = size
+        self.drive_handle = session.driver.current_window_handle # The tab showing the folder view
+        self._handles = [] # Every tab of the pool
+        self._idle = [] # Tabs free for the next editor
+        self._loading = {} # Item ID -> tab its editor is loading in, in preload order
+
+    def _free_tab(self):
+        driver = self.session.driver
+        if self._idle:
+            return self._idle.pop()
+        if len(self._handles) < self.size:
+            driver.switch_to.new_window("tab")
+            self._handles.append(driver.current_window_handle)
+            return driver.current_window_handle
+        return None
+
+    def _load(self, handle, url):
+        driver = self.session.driver
+        driver.switch_to.window(handle)
+        # Assigning the location returns at once, unlike driver.get() which waits for the page to load
+        driver.execute_script("window.location.href = arguments[0];", url)
+
+    def preload(self, upcoming):
+        """Starts loading the editors of upcoming (item ID, URL) pairs in free tabs, then returns to the Drive tab"""
+        switched = False
+        try:
+            for item_id, url in upcoming:
+                if item_id in self._loading:
+                    continue
+                if not self._idle and len(self._handles) >= self.size:
+                    break
+                switched = True
+                handle = self._free_tab()
+                self._load(handle, url)
+                self._loading[item_id] = handle
+        finally:
+            if switched:
+                self.session.driver.switch_to.window(self.drive_handle)
+
+    def acquire(self, item_id, url):
+        """Switches to a tab showing the item's editor, preloaded if possible; returns the tab handle"""
+        handle = self._loading.pop(item_id, None)
+        if handle is not None:
+            self.session.driver.switch_to.window(handle)
+            return handle
+        handle = self._free_tab()
+        if handle is None:
+            # Every tab is busy preloading; take over the most recently queued one
+            handle = self._loading.pop(next(reversed(self._loading)))
+        self._load(handle, url)
+        return handle
+
+    def recycle_unused(self):
+        """Returns tabs preloaded for items that were never exported (e.g. after an error) to the idle set"""
+        self._idle.extend(self._loading.values())
+        self._loading.clear()
+
+    def release(self, handle, healthy=True):
+        """Puts a tab back into the pool (closing it if it broke) and returns to the Drive tab"""
+        driver = self.session.driver
+        if healthy:
+            self._idle.append(handle)
+        else:
+            self._handles.remove(handle)
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        driver.switch_to.window(self.drive_handle)
+
+    def close(self):
+        driver = self.session.driver
+        for handle in self._handles:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        self._handles, self._idle, self._loading = [], [], {}
+        try:
+            driver.switch_to.window(self.drive_handle)
+        except Exception:
+            pass
+
+def uses_editor_tab(item_attrs):
+    """True if the item is exported through a pooled editor tab rather than by double-click or direct fetch"""
+    return bool(EXPORT_TABS and not fetch_engine and item_attrs["id"] and get_google_file_type(item_attrs["tooltip"]))
+
+def tab_pool_for(session):
+    if session.tab_pool is None:
+        session.tab_pool = EditorTabPool(session, EXPORT_TABS)
+    return session.tab_pool
+
+def export_in_pooled_tab(session, item_attrs, path, item_key=None):
+    """
+    Exports a Google Workspace file from an editor tab of the session's tab pool.
+    Returns "exists", "started" (download accepted by Chrome) or a failure reason (see retry_queue.py).
+    """
+    driver = session.driver
+    base_name = item_attrs["clean_name"]
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    export_formats = missing_export_formats(item_attrs, path)
+    if not export_formats:
+        print(f"SKIPPED (exists): {expected_output_path(item_attrs, path)} ({', '.join(EXPORT_FORMATS[file_type])})")
+        return "exists"
+
+    session.downloads.use_staging()
+    handle = tab_pool_for(session).acquire(item_attrs["id"], editor_url(file_type, item_attrs["id"]))
+    healthy = True
+    try:
+        # A recycled tab shows the previous editor until the new page commits
+        waits.until(driver, "editor_url", lambda d: item_attrs["id"] in d.current_url, 60)
+        return export_from_open_editor(session, base_name, file_type, export_formats, path, item_key)
+    except TimeoutException as te:
+        print(f"TimeoutException during export of {file_type} '{base_name}': {te}")
+        return "editor timeout"
+    except Exception as e:
+        print(f"Error exporting {file_type} '{base_name}': {e.__class__.__name__} - {e}")
+        healthy = False
+        return "export error"
+    finally:
+        session.tab_pool.release(handle, healthy)
+
+def export_google_file(session, file_elem, file_type, path, base_name, item_key=None):
+    """
+    Exports a Google Workspace file through the editor's File > Download menu.
+    Returns "exists", "started" (download accepted by Chrome) or a failure reason (see retry_queue.py).
+    """
+    driver = session.driver
+    export_formats = [f for f in EXPORT_FORMATS[file_type] if not export_exists(base_name, path, file_type, f)]
+    if not export_formats:
+        print(f"SKIPPED (exists): {export_output_path(base_name, path, file_type, EXPORT_FORMATS[file_type][0])} "
+              f"({', '.join(EXPORT_FORMATS[file_type])})")
+        return "exists"
+
+    session.downloads.use_staging()
 
     # Explicitly wait for the file_elem to be clickable before any interaction
-    wait_clickable_item = WebDriverWait(driver, 20) # 20 second timeout
     try:
         print(f"Waiting for file element '{base_name}' to be clickable (up to 20s).")
-        clickable_file_elem = wait_clickable_item.until(EC.element_to_be_clickable(file_elem))
+        clickable_file_elem = waits.until(driver, "clickable", EC.element_to_be_clickable(file_elem), 20)
         print(f"File element '{base_name}' is clickable.")
     except TimeoutException:
         print(f"Timeout (20s): File element '{base_name}' was not clickable. Skipping this file.")
-        return # Skip this file
+        return "not clickable"
     except Exception as e: # Catch other potential errors during clickability wait
         print(f"Error waiting for file element '{base_name}' to be clickable: {e.__class__.__name__} - {e}. Skipping this file.")
-        return
+        return "not clickable"
 
 
+    # Remember the Drive tab and the existing tabs, so only the editor tab this click opens gets closed
+    drive_handle = driver.current_window_handle
+    handles_before = set(driver.window_handles)
+    editor_handle = None
     try:
         # Attempt to open the document with a double-click
         print(f"Attempting to open doc '{base_name}' with a double-click.")
         ActionChains(driver).double_click(clickable_file_elem).perform()
         
         # Wait for new tab to open (if any) and switch to it
-        # This timeout should be fairly short if a new tab is expected immediately after click.
-        # If direct click opens in same tab, number_of_windows_to_be(2) will timeout.
-        print(f"Waiting for a new browser window/tab to open for '{base_name}' (up to {WAIT_TIME + 7}s). Current windows: {len(driver.window_handles)}")
-        try:
-            WebDriverWait(driver, WAIT_TIME + 7).until(EC.number_of_windows_to_be(len(driver.window_handles) +1 if len(driver.window_handles) < 2 else 2 )) # Adapt based on current windows
+        # The timeout is learned from how quickly editor tabs have opened so far.
+        # If direct click opens in same tab, no new handle appears and the wait times out.
+        print(f"Waiting for a new browser window/tab to open for '{base_name}'. Current windows: {len(handles_before)}")
+        new_handles = waits.optional(driver, "editor_tab", lambda d: set(d.window_handles) - handles_before, WAIT_TIME + 7)
+        if new_handles:
+            editor_handle = new_handles.pop()
             print(f"New window/tab detected. Total windows: {len(driver.window_handles)}")
-            driver.switch_to.window(driver.window_handles[-1])
+            driver.switch_to.window(editor_handle)
             print(f"Switched to new window/tab for '{base_name}'.")
-        except TimeoutException:
+        else:
             print(f"Timeout waiting for a new window/tab after clicking '{base_name}'. Assuming it opened in the same tab or failed to open.")
             # If no new tab, we are still in the main Google Drive tab.
             # The script might not be able to proceed with export if it's same-tab navigation without a page change.
             # For now, let the next step (editor_loaded_locator) try. If that fails, it will be caught.
 
-        # Wait for the document editor to load
-        editor_loaded_locator = (By.XPATH, "//*[contains(@class, 'docs-title-inner')] | //*[contains(@class, 'docs-sheet-tab-name')] | //*[contains(@class, 'punch-title-text')] | //*[@id='docs-title-input-label-inner']")
-        print(f"Waiting for document editor to load for '{base_name}' (up to 60s)...")
-        try:
-            WebDriverWait(driver, 60).until(EC.presence_of_element_located(editor_loaded_locator))
-            print(f"Document editor loaded for '{base_name}'.")
-        except TimeoutException:
-            print(f"Timeout (60s) waiting for document editor to load for '{base_name}'. Skipping this file.")
-            return
-
-        # Try multiple selectors for the File menu
-        file_menu_element = None
-        file_menu_selectors = [
-            '//div[@aria-label="File"]', 
-            '//*[@id="docs-file-menu"]', 
-            '//div[text()="File" and @role="menuitem"]', 
-            '//span[text()="File" and contains(@class, "menu-button")]'
-        ]
-        
-        # Increased menu item wait time slightly
-        wait_clickable_menu = WebDriverWait(driver, 20) 
-
-        print(f"Attempting to find 'File' menu for '{base_name}'...")
-        for selector in file_menu_selectors:
-            print(f"  Trying File menu selector: {selector}")
-            try:
-                file_menu_element = wait_clickable_menu.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                print(f"  'File' menu found and clickable with selector: {selector}")
-                break
-            except TimeoutException:
-                print(f"  Timeout waiting for 'File' menu with selector: {selector}")
-                continue
-        
-        if not file_menu_element:
-            print(f"Could not find or click 'File' menu for '{base_name}' after trying all selectors. Skipping this file.")
-            return
-            
-        file_menu_element.click()
-        print("'File' menu clicked.")
-
-        # Wait for "Download" menu item (two-stage: visibility then clickability)
-        download_menu_item = None
-        download_selectors = [
-            '//div[@role="menuitem" and .//span[normalize-space(text())="Download"]]', # Exact text match for "Download" span
-            '//span[@aria-label="Download d"]/ancestor::div[@role="menuitem"]',     # Specific aria-label
-            # '//div[@role="menuitem" and @id=":68"]', # Dynamic IDs are risky, commented out
-            '//div[contains(@class, "goog-menuitem") and .//span[contains(text(), "Download")]]', # Broader fallback
-            # Previously used selectors, kept as further fallbacks:
-            '//div[@aria-label="Download"]', 
-            '//div[text()="Download" and @role="menuitem"]', 
-        ]
-        
-        wait_visible = WebDriverWait(driver, 10)
-        # wait_clickable_menu is already defined (20s)
-
-        print(f"Attempting to find 'Download' menu item for '{base_name}'...")
-        for selector in download_selectors:
-            print(f"  Trying Download menu item selector for visibility: {selector}")
-            try:
-                dl_item_visible = wait_visible.until(EC.visibility_of_element_located((By.XPATH, selector)))
-                print(f"  Download menu item visible with: {selector}. Now waiting for clickability.")
-                download_menu_item = wait_clickable_menu.until(EC.element_to_be_clickable(dl_item_visible)) # Pass the visible element
-                print(f"  Download menu item clickable with: {selector} (Element: {download_menu_item.tag_name})")
-                break 
-            except TimeoutException:
-                print(f"  Timeout for Download menu item with selector: {selector} (either visibility or clickability).")
-                continue
-        
-        if not download_menu_item:
-            print(f"Could not find or make clickable the 'Download' menu item for '{base_name}' after trying all selectors. Skipping this file.")
-            return
-
-        # Click the "Download" menu item to open its submenu
-        try:
-            item_text = download_menu_item.text if hasattr(download_menu_item, 'text') and download_menu_item.text else 'element'
-            print(f"Clicking 'Download' menu item: '{item_text}' for '{base_name}'")
-            download_menu_item.click()
-            time.sleep(1) # Pause for submenu to appear reliably
-            print("'Download' menu item clicked.")
-
-            # Use keyboard navigation to select the first format option and press Enter
-            actions = ActionChains(driver)
-            print("Sending ARROW_DOWN key to select first format option...")
-            actions.send_keys(Keys.ARROW_DOWN).perform()
-            time.sleep(0.5) # Brief pause for selection to register
-
-            print("Sending ENTER key to activate format option...")
-            # Re-initialize ActionChains for the next key press, or chain them.
-            # For clarity, creating a new chain or just calling perform on the same is fine.
-            ActionChains(driver).send_keys(Keys.ENTER).perform()
-            print("ENTER key sent for format option.")
-
-        except Exception as e:
-            print(f"Error during 'Download' menu click or keyboard navigation for '{base_name}': {e.__class__.__name__} - {e}. Skipping this file.")
-            return
-
-        print(f"Format selection attempted for {base_name}. Waiting for download to initiate...")
-        time.sleep(WAIT_TIME + 5) # Increased slightly, download initiation can be slow
-        print(f"EXPORTED: {out_file}")
-        
+        return export_from_open_editor(session, base_name, file_type, export_formats, path, item_key)
     except TimeoutException as te:
         print(f"TimeoutException during export of {file_type} '{base_name}': {te}")
+        return "editor timeout"
     except Exception as e:
         print(f"Error exporting {file_type} '{base_name}': {e.__class__.__name__} - {e}")
+        return "export error"
     finally:
-        # Always try to close the tab and return to main window
+        # Always try to close the editor tab and return to the Drive view
         try:
-            if len(driver.window_handles) > 1:
+            if editor_handle:
                 driver.close()
         except:
             pass
         try:
-            driver.switch_to.window(driver.window_handles[0])
+            driver.switch_to.window(drive_handle)
         except:
             pass
 
-def download_non_google_file(file_elem, path, base_name):
+
+def export_from_open_editor(session, base_name, file_type, export_formats, path, item_key=None):
+    """
+    Exports the editor loaded in the current tab in each of export_formats, one File > Download
+    round per format, so the editor is opened once however many formats are wanted. Per-sheet
+    formats (CSV, TSV) of a spreadsheet are exported once per sheet tab.
+    Returns "started" once every export has begun, else the first failure reason; unexpected
+    WebDriver errors propagate to the caller.
+    """
+    driver = session.driver
+
+    # Wait for the document editor to load
+    editor_loaded_locator = (By.XPATH, "//*[contains(@class, 'docs-title-inner')] | //*[contains(@class, 'docs-sheet-tab-name')] | //*[contains(@class, 'punch-title-text')] | //*[@id='docs-title-input-label-inner']")
+    print(f"Waiting for document editor to load for '{base_name}' (up to 60s)...")
+    try:
+        with tracer.span("editor_load"):
+            waits.until(driver, "editor_load", EC.presence_of_element_located(editor_loaded_locator), 60)
+        print(f"Document editor loaded for '{base_name}'.")
+    except TimeoutException:
+        print(f"Timeout (60s) waiting for document editor to load for '{base_name}'. Skipping this file.")
+        return "editor timeout"
+
+    for export_format in export_formats:
+        sheet_names = [None]
+        if file_type == "sheet" and export_format in PER_SHEET_FORMATS:
+            sheet_names = driver.execute_script(SHEET_TAB_NAMES_JS) or [None]
+        for sheet_index, sheet_name in enumerate(sheet_names):
+            out_file = export_output_path(base_name, path, file_type, export_format, sheet_name)
+            if output_sink.exists(out_file):
+                print(f"SKIPPED (exists): {out_file}")
+                continue
+            if sheet_name and not select_sheet_tab(driver, sheet_index, sheet_name):
+                print(f"Could not switch to sheet '{sheet_name}' of '{base_name}'. Skipping this file.")
+                return "export menu error"
+            outcome = export_format_from_editor(session, base_name, file_type, export_format, out_file, path, item_key)
+            if outcome != "started":
+                return outcome
+    return "started"
+
+def select_sheet_tab(driver, sheet_index, sheet_name):
+    """Activates a spreadsheet's sheet tab (per-sheet exports cover the active sheet); True once it is active"""
+    tabs = driver.find_elements(By.CSS_SELECTOR, ".docs-sheet-tab")
+    if sheet_index >= len(tabs):
+        return False
+    tabs[sheet_index].click()
+    return bool(waits.optional(driver, "sheet_tab", lambda d: d.execute_script(ACTIVE_SHEET_NAME_JS) == sheet_name, WAIT_TIME))
+
+def export_format_from_editor(session, base_name, file_type, export_format, out_file, path, item_key=None):
+    """
+    Drives File > Download > <format> in the editor loaded in the current tab, choosing the submenu
+    entry by its name, and waits for the export to begin. Returns "started" or a failure reason.
+    """
+    driver = session.driver
+    entry_text = EXPORT_FORMAT_MENU[file_type][export_format][1]
+
+    # Try multiple selectors for the File menu
+    file_menu_element = None
+    file_menu_selectors = [
+        '//div[@aria-label="File"]', 
+        '//*[@id="docs-file-menu"]', 
+        '//div[text()="File" and @role="menuitem"]', 
+        '//span[text()="File" and contains(@class, "menu-button")]'
+    ]
+
+    # All selectors are tried on every poll, so the first one to match wins without the others timing out first
+    print(f"Attempting to find 'File' menu for '{base_name}' (up to 20s)...")
+    try:
+        selector, file_menu_element = waits.until(driver, "file_menu", any_clickable(file_menu_selectors), 20)
+        print(f"  'File' menu found and clickable with selector: {selector}")
+    except TimeoutException:
+        print("  Timeout waiting for 'File' menu with any selector.")
+
+    if not file_menu_element:
+        print(f"Could not find or click 'File' menu for '{base_name}' after trying all selectors. Skipping this file.")
+        return "file menu missing"
+
+    file_menu_element.click()
+    print("'File' menu clicked.")
+
+    # Wait for "Download" menu item (two-stage: visibility then clickability)
+    download_menu_item = None
+    download_selectors = [
+        '//div[@role="menuitem" and .//span[normalize-space(text())="Download"]]', # Exact text match for "Download" span
+        '//span[@aria-label="Download d"]/ancestor::div[@role="menuitem"]',     # Specific aria-label
+        # '//div[@role="menuitem" and @id=":68"]', # Dynamic IDs are risky, commented out
+        '//div[contains(@class, "goog-menuitem") and .//span[contains(text(), "Download")]]', # Broader fallback
+        # Previously used selectors, kept as further fallbacks:
+        '//div[@aria-label="Download"]', 
+        '//div[text()="Download" and @role="menuitem"]', 
+    ]
+
+    print(f"Attempting to find 'Download' menu item for '{base_name}' (up to 20s)...")
+    try:
+        selector, download_menu_item = waits.until(driver, "download_menu", any_clickable(download_selectors), 20)
+        print(f"  Download menu item clickable with: {selector} (Element: {download_menu_item.tag_name})")
+    except TimeoutException:
+        print("  Timeout for Download menu item with any selector (either visibility or clickability).")
+
+    if not download_menu_item:
+        print(f"Could not find or make clickable the 'Download' menu item for '{base_name}' after trying all selectors. Skipping this file.")
+        return "download menu missing"
+
+    # Click the "Download" menu item to open its submenu
+    ticket = None
+    try:
+        item_text = download_menu_item.text if hasattr(download_menu_item, 'text') and download_menu_item.text else 'element'
+        print(f"Clicking 'Download' menu item: '{item_text}' for '{base_name}'")
+        download_menu_item.click()
+        # The format submenu is a second visible menu next to the File menu
+        waits.optional(driver, "download_submenu", lambda d: d.execute_script(VISIBLE_MENUS_JS) >= 2, 1)
+        print("'Download' menu item clicked.")
+
+        # The entry is picked by name (e.g. "PDF Document (.pdf)"), not by its position in the submenu
+        entry_xpath = (f'//*[@role="menu"]//*[@role="menuitem"]'
+                       f'[contains(normalize-space(.), {escape_xpath_value(entry_text)})]')
+        print(f"Looking for the '{entry_text}' entry of the Download submenu...")
+        format_entry = waits.until(driver, "format_entry", EC.element_to_be_clickable((By.XPATH, entry_xpath)), 10)
+
+        # Register the expected download first so its downloadWillBegin event cannot be missed
+        ticket = session.downloads.expect(out_file, path, item_key, os.path.basename(out_file))
+        format_entry.click()
+        print(f"Format entry '{entry_text}' clicked.")
+
+    except Exception as e:
+        if ticket:
+            session.downloads.cancel(ticket)
+        print(f"Error during 'Download' menu or format selection for '{base_name}': {e.__class__.__name__} - {e}. Skipping this file.")
+        return "export menu error"
+
+    print(f"Format {export_format} selected for {base_name}. Waiting for the export download to begin (up to {EXPORT_BEGIN_TIMEOUT}s)...")
+    if session.downloads.wait_for_begin(ticket, EXPORT_BEGIN_TIMEOUT):
+        # Completion is confirmed in the background by the download tracker
+        print(f"EXPORT STARTED: {out_file} (as {ticket['filename']})")
+        return "started"
+    session.downloads.cancel(ticket)
+    print(f"Export download for '{base_name}' did not begin within {EXPORT_BEGIN_TIMEOUT}s. Skipping this file.")
+    return "export not started"
+
+
+def download_non_google_file(session, file_elem, path, base_name, item_key=None):
+    """
+    Downloads a regular file through its context menu.
+    Returns "exists", "started" (download accepted by Chrome) or a failure reason (see retry_queue.py).
+    """
+    driver = session.driver
     expected_path = os.path.join(path, base_name)
     # 1. Skip-if-Exists check at the very beginning
-    if os.path.exists(expected_path):
+    if output_sink.exists(expected_path):
         print(f"SKIPPED (exists): {expected_path}")
-        return
+        return "exists"
 
-    ensure_download_dir(path)
+    session.downloads.use_staging()
 
     # 2. Wait for file_elem to be Clickable
-    wait_clickable_item = WebDriverWait(driver, 20) # 20s timeout
     clickable_file_elem = None
     try:
         print(f"  Waiting for non-Google file '{base_name}' to be clickable for context-menu (up to 20s).")
-        clickable_file_elem = wait_clickable_item.until(EC.element_to_be_clickable(file_elem))
+        clickable_file_elem = waits.until(driver, "clickable", EC.element_to_be_clickable(file_elem), 20)
         print(f"  File element '{base_name}' is clickable for context-menu.")
     except TimeoutException:
         print(f"  Timeout (20s): File element '{base_name}' not clickable for context-menu. Skipping.")
-        return
+        return "not clickable"
     except Exception as e: # Catch other potential errors like StaleElementReferenceException
         print(f"  Error waiting for file '{base_name}' to be clickable: {e.__class__.__name__} - {e}. Skipping.")
-        return
+        return "not clickable"
 
     try:
         print(f"  Performing context-click on '{base_name}'.")
         ActionChains(driver).context_click(clickable_file_elem).perform()
-        time.sleep(0.5) # Small pause for menu stability
+        waits.optional(driver, "context_menu", lambda d: d.execute_script(VISIBLE_MENUS_JS) >= 1, 0.5) # Menu stability
         
         # Use keyboard navigation to select "Download"
         actions = ActionChains(driver)
@@ -412,232 +1316,978 @@ def download_non_google_file(file_elem, path, base_name):
         # Assuming "Download" is the first or reliably reachable by one ARROW_DOWN.
         # Multiple ARROW_DOWNs can be chained if needed: .send_keys(Keys.ARROW_DOWN).send_keys(Keys.ARROW_DOWN)
         actions.send_keys(Keys.ARROW_DOWN).perform()
-        time.sleep(0.5) # Pause for selection to register
+        waits.optional(driver, "menu_highlight", menu_item_highlighted, 0.5) # Let the selection register
 
         print(f"  Sending ENTER to select 'Download' from context menu for '{base_name}'.")
-        ActionChains(driver).send_keys(Keys.ENTER).perform() 
+        # Register the expected download first so its downloadWillBegin event cannot be missed
+        ticket = session.downloads.expect(expected_path, path, item_key, base_name)
+        try:
+            ActionChains(driver).send_keys(Keys.ENTER).perform()
+        except Exception:
+            session.downloads.cancel(ticket)
+            raise
         print("  Context menu 'Download' selected via keyboard.")
-        
-        # Check for and handle virus scan dialog
-        time.sleep(2) # Allow time for dialog to appear
+
+        # Move on as soon as Chrome accepts the download; the tracker confirms completion in the background
+        if waits.optional_call("download_begin", lambda timeout: session.downloads.wait_for_begin(ticket, timeout), WAIT_TIME):
+            print(f"DOWNLOAD STARTED: {expected_path} (as {ticket['filename']})")
+            return "started"
+
+        # Not started yet: large files first show a virus scan dialog
         virus_dialog_handled = False
         try:
             dialog_button_xpath = "//button[@name='ok' and normalize-space(text())='Download anyway']"
             print(f"  Checking for virus scan dialog (up to {WAIT_TIME}s)...")
             
-            dialog_confirm_button = WebDriverWait(driver, WAIT_TIME).until(
-                EC.element_to_be_clickable((By.XPATH, dialog_button_xpath))
-            )
-            print("  Virus scan dialog detected. Clicking 'Download anyway'.")
-            dialog_confirm_button.click()
-            virus_dialog_handled = True
-            print("  'Download anyway' clicked.")
-        except TimeoutException:
-            print("  No virus scan dialog detected, or 'Download anyway' button not found/clickable in time.")
+            dialog_confirm_button = waits.optional(driver, "virus_dialog",
+                                                   EC.element_to_be_clickable((By.XPATH, dialog_button_xpath)), WAIT_TIME)
+            if dialog_confirm_button:
+                print("  Virus scan dialog detected. Clicking 'Download anyway'.")
+                dialog_confirm_button.click()
+                virus_dialog_handled = True
+                print("  'Download anyway' clicked.")
+            else:
+                print("  No virus scan dialog detected, or 'Download anyway' button not found/clickable in time.")
         except Exception as e_dialog:
             print(f"  Exception while trying to handle virus dialog: {e_dialog.__class__.__name__} - {e_dialog}")
 
-        # Wait for download to complete
-        global _first_pdf_download_attempt
-        is_pdf = base_name.lower().endswith(".pdf") 
-
-        if is_pdf and _first_pdf_download_attempt:
-            print(f"  Performing extended wait (20s) for first PDF download: '{base_name}' (Dialog handled: {virus_dialog_handled})")
-            time.sleep(20)
-            _first_pdf_download_attempt = False
-        else:
-            effective_wait_time = WAIT_TIME # WAIT_TIME is global
-            print(f"  Waiting for download of '{base_name}' to initiate (Dialog handled: {virus_dialog_handled}) (up to {effective_wait_time + 2}s)...")
-            time.sleep(effective_wait_time + 2)
-        
-        print(f"DOWNLOADED: {expected_path}")
+        print(f"  Waiting for download of '{base_name}' to begin (Dialog handled: {virus_dialog_handled}) (up to {DOWNLOAD_BEGIN_TIMEOUT}s)...")
+        if session.downloads.wait_for_begin(ticket, DOWNLOAD_BEGIN_TIMEOUT):
+            print(f"DOWNLOAD STARTED: {expected_path} (as {ticket['filename']})")
+            return "started"
+        session.downloads.cancel(ticket)
+        print(f"  Download of '{base_name}' did not begin within {DOWNLOAD_BEGIN_TIMEOUT}s. Skipping.")
+        return "download not started"
             
     except Exception as e:
         print(f"  Download error for '{base_name}': {e.__class__.__name__} - {e}")
+        return "download error"
 
-def process_folder(current_path, depth=0):
-    """Process folder with depth tracking to prevent infinite recursion"""
-    print(f"{'  ' * depth}>>> Entering process_folder for path: {current_path} (Depth: {depth})")
-    if depth > 10:  # Safety limit
-        print(f"{'  ' * depth}WARNING: Maximum depth reached at {current_path}. Returning.")
+def bulk_download_candidates(file_work, current_path):
+    """
+    Entries of file_work that can go into a multi-file download: plain files not on disk yet
+    whose name is unique in the folder, so the zip member can be matched back to the item.
+    """
+    label_counts = collections.Counter(item_attrs["label"] for _, item_attrs, _ in file_work)
+    return [
+        work for work in file_work
+        if not is_google_file(work[1]["tooltip"])
+        and label_counts[work[1]["label"]] == 1
+        and not item_on_disk(work[1], current_path)
+    ]
+
+def bulk_download_batch(session, batch, current_path, depth):
+    """
+    Selects a batch of plain files in the folder view, starts Drive's multi-file download and
+    unpacks the zip parts into current_path, recording every extracted item as done.
+    Returns the manifest keys of the extracted items; the rest are left for single downloads.
+    """
+    driver = session.driver
+    selected = []
+    for work in batch:
+        element = locate_item_element(session, work[1], depth)
+        if element is not None:
+            selected.append((work, element))
+    if len(selected) < 2:
+        return set()
+
+    print(f"{'  ' * depth}[{session.name}] Bulk downloading {len(selected)} files from {current_path}")
+    # In the session's staging directory, outside the backup folders; a relaunch clears what a crash leaves there
+    staging_dir = tempfile.mkdtemp(prefix="bulk-", dir=session.downloads.staging_dir)
+    done_keys = set()
+    try:
+        session.downloads.set_download_dir(staging_dir)
+        # A plain click resets the selection; Ctrl+click adds the others to it
+        actions = ActionChains(driver).click(selected[0][1])
+        for _, element in selected[1:]:
+            actions.key_down(Keys.CONTROL).click(element).key_up(Keys.CONTROL)
+        actions.perform()
+        ActionChains(driver).context_click(selected[-1][1]).perform()
+        waits.optional(driver, "context_menu", lambda d: d.execute_script(VISIBLE_MENUS_JS) >= 1, 0.5) # Menu stability
+        ActionChains(driver).send_keys(Keys.ARROW_DOWN).perform()
+        waits.optional(driver, "menu_highlight", menu_item_highlighted, 0.5) # Let the selection register
+
+        ticket = session.downloads.expect(f"{len(selected)} files from {current_path}", staging_dir)
+        try:
+            ActionChains(driver).send_keys(Keys.ENTER).perform()
+        except Exception:
+            session.downloads.cancel(ticket)
+            raise
+        print(f"{'  ' * depth}[{session.name}] Waiting for Drive to prepare the archive (up to {BULK_PREPARE_TIMEOUT}s)...")
+        if not session.downloads.wait_for_begin(ticket, BULK_PREPARE_TIMEOUT):
+            session.downloads.cancel(ticket)
+            print(f"{'  ' * depth}[{session.name}] Multi-file download did not begin. Falling back to single downloads.")
+            return done_keys
+        # Large selections arrive as several zip parts, each its own download into staging_dir;
+        # downloads of other items still running elsewhere are not waited for
+        session.downloads.wait_for_end(ticket, DOWNLOAD_DRAIN_TIMEOUT)
+        session.downloads.wait_all(DOWNLOAD_DRAIN_TIMEOUT, staging_dir)
+
+        names = {work[1]["label"]: work for work, _ in selected}
+        # Members are saved under the planned file names, which carry the suffix of a renamed duplicate
+        targets = {name: work[1]["file_name"] for name, work in names.items()}
+        extracted, missing, unexpected = extract_members(zip_parts(staging_dir), current_path, targets)
+        for name, (out_path, byte_count, digest) in extracted.items():
+            item_key = names[name][2]
+            if content_store:
+                digest = content_store.ingest(out_path, digest)
+            manifest.set_file_status(item_key, "done", byte_count=byte_count, path=out_path, digest=digest)
+            output_sink.add(out_path, item_key)
+            done_keys.add(item_key)
+        print(f"{'  ' * depth}[{session.name}] BULK DOWNLOADED: {len(extracted)} of {len(selected)} files into {current_path}")
+        if missing:
+            print(f"{'  ' * depth}[{session.name}] Not in the archive, will download singly: {sorted(missing)}")
+        if unexpected:
+            print(f"{'  ' * depth}[{session.name}] Archive members that match no selected item (ignored): {unexpected}")
+    except Exception as e:
+        print(f"{'  ' * depth}[{session.name}] Bulk download error: {e.__class__.__name__} - {e}. Falling back to single downloads.")
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        session.downloads.use_staging()
+        session.element_index = {} # Drive may re-render selected rows
+        try:
+            ActionChains(driver).send_keys(Keys.ESCAPE).perform() # Clear the selection
+        except Exception:
+            pass
+    return done_keys
+
+def locate_item_element(session, item_attrs, depth):
+    """
+    Finds the live element for a collected item: from the session's element index or a
+    [data-id] lookup when it has a Drive ID, otherwise (rows without an ID) by its tooltip and label.
+    Returns None when the element is not rendered in the view.
+    """
+    driver = session.driver
+    clean_name = item_attrs["clean_name"]
+    item_id = item_attrs["id"]
+    if item_id:
+        element = session.element_index.get(item_id)
+        if element is None:
+            try:
+                element = driver.execute_script(FIND_ITEM_JS, item_id)
+            except Exception as e:
+                print(f"{'  ' * depth}Error looking up '{clean_name}' by Drive ID {item_id}: {e.__class__.__name__} - {e}")
+            if element is not None:
+                session.element_index[item_id] = element
+        if element is None:
+            print(f"{'  ' * depth}Drive ID {item_id} of '{clean_name}' is not rendered in the view.")
+        return element
+    element_xpath = (f"//div[@role='main']//div[@data-tooltip={escape_xpath_value(item_attrs['tooltip'])} "
+                     f"and @aria-label={escape_xpath_value(item_attrs['label'])}]")
+    try:
+        return driver.find_element(By.XPATH, element_xpath)
+    except NoSuchElementException:
+        print(f"{'  ' * depth}Could not re-locate '{clean_name}' (no Drive ID) by its tooltip and label.")
+    except Exception as e: # e.g. StaleElementReference
+        print(f"{'  ' * depth}An unexpected error ('{e.__class__.__name__}') occurred while re-locating '{clean_name}': {e}.")
+    return None
+
+def direct_fetch_kind(item_attrs):
+    """http_engine URL kind for an item, or None if it can only be fetched through the UI"""
+    if not item_attrs["id"]:
+        return None
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    if file_type:
+        return file_type
+    if is_google_file(item_attrs["tooltip"]):
+        return None # Forms, Drawings and Sites have no direct export we use
+    return "file"
+
+def fetch_file_directly(session, item_attrs, current_path, depth, item_key):
+    """
+    Queues an item on the direct HTTP engine without touching the page, one fetch per export
+    format not on disk yet. Returns "exists" or "started"; None if the item has to go through the UI path.
+    """
+    kind = direct_fetch_kind(item_attrs)
+    if not kind or needs_sheet_tabs(item_attrs, current_path):
+        return None
+    outputs = direct_fetch_outputs(item_attrs, kind, current_path)
+    if not outputs:
+        print(f"SKIPPED (exists): {expected_output_path(item_attrs, current_path)}")
+        return "exists"
+
+    submitted_at = time.monotonic()
+
+    def on_done(path, byte_count, digest, error):
+        tracer.event("fetch", time.monotonic() - submitted_at, session=session.name, item_id=item_attrs["id"],
+                     outcome="failed" if error else "done", bytes=byte_count)
+        if error:
+            print(f"[{session.name}] FETCH FAILED: {item_attrs['clean_name']}: {error}")
+            record_file_failure(item_key, error)
+        else:
+            print(f"[{session.name}] FETCHED: {path} ({byte_count} bytes)")
+            if content_store:
+                digest = content_store.ingest(path, digest)
+            record_output_done(item_key, path, byte_count, digest)
+            output_sink.add(path, item_key)
+
+    print(f"{'  ' * depth}> Fetching {kind} directly: {item_attrs['clean_name']}")
+    for out_file, url_format in outputs:
+        # Same names as the UI path, so its skip checks find the file
+        fetch_engine.submit(kind, item_attrs["id"], current_path, os.path.basename(out_file), on_done, url_format)
+    return "started"
+
+def needs_sheet_tabs(item_attrs, current_path):
+    """
+    True if a spreadsheet still lacks a per-sheet format (CSV, TSV). By URL those export the
+    first sheet only, so such items go through the editor, which exports every sheet tab.
+    """
+    if get_google_file_type(item_attrs["tooltip"]) != "sheet":
+        return False
+    return any(f in PER_SHEET_FORMATS for f in missing_export_formats(item_attrs, current_path))
+
+def direct_fetch_outputs(item_attrs, kind, current_path):
+    """
+    (output path, URL export format) of each output of an item the direct engines still have to fetch.
+    The export URLs take a format's file extension. Per-sheet formats are not fetched here (see needs_sheet_tabs).
+    """
+    if kind == "file":
+        out_file = expected_output_path(item_attrs, current_path)
+        return [] if output_sink.exists(out_file) else [(out_file, None)]
+    return [
+        (export_output_path(item_attrs["clean_name"], current_path, kind, export_format),
+         EXPORT_FORMAT_MENU[kind][export_format][0])
+        for export_format in missing_export_formats(item_attrs, current_path)
+    ]
+
+def process_file_item(session, file_elem, item_attrs, current_path, depth, item_key=None):
+    """
+    Exports a Google Workspace file or downloads any other file into current_path.
+    Returns the outcome reported by export_in_pooled_tab / export_google_file / download_non_google_file.
+    file_elem is not used for pooled exports and may be None for them.
+    """
+    clean_name = item_attrs["clean_name"]
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    with tracer.span("export" if file_type else "download", item_id=item_attrs["id"]) as span:
+        if file_type and uses_editor_tab(item_attrs):
+            print(f"{'  ' * depth}> Exporting Google {file_type} in a pooled editor tab: {clean_name}")
+            outcome = export_in_pooled_tab(session, item_attrs, current_path, item_key)
+        elif file_type:
+            print(f"{'  ' * depth}> Exporting Google {file_type}: {clean_name}")
+            outcome = export_google_file(session, file_elem, file_type, current_path, clean_name, item_key)
+        else:
+            print(f"{'  ' * depth}> Downloading file: {item_attrs['file_name']}")
+            outcome = download_non_google_file(session, file_elem, current_path, item_attrs["file_name"], item_key)
+        span["outcome"] = outcome
+    return outcome
+
+def folder_url(folder_id):
+    """Drive URL that opens the folder with the given ID"""
+    if folder_id == ROOT_FOLDER_ID:
+        return DRIVE_ROOT_URL
+    return f"{DRIVE_BASE_URL}/drive/folders/{folder_id}"
+
+def folder_entry(folder_id, path, depth, modified=None):
+    """
+    Frontier entry for a folder; the URL is recorded at harvest time so the folder can be opened directly.
+    modified is the folder's stamp as shown in its parent's view, stored once the folder is done.
+    """
+    return {"id": folder_id, "url": folder_url(folder_id), "path": path, "depth": depth, "modified": modified}
+
+class FolderFrontier:
+    """
+    Thread-safe work queue of folders still to be crawled, shared by all workers.
+    Folders are entry dicts made by folder_entry. Each folder ID is accepted only
+    once, so a folder reachable twice is not crawled twice.
+    """
+
+    def __init__(self):
+        self._queue = queue.LifoQueue() # LIFO keeps the crawl roughly depth-first and the frontier small
+        self._seen_ids = set()
+        self._lock = threading.Lock()
+
+    def seed(self, folders):
+        """Puts the first folders of the crawl; always True (a shared frontier may already be seeded)"""
+        for folder in folders:
+            self.put(folder)
+        return True
+
+    def put(self, folder):
+        with self._lock:
+            if folder["id"] in self._seen_ids:
+                return False
+            self._seen_ids.add(folder["id"])
+        self._queue.put(folder)
+        return True
+
+    def get(self, timeout):
+        """Returns the next folder, raising queue.Empty if none arrives within timeout"""
+        return self._queue.get(timeout=timeout)
+
+    def task_done(self, folder):
+        self._queue.task_done()
+
+    def join(self):
+        """Blocks until every folder that was put has been marked done"""
+        self._queue.join()
+
+def open_folder_view(session, folder):
+    """Loads a folder directly by its URL and waits for the main view to appear"""
+    depth = folder["depth"]
+    with tracer.span("navigate", folder=folder["path"]) as span:
+        session.driver.get(folder["url"])
+        session.element_index = {}
+        try:
+            waits.until(session.driver, "folder_open", EC.presence_of_element_located((By.XPATH, "//div[@role='main']")), 15)
+        except TimeoutException:
+            span["outcome"] = "timeout"
+            print(f"{'  ' * depth}[{session.name}] Timeout waiting for folder view of {folder['path']}. Scanning anyway.")
+
+def link_stored_copy(stored_file, current_path, depth):
+    """Hardlinks the content-store blob of a file fetched in another folder into current_path, without a fetch"""
+    if not content_store or not content_store.has(stored_file.get("digest")) or not stored_file.get("path"):
+        return
+    target = os.path.join(current_path, os.path.basename(stored_file["path"]))
+    if os.path.exists(target):
         return
-        
     os.makedirs(current_path, exist_ok=True)
-    ensure_download_dir(current_path)
+    if content_store.link_into(stored_file["digest"], target):
+        print(f"{'  ' * depth}LINKED from content store: {target}")
 
-    processed_item_clean_names_this_level = set()
-    
-    print(f"{'  ' * depth}Performing initial scan of folder: {os.path.basename(current_path) if current_path else 'root'}")
-    current_items_to_process_attrs = collect_current_items_in_view(depth)
-    print(f"{'  ' * depth}Initial scan found {len(current_items_to_process_attrs)} processable items for {os.path.basename(current_path) if current_path else 'root'}.")
-        
-    item_idx = 0
-    while item_idx < len(current_items_to_process_attrs):
-        item_attrs = current_items_to_process_attrs[item_idx]
-        # Increment early, as 'continue' might be used, and for clarity with re-scan logic
-        item_idx += 1 
+def output_names(item_attrs):
+    """Names an item takes in its folder on disk: a sub-folder's, a file's, or one per configured export format"""
+    if is_folder(item_attrs["tooltip"], item_attrs["label"]):
+        return [item_attrs["clean_name"]]
+    file_type = get_google_file_type(item_attrs["tooltip"])
+    if file_type:
+        return [export_output_path(item_attrs["clean_name"], "", file_type, f) for f in EXPORT_FORMATS[file_type]]
+    return [item_attrs["file_name"]]
 
+def plan_folder_items(session, folder, frontier, items, first_position, seen_items, claimed_names):
+    """
+    Queues the sub-folders among a batch of harvested items and registers its files in the manifest.
+    Items are identified by Drive ID (clean name when they have none) via seen_items; an item with
+    an on-disk name (see output_names) already in claimed_names (name -> identity) for another item
+    of the folder is renamed to <clean name>_<first 8 ID characters> (its position without an ID)
+    instead of being dropped; its file_name gets the same suffix before the extension.
+    Returns the files that still need fetching as (position, item_attrs, manifest key) tuples.
+    """
+    current_path = folder["path"]
+    depth = folder["depth"]
+    file_work = [] # (position, item_attrs, manifest key) of files still to fetch, in view order
+    for item_idx, item_attrs in enumerate(items, start=first_position):
         clean_name = item_attrs["clean_name"]
-        tooltip = item_attrs["tooltip"]
-        label = item_attrs["label"]
-
-        if clean_name in processed_item_clean_names_this_level:
-            print(f"{'  ' * depth}Item '{clean_name}' (from list) already processed in this folder context. Skipping.")
-            continue
-        
-        # Safeguard skip for UI/Shortcuts - should have been caught by collect_current_items_in_view
-        tooltip_lower = tooltip.lower()
-        label_lower = label.lower() if label else ""
-        if any(skip_text in tooltip_lower or skip_text in label_lower for skip_text in SYSTEM_UI_ELEMENTS_TO_SKIP):
-            print(f"{'  ' * depth}Safeguard skip for UI element: '{clean_name}'. Should have been filtered by collector.")
-            processed_item_clean_names_this_level.add(clean_name)
+        identity = item_attrs["id"] or clean_name
+        if identity in seen_items:
+            print(f"{'  ' * depth}[{session.name}] Item '{clean_name}' already processed in this folder. Skipping.")
             continue
-        if tooltip.startswith("Google Drive shortcut:"):
-            print(f"{'  ' * depth}Safeguard skip for Shortcut: '{clean_name}'. Should have been filtered by collector.")
-            processed_item_clean_names_this_level.add(clean_name)
+        seen_items.add(identity)
+        # Labels that differ only in characters the file names drop still collide on disk
+        if any(claimed_names.get(name, identity) != identity for name in output_names(item_attrs)):
+            clean_name = f"{clean_name}_{(item_attrs['id'] or str(item_idx))[:8]}"
+            print(f"{'  ' * depth}[{session.name}] Another item in this folder is also saved as '{item_attrs['clean_name']}'. Saving this one as '{clean_name}'.")
+            item_attrs["clean_name"] = clean_name
+            file_root, file_ext = os.path.splitext(item_attrs["file_name"])
+            item_attrs["file_name"] = f"{file_root}_{(item_attrs['id'] or str(item_idx))[:8]}{file_ext}"
+        for name in output_names(item_attrs):
+            claimed_names[name] = identity
+
+        if is_folder(item_attrs["tooltip"], item_attrs["label"]):
+            if not item_attrs["id"]:
+                print(f"{'  ' * depth}[{session.name}] No Drive ID for sub-folder '{clean_name}'; cannot queue it by URL. Skipping.")
+                continue
+            stored_folder = manifest.folder_record(item_attrs["id"])
+            if stored_folder and stored_folder["state"] == "done":
+                if not SYNC_MODE:
+                    print(f"{'  ' * depth}[{session.name}] Sub-folder '{clean_name}' is complete in the manifest. Skipping.")
+                    continue
+                if (item_attrs["modified"] is not None and stored_folder.get("modified") == item_attrs["modified"]
+                        and manifest.subtree_complete(item_attrs["id"])):
+                    print(f"{'  ' * depth}[{session.name}] Sub-folder '{clean_name}' unchanged since last sync ({item_attrs['modified']}). Skipping sub-tree.")
+                    continue
+            sub_folder = folder_entry(item_attrs["id"], os.path.join(current_path, clean_name), depth + 1, item_attrs["modified"])
+            queued = frontier.put(sub_folder)
+            if queued:
+                manifest.add_folder(sub_folder, parent_id=folder["id"])
+            print(f"{'  ' * depth}[{session.name}] {'Queued' if queued else 'Already queued'} sub-folder: {clean_name}")
             continue
 
-        print(f"{'  ' * depth}Attempting to process item ({item_idx}/{len(current_items_to_process_attrs)}): '{clean_name}' in folder {os.path.basename(current_path) if current_path else 'root'}")
-        
-        sub_path = os.path.join(current_path, clean_name)
+        item_key = file_key(item_attrs, folder["id"])
+        stored_file = manifest.file_record(item_key)
+        if stored_file and stored_file["status"] == "done":
+            if SYNC_MODE and item_changed(stored_file, item_attrs):
+                print(f"{'  ' * depth}[{session.name}] File '{clean_name}' changed since last sync. Fetching it again.")
+                if not INVENTORY_MODE: # A dry run leaves the backup as it is
+                    remove_stale_copies({stored_file.get("path")} | item_outputs(item_attrs, current_path), depth)
+            elif (stored_file["folder_id"] == folder["id"] and not INVENTORY_MODE
+                    and get_google_file_type(item_attrs["tooltip"]) and missing_export_formats(item_attrs, current_path, True)):
+                # Formats added to --export-formats since the item was exported; only these are fetched
+                print(f"{'  ' * depth}[{session.name}] File '{clean_name}' lacks export formats "
+                      f"{', '.join(missing_export_formats(item_attrs, current_path, True))}. Exporting them.")
+            else:
+                if stored_file["folder_id"] != folder["id"] and not INVENTORY_MODE:
+                    # The same Drive item in a second folder (several parents or a shortcut)
+                    link_stored_copy(stored_file, current_path, depth)
+                print(f"{'  ' * depth}[{session.name}] File '{clean_name}' is done according to the manifest. Skipping.")
+                continue
+            manifest.set_file_status(item_key, "pending")
+        manifest.add_file(item_key, folder["id"], item_attrs, expected_output_path(item_attrs, current_path))
+        file_work.append((item_idx, item_attrs, item_key))
 
-        # Re-locate element before every interaction
-        try:
-            xpath_safe_tooltip = escape_xpath_value(tooltip)
-            xpath_safe_label = escape_xpath_value(label)
-            element_xpath = f"//div[@role='main']//div[@data-tooltip={xpath_safe_tooltip} and @aria-label={xpath_safe_label}]"
-            
-            # Extra logging for root items (depth == 0) when using the combined XPath
-            if depth == 0:
-                print(f"{'  ' * depth}Attempting to re-locate root item: '{clean_name}' using combined XPath: {element_xpath}")
-            
-            current_element = driver.find_element(By.XPATH, element_xpath)
-            
-            if depth == 0:
-                print(f"{'  ' * depth}Successfully re-located root item: '{clean_name}'")
+    return file_work
 
-        except NoSuchElementException: # Specific exception for not finding the element
-            print(f"{'  ' * depth}Could not re-locate element '{clean_name}' (Tooltip: {tooltip}, Label: {label}) using combined XPath.")
-            if depth == 0: # Perform diagnostic finds only for root items to limit log verbosity
-                print(f"{'  ' * depth}  DIAGNOSTIC FIND for root item '{clean_name}':")
-                try:
-                    elements_by_tooltip = driver.find_elements(By.XPATH, f"//div[@role='main']//div[@data-tooltip={xpath_safe_tooltip}]")
-                    if elements_by_tooltip:
-                        print(f"{'  ' * depth}    Found {len(elements_by_tooltip)} element(s) by tooltip only. First 5 labels: {[el.get_attribute('aria-label') for el in elements_by_tooltip[:5]]}")
-                    else:
-                        print(f"{'  ' * depth}    Found 0 elements by tooltip only.")
-                except Exception as diag_e_tooltip:
-                    print(f"{'  ' * depth}    Error during diagnostic find by tooltip: {diag_e_tooltip}")
+def fetch_one_file(session, folder, item_attrs, item_key):
+    """
+    Fetches one planned file by the cheapest available route: direct HTTP, a pooled editor tab,
+    or the folder view's element. Returns the outcome, "element not found" if the latter is missing.
+    """
+    current_path = folder["path"]
+    depth = folder["depth"]
+    outcome = fetch_file_directly(session, item_attrs, current_path, depth, item_key) if fetch_engine else None
+    if outcome is not None:
+        return outcome
+    if uses_editor_tab(item_attrs):
+        return process_file_item(session, None, item_attrs, current_path, depth, item_key)
+    with tracer.span("relocate", item_id=item_attrs["id"]) as span:
+        current_element = locate_item_element(session, item_attrs, depth)
+        span["outcome"] = "found" if current_element is not None else "missing"
+    if current_element is None:
+        return "element not found"
+    outcome = process_file_item(session, current_element, item_attrs, current_path, depth, item_key)
+    # An editor that opened in the same tab replaces the folder view; reload it by URL
+    if is_google_file(item_attrs["tooltip"]) and folder["id"] not in session.driver.current_url:
+        print(f"{'  ' * depth}[{session.name}] Folder view was replaced during export. Reopening {current_path} by URL.")
+        open_folder_view(session, folder)
+    return outcome
 
-                try:
-                    elements_by_label = driver.find_elements(By.XPATH, f"//div[@role='main']//div[@aria-label={xpath_safe_label}]")
-                    if elements_by_label:
-                        print(f"{'  ' * depth}    Found {len(elements_by_label)} element(s) by label only. First 5 tooltips: {[el.get_attribute('data-tooltip') for el in elements_by_label[:5]]}")
-                    else:
-                        print(f"{'  ' * depth}    Found 0 elements by label only.")
-                except Exception as diag_e_label:
-                    print(f"{'  ' * depth}    Error during diagnostic find by label: {diag_e_label}")
-            continue # Skip to the next item_attrs in the list
-        except Exception as e: # Catch other potential exceptions (e.g., StaleElementReference)
-            print(f"{'  ' * depth}An unexpected error ('{e.__class__.__name__}') occurred while re-locating '{clean_name}': {e}. Skipping.")
+def failure_classes_for(item_attrs):
+    """Failure classes (see retry_queue.py) of the route fetch_one_file takes for an item"""
+    if fetch_engine and direct_fetch_kind(item_attrs):
+        return ("http",)
+    if uses_editor_tab(item_attrs):
+        return ("editor", "export")
+    if is_google_file(item_attrs["tooltip"]):
+        return ("view", "editor", "export")
+    return ("view", "download")
+
+def attempt_file(session, folder, item_attrs, item_key, patient=False):
+    """
+    Fetches one planned file and records the outcome. A failure is queued for a retry, and while
+    the circuit breaker of its route is open the file is not tried at all. Required waits give up
+    after their learned timeouts, since the file gets another chance; patient=True (its last
+    attempt, or retries turned off) keeps the full timeouts. Returns the outcome.
+    """
+    classes = failure_classes_for(item_attrs)
+    if not breaker_allows(session, folder, item_attrs, item_key, classes):
+        return "circuit open"
+    try:
+        with tracer.span("file", item_id=item_attrs["id"], folder=folder["path"]) as file_span:
+            with contextlib.nullcontext() if patient or not RETRY_ATTEMPTS else waits.fail_fast():
+                outcome = fetch_one_file(session, folder, item_attrs, item_key)
+            file_span["outcome"] = outcome
+    except Exception:
+        retry_queue.breaker.abandon(classes) # The folder-level handler deals with the error
+        raise
+    record_file_outcome(session, folder, item_attrs, item_key, outcome, classes)
+    return outcome
+
+def breaker_allows(session, folder, item_attrs, item_key, classes):
+    """False (with the file deferred, no attempt used) while a circuit breaker of its failure classes is open"""
+    if not RETRY_ATTEMPTS or retry_queue.breaker.allow(classes):
+        return True
+    print(f"{'  ' * folder['depth']}[{session.name}] DEFERRED (circuit open): {item_attrs['clean_name']}")
+    retry_queue.defer(item_key, "circuit open", count_attempt=False)
+    manifest.set_file_status(item_key, "failed", error="circuit open")
+    return False
+
+def record_file_outcome(session, folder, item_attrs, item_key, outcome, classes):
+    """Stores the outcome of one fetch attempt in the manifest, the retry queue and the circuit breakers"""
+    depth = folder["depth"]
+    session.items_since_launch += 1
+    if outcome == "exists":
+        retry_queue.breaker.abandon(classes) # Nothing was asked of Drive
+        manifest.set_file_status(item_key, "done")
+        retry_queue.resolve(item_key)
+    elif outcome == "started":
+        retry_queue.breaker.record_success(classes)
+        if manifest.file_status(item_key) == "pending":
+            # The download tracker or HTTP engine records done/failed once the fetch ends
+            manifest.set_file_status(item_key, "started")
+    elif record_file_failure(item_key, outcome):
+        print(f"{'  ' * depth}[{session.name}] DEFERRED ({outcome}): {item_attrs['clean_name']} will be retried later.")
+    else:
+        print(f"{'  ' * depth}[{session.name}] FAILED ({outcome}): {item_attrs['clean_name']}")
+
+def process_file_work(session, folder, file_work):
+    """Fetches the planned files of a folder: bulk downloads first, then one by one with editors preloading"""
+    current_path = folder["path"]
+    depth = folder["depth"]
+    if BULK_BATCH_SIZE and not fetch_engine:
+        bulk_work = bulk_download_candidates(file_work, current_path)
+        bulk_done = set()
+        for start in range(0, len(bulk_work), BULK_BATCH_SIZE):
+            batch = bulk_work[start:start + BULK_BATCH_SIZE]
+            with tracer.span("bulk_download", folder=current_path, files=len(batch)) as span:
+                batch_done = bulk_download_batch(session, batch, current_path, depth)
+                span["extracted"] = len(batch_done)
+            session.items_since_launch += len(batch)
+            bulk_done |= batch_done
+        file_work = [work for work in file_work if work[2] not in bulk_done]
+    if SCHEDULE_MODE:
+        file_work = interleave_exports(file_work, lambda work: bool(get_google_file_type(work[1]["tooltip"])), run_costs)
+
+    # Editors of the next pooled exports load in background tabs while earlier items are fetched
+    upcoming_exports = collections.deque(
+        (item_attrs["id"], editor_url(get_google_file_type(item_attrs["tooltip"]), item_attrs["id"]))
+        for _, item_attrs, _ in file_work
+        if uses_editor_tab(item_attrs) and not item_on_disk(item_attrs, current_path)
+    )
+    for item_idx, item_attrs, item_key in file_work:
+        clean_name = item_attrs["clean_name"]
+        if upcoming_exports:
+            # The current item (if it is the next pooled export) comes first, so it is never starved of a tab
+            tab_pool_for(session).preload(itertools.islice(upcoming_exports, EXPORT_TABS))
+            if upcoming_exports[0][0] == item_attrs["id"]:
+                upcoming_exports.popleft()
+
+        print(f"{'  ' * depth}[{session.name}] Processing file #{item_idx}: '{clean_name}'")
+        attempt_file(session, folder, item_attrs, item_key)
+
+def crawl_frontier_folder(session, folder, frontier):
+    """
+    Opens one frontier folder by URL, processes its files and queues its sub-folders.
+    The folder is loaded and scanned exactly once; sub-folders are never entered from here.
+    Returns the number of items harvested from the folder.
+    """
+    current_path = folder["path"]
+    depth = folder["depth"]
+    driver = session.driver
+    print(f"{'  ' * depth}[{session.name}] >>> Crawling folder: {current_path} (Depth: {depth})")
+    if depth > MAX_FOLDER_DEPTH:
+        print(f"{'  ' * depth}[{session.name}] WARNING: Maximum depth reached at {current_path}. Skipping.")
+        return 0
+
+    manifest.set_folder_state(folder["id"], "scanning")
+    open_folder_view(session, folder)
+    if fetch_engine:
+        fetch_engine.refresh_cookies_if_stale(driver)
+
+    if not INVENTORY_MODE:
+        os.makedirs(current_path, exist_ok=True)
+        session.downloads.use_staging()
+
+    # Batches are processed while their rows are still rendered, and before a long list has been scrolled to the end
+    item_count = 0
+    seen_items = set()
+    claimed_names = {}
+    for batch in harvest_view_batches(session, depth):
+        file_work = plan_folder_items(session, folder, frontier, batch, item_count + 1, seen_items, claimed_names)
+        item_count += len(batch)
+        if INVENTORY_MODE:
+            continue # Recorded in the manifest by plan_folder_items; nothing is fetched
+        process_file_work(session, folder, file_work)
+        recycle_reason = session.recycle_reason()
+        if recycle_reason:
+            # Between batches no element handles are held, so the folder view can simply be reopened
+            session.restart(recycle_reason)
+            open_folder_view(session, folder)
+            session.downloads.use_staging()
+
+    if session.tab_pool:
+        session.tab_pool.recycle_unused()
+    manifest.set_folder_state(folder["id"], "done", item_count=item_count, modified=folder["modified"])
+    print(f"{'  ' * depth}[{session.name}] <<< Finished folder: {current_path}")
+    return item_count
+
+def run_frontier_worker(session, frontier, stop_event):
+    """
+    Worker thread body: keeps taking folders from the frontier until told to stop.
+    If the browser dies while crawling a folder, it is restarted and the folder is crawled
+    once more; files that already reached the disk are skipped the second time.
+    """
+    while not stop_event.is_set():
+        try:
+            folder = frontier.get(timeout=1)
+        except queue.Empty:
             continue
-            
-        # Now determine if it's a folder or file (already skipped UI/shortcuts)
-        if is_folder(tooltip, label): # is_folder also uses SYSTEM_UI_ELEMENTS_TO_SKIP as a safeguard
-            try:
-                print(f"{'  ' * depth}> Entering folder: {clean_name}")
-                ActionChains(driver).double_click(current_element).perform()
-                time.sleep(WAIT_TIME + 2) # Wait for folder to load
-                
-                process_folder(sub_path, depth + 1) # RECURSIVE CALL
-                
-                # After returning from sub-folder, mark this folder as processed for the current level
-                processed_item_clean_names_this_level.add(clean_name)
-                print(f"{'  ' * depth}Marked sub-folder '{clean_name}' as processed in {os.path.basename(current_path) if current_path else 'root'}.")
-
-                print(f"{'  ' * depth}Finished sub-folder: {clean_name}. Navigating back to parent: {os.path.basename(current_path) if current_path else 'root'}.")
-                driver.back()
-                
-                print(f"{'  ' * depth}  Waiting for parent folder's item list (grid/listbox) to be present after back (up to 15s)...")
-                try:
-                    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//div[@role='grid' or @role='listbox']")))
-                    print(f"{'  ' * depth}  Parent folder's item list container is present after back.")
-                except TimeoutException:
-                    print(f"{'  ' * depth}  Timeout waiting for parent folder's item list container after back.")
-
-                print(f"{'  ' * depth}Refreshing view for parent folder: {os.path.basename(current_path) if current_path else 'root'}.")
-                driver.refresh()
-                time.sleep(WAIT_TIME) 
-                
-                print(f"{'  ' * depth}  Waiting for refreshed parent folder's item list (grid/listbox) to be present (up to 15s)...")
-                try:
-                    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//div[@role='grid' or @role='listbox']")))
-                    print(f"{'  ' * depth}  Refreshed parent folder's item list container is present.")
-                except TimeoutException:
-                    print(f"{'  ' * depth}  Timeout waiting for refreshed parent folder's item list container.")
-                
-                print(f"{'  ' * depth}  Adding extra pause (WAIT_TIME={WAIT_TIME}s) for UI to settle after refresh.")
-                time.sleep(WAIT_TIME)
-                
-                print(f"{'  ' * depth}Re-scanning items in {os.path.basename(current_path) if current_path else 'root'} after returning from sub-folder and refreshing.")
-                current_items_to_process_attrs = collect_current_items_in_view(depth) # Re-assign
-                print(f"{'  ' * depth}Found {len(current_items_to_process_attrs)} items after refresh. Resetting loop for {os.path.basename(current_path) if current_path else 'root'}.")
-                item_idx = 0 # Reset index to re-iterate from the beginning of the *new* list
-                continue # Restart the while loop with the fresh list
-            except StaleElementReferenceException:
-                print(f"{'  ' * depth}StaleElementReferenceException during folder processing for '{clean_name}'. Attempting to recover by going back and rescanning.")
+        try:
+            for attempt in (1, 2):
                 try:
-                    print(f"{'  ' * depth}Attempting to navigate back due to SERE in folder {clean_name}...")
-                    print(f"{'  ' * depth}Attempting to navigate back (due to SERE) from folder '{clean_name}'...")
-                    driver.back()
-                    print(f"{'  ' * depth}  Waiting for item list to stabilize after SERE recovery (up to 15s)...")
-                    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//div[@role='grid' or @role='listbox']")))
-                    time.sleep(WAIT_TIME) # Allow further stabilization
-                    # After recovering by going back, we should re-scan the current folder.
-                    print(f"{'  ' * depth}Re-scanning items in {os.path.basename(current_path) if current_path else 'root'} after SERE recovery.")
-                    current_items_to_process_attrs = collect_current_items_in_view(depth)
-                    item_idx = 0 # Reset loop
-                    processed_item_clean_names_this_level.clear() # Clear processed for this level as we are re-scanning
-                    print(f"{'  ' * depth}Cleared processed items for this level due to SERE recovery and re-scan.")
-                    continue
-                except Exception as back_e:
-                    print(f"{'  ' * depth}Error trying to go back after SERE for '{clean_name}': {back_e}. Skipping item.")
-                    processed_item_clean_names_this_level.add(clean_name) # Mark as processed to avoid loop
-                    continue # Try next item in the list
+                    with tracer.span("folder", folder=folder["path"], folder_id=folder["id"],
+                                     inventory=INVENTORY_MODE) as folder_span:
+                        folder_span["items"] = crawl_frontier_folder(session, folder, frontier)
+                    break
+                except Exception as e:
+                    print(f"[{session.name}] Error crawling folder {folder['path']}: {e.__class__.__name__} - {e}")
+                    if attempt == 2 or session.is_alive():
+                        manifest.set_folder_state(folder["id"], "failed")
+                        break
+                    try:
+                        session.restart("browser crashed or stopped responding")
+                    except Exception as restart_error:
+                        # Leave the folder failed; the next folder tries to restart the browser again
+                        print(f"[{session.name}] Browser restart failed: {restart_error.__class__.__name__} - {restart_error}")
+                        manifest.set_folder_state(folder["id"], "failed")
+                        break
+        finally:
+            frontier.task_done(folder)
+
+FOLDER_LOAD_TIMEOUT = 15 # Seconds for a folder view to fire its load event (--engine cdp)
+HARVEST_TIMEOUT = 600 # Seconds for the in-page scan of one folder view (--engine cdp)
+FRONTIER_POLL_INTERVAL = 0.5 # Seconds a folder tab idles while the frontier is empty (--engine cdp)
+
+async def cdp_fetch_file(session, folder, item_attrs, item_key, fetch_tabs):
+    """
+    Fetches one planned file for the cdp engine by navigating a download tab to its export or
+    download URL and records the outcome. Items without such a URL (no Drive ID; Forms, Drawings
+    and Sites; spreadsheets still lacking a per-sheet format) are left to the retry pass, which goes
+    through the UI, without using up an attempt (so they get their UI attempt with --retries 0 too).
+    Returns the DevTools commands it sent.
+    """
+    depth = folder["depth"]
+    kind = direct_fetch_kind(item_attrs)
+    if not kind or needs_sheet_tabs(item_attrs, folder["path"]):
+        reason = "needs ui"
+        print(f"{'  ' * depth}[{session.name}] DEFERRED ({reason}): {item_attrs['clean_name']} goes through the UI after the crawl.")
+        retry_queue.defer(item_key, reason, count_attempt=False)
+        manifest.set_file_status(item_key, "failed", error=reason)
+        return 0
+    classes = ("download",)
+    outputs = direct_fetch_outputs(item_attrs, kind, folder["path"])
+    if not outputs:
+        print(f"SKIPPED (exists): {expected_output_path(item_attrs, folder['path'])}")
+        record_file_outcome(session, folder, item_attrs, item_key, "exists", classes)
+        return 0
+    if not breaker_allows(session, folder, item_attrs, item_key, classes):
+        return 0
+
+    started = time.monotonic()
+    tab = await fetch_tabs.get()
+    commands_before = tab.commands
+    outcome = "started"
+    try:
+        print(f"{'  ' * depth}> Fetching {kind} in a download tab: {item_attrs['clean_name']}")
+        for out_file, url_format in outputs:
+            outcome = await cdp_start_download(session, tab, kind, item_attrs, item_key, out_file, url_format, folder["path"])
+            if outcome != "started":
+                break
+    finally:
+        fetch_tabs.put_nowait(tab)
+    tracer.event("file", time.monotonic() - started, session=session.name, item_id=item_attrs["id"],
+                 folder=folder["path"], outcome=outcome, commands=tab.commands - commands_before)
+    record_file_outcome(session, folder, item_attrs, item_key, outcome, classes)
+    return tab.commands - commands_before
+
+async def cdp_start_download(session, tab, kind, item_attrs, item_key, out_file, url_format, path):
+    """Starts one download of an item in a download tab and waits for it to begin; returns the outcome"""
+    # The ticket only takes a download from this tab, as other tabs start theirs at the same time
+    ticket = session.downloads.expect(out_file, path, item_key, os.path.basename(out_file), frame_id=tab.target_id)
+    try:
+        await tab.start_download(export_url(FETCH_URLS, kind, item_attrs["id"], url_format))
+    except CDPError as e:
+        session.downloads.cancel(ticket)
+        print(f"  Download error for '{item_attrs['clean_name']}': {e}")
+        return "download error"
+    begin_timeout = DOWNLOAD_BEGIN_TIMEOUT if kind == "file" else EXPORT_BEGIN_TIMEOUT
+    if await asyncio.to_thread(session.downloads.wait_for_begin, ticket, begin_timeout):
+        print(f"DOWNLOAD STARTED: {out_file} (as {ticket['filename']})")
+        return "started"
+    session.downloads.cancel(ticket)
+    print(f"  Download of '{item_attrs['clean_name']}' did not begin within {begin_timeout}s.")
+    return "download not started"
+
+async def cdp_crawl_folder(session, page, folder, frontier, fetch_tabs):
+    """
+    The cdp engine's crawl_frontier_folder: loads the folder in its own tab, scans the whole view
+    with one in-page script and fetches its files concurrently in the download tabs.
+    Returns (items harvested, DevTools commands sent).
+    """
+    current_path = folder["path"]
+    depth = folder["depth"]
+    print(f"{'  ' * depth}[{session.name}] >>> Crawling folder: {current_path} (Depth: {depth})")
+    if depth > MAX_FOLDER_DEPTH:
+        print(f"{'  ' * depth}[{session.name}] WARNING: Maximum depth reached at {current_path}. Skipping.")
+        return 0, 0
+
+    commands_before = page.commands
+    manifest.set_folder_state(folder["id"], "scanning")
+    try:
+        await page.navigate(folder["url"], FOLDER_LOAD_TIMEOUT)
+    except CDPError as e:
+        print(f"{'  ' * depth}[{session.name}] {e}. Scanning anyway.")
+    if not INVENTORY_MODE:
+        os.makedirs(current_path, exist_ok=True)
+        session.downloads.use_staging()
+
+    items = filter_view_items(await page.evaluate(HARVEST_ALL_JS, HARVEST_TIMEOUT) or [])
+    print(f"{'  ' * depth}Collected {len(items)} processable items from current view.")
+    file_work = plan_folder_items(session, folder, frontier, items, 1, set(), {})
+    if INVENTORY_MODE:
+        file_work = [] # Recorded in the manifest by plan_folder_items; nothing is fetched
+    elif SCHEDULE_MODE:
+        file_work = interleave_exports(file_work, lambda work: bool(get_google_file_type(work[1]["tooltip"])), run_costs)
+    fetch_commands = await asyncio.gather(*(
+        cdp_fetch_file(session, folder, item_attrs, item_key, fetch_tabs) for _, item_attrs, item_key in file_work
+    ))
+
+    manifest.set_folder_state(folder["id"], "done", item_count=len(items), modified=folder["modified"])
+    print(f"{'  ' * depth}[{session.name}] <<< Finished folder: {current_path}")
+    return len(items), page.commands - commands_before + sum(fetch_commands)
+
+async def cdp_folder_loop(session, connection, frontier, stop_event, fetch_tabs, state):
+    """One folder tab: takes folders from the frontier until the crawl ends or the browser must restart"""
+    page = await PageTarget.create(connection)
+    try:
+        while not stop_event.is_set() and not state["restart"] and not connection.closed:
+            try:
+                # Never blocks, so a cancelled loop cannot take a folder it will not finish
+                folder = frontier.get(0)
+            except queue.Empty:
+                await asyncio.sleep(FRONTIER_POLL_INTERVAL)
+                continue
+            started = time.monotonic()
+            items = commands = 0
+            try:
+                items, commands = await cdp_crawl_folder(session, page, folder, frontier, fetch_tabs)
             except Exception as e:
-                print(f"{'  ' * depth}General folder processing error for '{clean_name}': {e}. Attempting to recover.")
-                try:
-                    print(f"{'  ' * depth}Attempting to navigate back (due to general error) from folder '{clean_name}'...")
-                    driver.back()
-                    print(f"{'  ' * depth}  Waiting for item list to stabilize after general error recovery (up to 15s)...")
-                    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//div[@role='grid' or @role='listbox']")))
-                    time.sleep(WAIT_TIME)
-                    # After recovering, re-scan the current folder.
-                    print(f"{'  ' * depth}Re-scanning items in {os.path.basename(current_path) if current_path else 'root'} after general error recovery.")
-                    current_items_to_process_attrs = collect_current_items_in_view(depth)
-                    item_idx = 0 # Reset loop
-                    processed_item_clean_names_in_this_level.clear() # Clear processed for this level
-                    print(f"{'  ' * depth}Cleared processed items for this level due to general error recovery and re-scan.")
-                    continue
-                except Exception as back_e:
-                    print(f"{'  ' * depth}Error trying to go back after general error for '{clean_name}': {back_e}. Skipping item.")
-                    processed_item_clean_names_this_level.add(clean_name) # Mark as processed
-                    continue # Try next item
-        else: # It's a file
-            file_type = get_google_file_type(tooltip)
-            if file_type:
-                print(f"{'  ' * depth}> Exporting Google {file_type}: {clean_name}")
-                export_google_file(current_element, file_type, current_path, clean_name)
-            else:
-                print(f"{'  ' * depth}> Downloading file: {clean_name}")
-                download_non_google_file(current_element, current_path, clean_name)
-            
-            processed_item_clean_names_this_level.add(clean_name)
-            print(f"{'  ' * depth}Marked file '{clean_name}' as processed in {os.path.basename(current_path) if current_path else 'root'}.")
-
-    print(f"{'  ' * depth}<<< Exiting process_folder for path: {current_path} (Depth: {depth})")
-# Start
-print("Starting Google Drive backup...")
-process_folder(BASE_DOWNLOAD_DIR)
-print("All done.")
-driver.quit()
+                print(f"[{session.name}] Error crawling folder {folder['path']}: {e.__class__.__name__} - {e}")
+                manifest.set_folder_state(folder["id"], "failed")
+            finally:
+                frontier.task_done(folder)
+            tracer.event("folder", time.monotonic() - started, session=session.name, folder=folder["path"],
+                         folder_id=folder["id"], items=items, commands=commands, inventory=INVENTORY_MODE)
+            state["restart"] = state["restart"] or session.recycle_reason()
+        if connection.closed and not state["restart"]:
+            state["restart"] = "browser crashed or stopped responding"
+    finally:
+        await page.close()
+
+async def cdp_crawl_session(session, frontier, stop_event):
+    """
+    Crawls with CDP_TABS folder tabs of the session's browser over one DevTools connection.
+    Returns why the browser has to be restarted, or None once the crawl is over.
+    """
+    connection = await AsyncCDPConnection.connect(browser_websocket_url(debugger_address(session.driver)))
+    fetch_tabs = asyncio.Queue()
+    state = {"restart": None}
+    try:
+        for _ in range(CDP_TABS):
+            fetch_tabs.put_nowait(await PageTarget.create(connection))
+        await asyncio.gather(*(
+            cdp_folder_loop(session, connection, frontier, stop_event, fetch_tabs, state) for _ in range(CDP_TABS)
+        ))
+        while not fetch_tabs.empty():
+            await fetch_tabs.get_nowait().close()
+    finally:
+        await connection.close()
+    return state["restart"]
+
+def run_cdp_worker(session, frontier, stop_event):
+    """
+    Worker thread body for --engine cdp: runs the session's asyncio crawl, restarting the browser
+    when it crashes or needs recycling. Folders that failed stay failed in the manifest.
+    """
+    while not stop_event.is_set():
+        try:
+            restart_reason = asyncio.run(cdp_crawl_session(session, frontier, stop_event))
+        except Exception as e:
+            restart_reason = f"DevTools connection failed ({e.__class__.__name__} - {e})"
+        if not restart_reason or stop_event.is_set():
+            continue
+        try:
+            session.restart(restart_reason)
+        except Exception as restart_error:
+            print(f"[{session.name}] Browser restart failed: {restart_error.__class__.__name__} - {restart_error}")
+            stop_event.wait(MEMORY_CHECK_INTERVAL)
+
+def crawl_drive(sessions, root_path):
+    """
+    Crawls the Drive tree with one thread per browser session, all sharing one frontier.
+    With a single session this is a plain depth-first walk driven by an explicit stack.
+    """
+    frontier = SharedFrontier(QUEUE_PATH, root_path) if QUEUE_PATH else FolderFrontier()
+    if QUEUE_PATH and QUEUE_ROLE == "worker":
+        print(f"Joining the shared work queue {QUEUE_PATH} as worker {frontier.owner}.")
+    elif manifest.is_empty() or SYNC_MODE or INVENTORY_MODE:
+        # A sync or inventory walks from the top and decides per sub-tree what can be skipped
+        if SCHEDULE_MODE:
+            print(f"Manifest {manifest.db_path} is empty: nothing to schedule, the crawl starts at My Drive.")
+        root_folder = folder_entry(ROOT_FOLDER_ID, root_path, 0)
+        if frontier.seed([root_folder]):
+            manifest.add_folder(root_folder)
+    else:
+        resume_folders = manifest.resume_frontier()
+        print(f"Resuming from manifest {manifest.db_path}: {len(resume_folders)} folder(s) left in the frontier.")
+        if SCHEDULE_MODE:
+            # The LIFO frontier takes the last folder first: priority paths, then the most work
+            resume_folders = schedule_folders(resume_folders, manifest, run_costs, root_path, PRIORITY_PATHS)
+        # Otherwise the deepest folders come last, so the LIFO frontier continues depth-first
+        frontier.seed([folder_entry(row["id"], row["path"], row["depth"]) for row in resume_folders])
+    stop_event = threading.Event()
+    worker_body = run_cdp_worker if FETCH_ENGINE == "cdp" else run_frontier_worker
+    threads = [
+        threading.Thread(target=worker_body, args=(s, frontier, stop_event), name=s.name, daemon=True)
+        for s in sessions
+    ]
+    for t in threads:
+        t.start()
+    frontier.join()
+    stop_event.set()
+    for t in threads:
+        t.join()
+    if QUEUE_PATH:
+        print(f"Shared work queue state: {frontier.counts()}")
+        frontier.close()
+
+def retry_folder_files(session, folder_id, due):
+    """
+    Gives the due retries of one folder another attempt. Files that need the folder view are
+    looked up in a fresh harvest of it; a file that is no longer listed counts as a failed attempt.
+    """
+    stored_folder = manifest.folder_record(folder_id)
+    folder = folder_entry(folder_id, stored_folder["path"], stored_folder["depth"])
+    depth = folder["depth"]
+    pending = {}
+    for row in due:
+        item_attrs = row["attrs"]
+        # Files that need no folder view are tried straight away
+        if (fetch_engine and direct_fetch_kind(item_attrs)) or uses_editor_tab(item_attrs):
+            retry_file(session, folder, item_attrs, row)
+        else:
+            pending[row["id"]] = row
+    if not pending:
+        return
+
+    print(f"{'  ' * depth}[{session.name}] Reopening {folder['path']} to retry {len(pending)} file(s).")
+    open_folder_view(session, folder)
+    session.downloads.use_staging()
+    for batch in harvest_view_batches(session, depth):
+        for item_attrs in batch:
+            row = pending.pop(file_key(item_attrs, folder_id), None)
+            if row:
+                # The stored attributes carry the names chosen during the crawl (collision renames included)
+                retry_file(session, folder, row["attrs"], row)
+        if not pending:
+            break
+    for key, row in pending.items():
+        print(f"{'  ' * depth}[{session.name}] '{row['attrs']['clean_name']}' is no longer listed in {folder['path']}.")
+        record_file_failure(key, "element not found")
+
+def retry_file(session, folder, item_attrs, row):
+    """One retry of a file from the retries table; its last attempt gets the full timeouts"""
+    key = row["id"]
+    if manifest.file_status(key) in ("done", "started"):
+        retry_queue.resolve(key) # Fetched meanwhile, e.g. from another folder
+        return
+    manifest.set_file_status(key, "pending")
+    print(f"{'  ' * folder['depth']}[{session.name}] RETRY #{row['attempts']} of '{item_attrs['clean_name']}' "
+          f"(last failure: {row['reason']})")
+    attempt_file(session, folder, item_attrs, key, patient=retry_queue.is_last_attempt(key))
+
+def report_inventory():
+    """Writes the --inventory report and prints the totals, the projected runtime and the biggest subtrees"""
+    tracer.writer.flush() # The folder scans of this run count towards the measured costs
+    costs = measured_costs(TRACE_PATH)
+    totals, projected = write_report(INVENTORY_REPORT_PATH, manifest, costs, WORKER_COUNT, BASE_DOWNLOAD_DIR)
+    print("-" * 40)
+    print(f"Inventory: {totals['folders']} folders, {totals['files']} files ({totals['exports']} Google Docs/Sheets/Slides, "
+          f"{totals['other']} other Google files), {totals['bytes'] / 1024 / 1024:.1f} MB "
+          f"(+ {totals['unknown_sizes']} files without a listed size)")
+    print(f"Still to fetch: {totals['pending_files']} files. Projected runtime with {WORKER_COUNT} session(s): "
+          f"{projected / 3600:.1f} h (per folder {costs['folder']:.1f}s, export {costs['export']:.1f}s, "
+          f"download {costs['download']:.1f}s, {costs['bytes_per_second'] / 1024 / 1024:.1f} MB/s)")
+    print("Subtrees with the most work:")
+    for seconds, path, subtree in largest_subtrees(manifest, costs):
+        print(f"  {seconds / 60:8.1f} min  {os.path.relpath(path, BASE_DOWNLOAD_DIR)} "
+              f"({subtree['files']} files, {subtree['bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"Per-subtree totals written to {INVENTORY_REPORT_PATH}")
+
+def run_retry_pass(sessions):
+    """
+    After the crawl: retries deferred files in the first session as they come due, folder by folder,
+    until no retry is waiting. The retries table is in the manifest, so an interrupted pass continues
+    on the next run. With --retries 0 it only runs for --engine cdp, whose deferred "needs ui" items
+    get their single attempt here.
+    """
+    if (not RETRY_ATTEMPTS and FETCH_ENGINE != "cdp") or INVENTORY_MODE or (QUEUE_PATH and QUEUE_ROLE == "worker"):
+        return # With a shared queue the coordinator retries the files every host deferred
+    session = sessions[0]
+    while True:
+        due = manifest.due_retries(time.time())
+        if not due:
+            next_attempt = manifest.next_retry_time()
+            if next_attempt is None:
+                # Fetches still running may fail yet and queue retries of their own
+                if fetch_engine:
+                    fetch_engine.wait()
+                for running_session in sessions:
+                    running_session.downloads.wait_all(DOWNLOAD_DRAIN_TIMEOUT)
+                if manifest.next_retry_time() is None:
+                    break
+                continue
+            delay = max(0.0, next_attempt - time.time())
+            print(f"[{session.name}] Next retry due in {delay:.0f}s.")
+            time.sleep(min(delay, RETRY_POLL_INTERVAL))
+            continue
+        print(f"[{session.name}] Retrying {len(due)} deferred file(s).")
+        for folder_id, rows in itertools.groupby(due, key=lambda row: row["folder_id"]):
+            rows = list(rows)
+            if any(row["attrs"] is None for row in rows):
+                # Recorded by a manifest from before the attributes were stored; nothing to find it by
+                for row in rows:
+                    if row["attrs"] is None:
+                        manifest.set_retry(row["id"], None, None, None, state="exhausted")
+                rows = [row for row in rows if row["attrs"] is not None]
+            if rows:
+                with tracer.span("retry", folder_id=folder_id, files=len(rows)):
+                    retry_folder_files(session, folder_id, rows)
+                recycle_reason = session.recycle_reason()
+                if recycle_reason:
+                    session.restart(recycle_reason)
+
+def main(argv=None):
+    """Command-line entry point: parses argv (sys.argv[1:] if None), signs in and runs the backup"""
+    global manifest, tracer, content_store, output_sink, retry_queue, main_session, fetch_engine, run_costs
+    configure(argv)
+    print(f"Starting Google Drive Clone Script Version: {SCRIPT_VERSION}")
+    print("-" * 40) # Add a separator line for clarity
+    manifest = CrawlManifest(MANIFEST_PATH, shared=bool(QUEUE_PATH), root=BASE_DOWNLOAD_DIR)
+    tracer = Tracer(TRACE_PATH)
+    content_store = ContentStore(CONTENT_STORE_DIR) if CONTENT_STORE_DIR else None
+    if ARCHIVE_DIR:
+        output_sink = ArchiveSink(ARCHIVE_DIR, BASE_DOWNLOAD_DIR, ARCHIVE_VOLUME_BYTES, ARCHIVE_ZSTD)
+    retry_queue = RetryQueue(manifest, max_attempts=RETRY_ATTEMPTS + 1)
+    main_session = BrowserSession("main", SESSION_DIR, DEBUGGER_ADDRESS)
+    open_drive(main_session)
+
+    if FETCH_ENGINE == "http":
+        fetch_engine = HttpFetchEngine(FETCH_URLS, max_workers=HTTP_CONCURRENCY)
+        print(f"Direct HTTP engine using {fetch_engine.load_cookies(main_session.driver)} browser cookies, "
+              f"{HTTP_CONCURRENCY} parallel fetches.")
+
+    # Start
+    print("Starting Google Drive inventory (nothing is downloaded)..." if INVENTORY_MODE else "Starting Google Drive backup...")
+    # Per-item costs measured by earlier runs, for ordering a scheduled run
+    run_costs = measured_costs(TRACE_PATH) if SCHEDULE_MODE else None
+    sessions = [main_session]
+    for worker_idx in range(1, WORKER_COUNT):
+        worker_session = BrowserSession(f"worker{worker_idx}", prepare_worker_profile(worker_idx))
+        worker_session.driver.get(DRIVE_ROOT_URL)
+        copy_login_cookies(main_session, worker_session)
+        sessions.append(worker_session)
+    print(f"Crawling with {len(sessions)} browser session(s).")
+    crawl_drive(sessions, BASE_DOWNLOAD_DIR)
+    run_retry_pass(sessions)
+    if INVENTORY_MODE:
+        report_inventory()
+    if fetch_engine:
+        print("Waiting for direct fetches to finish...")
+        fetch_engine.close()
+    for worker_session in sessions[1:]:
+        worker_session.quit()
+    main_session.quit()
+    if content_store:
+        content_store.close()
+        print(content_store.summary())
+    output_sink.close() # After the browsers, whose last downloads are queued while they drain
+    if output_sink.summary():
+        print(output_sink.summary())
+    print(f"Manifest state: {manifest.counts()}")
+    print(f"Wait latencies:\n{waits.model.summary()}")
+    print(tracer.summary())
+    tracer.close()
+    manifest.close()
+    print("All done.")
+
+if __name__ == "__main__":
+    main()
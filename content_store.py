@@ -0,0 +1,103 @@
+"""
+Content-addressed blob store with hardlinks into the backup tree.
+
+Every finished download is hashed (SHA-256) and kept once under
+<root>/<first two hex digits>/<digest>. The file at its folder path becomes a
+hardlink to that blob, so identical files in many folders take the space of
+one. The store must live on the same filesystem as the backup; where a
+hardlink cannot be made the file is simply left as it is.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def new_hash():
+    return hashlib.sha256()
+
+def file_digest(path):
+    """Hex SHA-256 of a file's content"""
+    digest = new_hash()
+    with open(path, "rb") as source:
+        while True:
+            chunk = source.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ContentStore:
+    """Thread-safe blob store; files are hashed on a background thread unless their digest is known."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="content-store")
+        self.blob_count = 0 # Blobs added during this run
+        self.linked_bytes = 0 # Bytes not stored twice thanks to an existing blob
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest):
+        return bool(digest) and os.path.exists(self.blob_path(digest))
+
+    def ingest(self, path, digest=None):
+        """
+        Stores the file at path (hashing it unless digest is given) and makes path a hardlink
+        to its blob. Returns the digest, or None if the file could not be stored.
+        """
+        try:
+            digest = digest or file_digest(path)
+            blob = self.blob_path(digest)
+            with self._lock:
+                if not os.path.exists(blob):
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    os.link(path, blob)
+                    self.blob_count += 1
+                elif not os.path.samefile(blob, path):
+                    size = os.path.getsize(path)
+                    _replace_with_link(blob, path)
+                    self.linked_bytes += size
+        except OSError as e:
+            print(f"Could not add {path} to the content store: {e.__class__.__name__} - {e}")
+            return None
+        return digest
+
+    def ingest_later(self, path, on_done=None):
+        """Queues ingest(path) on the store's thread; on_done(digest) runs there afterwards"""
+        def run():
+            digest = self.ingest(path)
+            if on_done:
+                on_done(digest)
+        self._executor.submit(run)
+
+    def link_into(self, digest, path):
+        """Creates path as a hardlink to a stored blob; returns True on success"""
+        try:
+            _replace_with_link(self.blob_path(digest), path)
+        except OSError as e:
+            print(f"Could not link blob {digest[:12]} to {path}: {e.__class__.__name__} - {e}")
+            return False
+        with self._lock:
+            self.linked_bytes += os.path.getsize(path)
+        return True
+
+    def summary(self):
+        return f"Content store {self.root}: {self.blob_count} new blobs, {self.linked_bytes} bytes deduplicated"
+
+    def close(self):
+        """Waits for queued ingests to finish"""
+        self._executor.shutdown(wait=True)
+
+def _replace_with_link(blob, path):
+    """Atomically points path at blob (a temporary link renamed over path)"""
+    temp_path = f"{path}.link-tmp"
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    os.link(blob, temp_path)
+    os.replace(temp_path, path)
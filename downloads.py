@@ -0,0 +1,267 @@
+"""
+Download tracking driven by Chrome DevTools download events.
+
+Chrome reports every download with Browser.downloadWillBegin (carrying a GUID)
+and then Browser.downloadProgress until it is completed or canceled. The
+tracker ties each GUID to the crawl item that triggered it, so the crawl can
+move on as soon as the browser has accepted a download while completion is
+confirmed on the CDP reader thread.
+
+In staging mode every download of a browser lands in one staging directory
+under its GUID (Chrome's "allowAndName" behavior), so the download directory is
+set once per browser instead of once per folder, and downloads for different
+folders can run at the same time. A finalize thread then fsyncs each finished
+file and atomically moves it to the folder and name its ticket asked for.
+"""
+
+import collections
+import os
+import queue
+import shutil
+import threading
+import time
+
+def new_ticket(label, download_dir, item_key=None, filename=None, frame_id=None):
+    """
+    State of one expected download; "state" follows Chrome's download states.
+    "target_name" is the file name wanted in download_dir (staging mode only; otherwise Chrome names the file).
+    "frame_id" is the frame the download will come from, if known.
+    """
+    return {
+        "label": label,
+        "item_key": item_key,
+        "dir": download_dir,
+        "target_name": filename,
+        "frame_id": frame_id,
+        "guid": None,
+        "state": "expected",
+        "filename": None,
+        "path": None,
+        "staged_path": None,
+        "received": 0,
+        "total": 0,
+        "created_at": time.monotonic()
+    }
+
+def unique_path(path):
+    """path, or "name (n).ext" next to it for the first n that is free, as Chrome names duplicates"""
+    if not os.path.exists(path):
+        return path
+    root, ext = os.path.splitext(path)
+    n = 1
+    while os.path.exists(f"{root} ({n}){ext}"):
+        n += 1
+    return f"{root} ({n}){ext}"
+
+def fsync_directory(path):
+    """Makes a rename in path durable; a no-op where directories cannot be opened (Windows)"""
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+class DownloadTracker:
+    """Follows the downloads of one browser and matches them to the items that started them."""
+
+    def __init__(self, connection, name, staging_dir=None):
+        self.connection = connection
+        self.name = name
+        self.staging_dir = staging_dir
+        self._cond = threading.Condition()
+        self._expected = collections.deque() # tickets waiting for their downloadWillBegin, oldest first
+        self._by_guid = {}
+        self.completed = []
+        self.failed = []
+        self._listeners = []
+        self._download_target = None # ("staging", dir) or ("dir", dir) the browser currently saves to
+        self._last_dir = None # Destination of the latest expected download, for downloads nobody asked for
+        self._finalize_queue = queue.Queue()
+        self._finalize_pending = set() # GUIDs of completed staged downloads not moved into place yet
+        if staging_dir:
+            os.makedirs(staging_dir, exist_ok=True)
+            threading.Thread(target=self._finalize_loop, name=f"finalize-{name}", daemon=True).start()
+        connection.on("Browser.downloadWillBegin", self._on_will_begin)
+        connection.on("Browser.downloadProgress", self._on_progress)
+
+    def set_download_dir(self, path):
+        """Points the browser's downloads at path (named by Chrome) and switches on download events"""
+        if self._download_target == ("dir", path):
+            return
+        self.connection.send("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": path,
+            "eventsEnabled": True
+        })
+        self._download_target = ("dir", path)
+
+    def use_staging(self):
+        """
+        Sends downloads to the staging directory under their GUIDs; only the first call
+        (and the first after set_download_dir) costs a DevTools round trip.
+        """
+        if self._download_target == ("staging", self.staging_dir):
+            return
+        self.connection.send("Browser.setDownloadBehavior", {
+            "behavior": "allowAndName",
+            "downloadPath": self.staging_dir,
+            "eventsEnabled": True
+        })
+        self._download_target = ("staging", self.staging_dir)
+
+    def add_listener(self, callback):
+        """Calls callback(ticket) whenever a download finishes, fails or never starts"""
+        self._listeners.append(callback)
+
+    def _notify(self, ticket):
+        for callback in self._listeners:
+            try:
+                callback(ticket)
+            except Exception as e:
+                print(f"[{self.name}] Error in download listener: {e.__class__.__name__} - {e}")
+
+    def expect(self, label, download_dir, item_key=None, filename=None, frame_id=None):
+        """
+        Registers a download about to be triggered for an item and returns its ticket.
+        Call this before the click/keypress that starts the download, so the event cannot be missed.
+        In staging mode the file ends up as download_dir/filename (Chrome's suggested name if None).
+        Tickets are matched to downloads oldest first; one with a frame_id only takes a download
+        from that frame, so downloads started in several tabs at once cannot be swapped.
+        """
+        ticket = new_ticket(label, download_dir, item_key, filename, frame_id)
+        with self._cond:
+            self._expected.append(ticket)
+            self._last_dir = download_dir
+        return ticket
+
+    def wait_for_begin(self, ticket, timeout):
+        """Blocks until Chrome accepted the ticket's download (True) or timeout expires (False)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket["state"] != "expected", timeout)
+
+    def wait_for_end(self, ticket, timeout):
+        """Blocks until the ticket's download completed, was canceled or never started (True) or timeout expires"""
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket["state"] not in ("expected", "inProgress"), timeout)
+
+    def cancel(self, ticket):
+        """Forgets a ticket whose download never began, so it cannot claim a later download"""
+        with self._cond:
+            if ticket["state"] != "expected":
+                return
+            self._expected.remove(ticket)
+            ticket["state"] = "not_started"
+            self.failed.append(ticket)
+        self._notify(ticket)
+
+    def wait_all(self, timeout, download_dir=None):
+        """
+        Waits for every begun download (only those saved to download_dir, if given) to finish and
+        be moved into place; returns True if none is left
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: all(t["state"] != "inProgress" for t in self._by_guid.values()
+                            if download_dir is None or t["dir"] == download_dir), timeout)
+
+    def _take_expected(self, frame_id):
+        """Oldest expected ticket for a download from frame_id: one waiting for that frame, else one without a frame"""
+        for wanted in (frame_id, None):
+            for ticket in self._expected:
+                if ticket["frame_id"] == wanted:
+                    self._expected.remove(ticket)
+                    return ticket
+        return None
+
+    def _on_will_begin(self, params, session_id):
+        with self._cond:
+            ticket = self._take_expected(params.get("frameId"))
+            if ticket is None:
+                # A download nobody asked for (e.g. a second file from one export); track it anyway
+                ticket = new_ticket(params.get("suggestedFilename"), self._unexpected_download_dir())
+            ticket["guid"] = params["guid"]
+            ticket["filename"] = params.get("suggestedFilename")
+            if self._download_target and self._download_target[0] == "staging":
+                ticket["staged_path"] = os.path.join(self.staging_dir, ticket["guid"])
+            elif ticket["dir"] and ticket["filename"]:
+                ticket["path"] = os.path.join(ticket["dir"], ticket["filename"])
+            ticket["state"] = "inProgress"
+            self._by_guid[ticket["guid"]] = ticket
+            self._cond.notify_all()
+
+    def _on_progress(self, params, session_id):
+        with self._cond:
+            ticket = self._by_guid.get(params["guid"])
+            if not ticket:
+                return
+            ticket["received"] = params.get("receivedBytes", ticket["received"])
+            ticket["total"] = params.get("totalBytes", ticket["total"])
+            state = params.get("state")
+            if state == "inProgress" or state == ticket["state"] or ticket["guid"] in self._finalize_pending:
+                return
+            if state == "completed" and ticket["staged_path"]:
+                # Still "inProgress" until the finalize thread has moved it into place and reported it;
+                # nothing touches the disk on this thread
+                self._finalize_pending.add(ticket["guid"])
+                self._finalize_queue.put(ticket)
+                return
+            ticket["state"] = state
+            elapsed = time.monotonic() - ticket["created_at"]
+            if state == "completed":
+                self.completed.append(ticket)
+                print(f"[{self.name}] DOWNLOADED: {ticket['path'] or ticket['filename']} ({ticket['received']} bytes, {elapsed:.1f}s)")
+            else:
+                self.failed.append(ticket)
+                print(f"[{self.name}] DOWNLOAD {state.upper()}: {ticket['label']} ({ticket['filename']})")
+            self._cond.notify_all()
+        self._notify(ticket)
+
+    def _unexpected_download_dir(self):
+        """Where a download nobody expected ends up: with staging, the folder of the latest expected one"""
+        if self._download_target and self._download_target[0] == "staging":
+            return self._last_dir or self.staging_dir
+        return self._download_target[1] if self._download_target else None
+
+    def _finalize_loop(self):
+        while True:
+            ticket = self._finalize_queue.get()
+            try:
+                self._finalize(ticket)
+                state = "completed"
+            except OSError as e:
+                state = "finalize_failed"
+                print(f"[{self.name}] Could not move {ticket['staged_path']} into place for {ticket['label']}: "
+                      f"{e.__class__.__name__} - {e}")
+            with self._cond:
+                self._finalize_pending.discard(ticket["guid"])
+                ticket["state"] = state
+                (self.completed if state == "completed" else self.failed).append(ticket)
+                self._cond.notify_all()
+            self._notify(ticket)
+
+    def _finalize(self, ticket):
+        """fsyncs a finished staged download and atomically renames it to its ticket's folder and name"""
+        name = ticket["target_name"] or ticket["filename"] or ticket["guid"]
+        os.makedirs(ticket["dir"], exist_ok=True)
+        final_path = unique_path(os.path.join(ticket["dir"], name))
+        with open(ticket["staged_path"], "rb") as staged:
+            os.fsync(staged.fileno())
+        try:
+            os.replace(ticket["staged_path"], final_path)
+        except OSError:
+            # Staging on another filesystem: copy, then drop the staged file
+            shutil.move(ticket["staged_path"], final_path)
+        fsync_directory(ticket["dir"])
+        ticket["path"] = final_path
+        elapsed = time.monotonic() - ticket["created_at"]
+        print(f"[{self.name}] DOWNLOADED: {final_path} ({ticket['received']} bytes, {elapsed:.1f}s)")
+
+    def summary(self):
+        with self._cond:
+            running = sum(1 for t in self._by_guid.values() if t["state"] == "inProgress")
+            completed_bytes = sum(t["received"] for t in self.completed)
+            return (f"[{self.name}] Downloads: {len(self.completed)} completed ({completed_bytes} bytes), "
+                    f"{len(self.failed)} failed or not started, {running} still running")
@@ -0,0 +1,507 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Google Drive web UI, for exercising clone.py without a Google account.
+
+Serves a synthetic folder tree with the same markup the crawler relies on:
+rows carrying data-id inside role="main", each with a data-tooltip / aria-label
+element, double-click to open folders and documents, click / Ctrl+click
+selection and a keyboard-driven context menu whose first entry downloads the
+file (several selected files come as one zip, like Drive). Docs, Sheets and
+Slides open in fake editors with File > Download > format menus. The
+export/download URLs used by http_engine.py are served too; like Google, they
+only answer to the session cookie that the folder pages set.
+
+Rows are rendered by a small script, optionally virtualized (only a window of
+rows exists in the DOM and more are loaded when the list is scrolled to the
+bottom), and every response can be delayed to imitate a slow connection.
+
+    python fake_drive.py --port 8765 --depth 3 --fanout 3 --files 5 --docs 2 --virtualize 40
+    python clone.py --drive-url http://127.0.0.1:8765 --workers 4
+"""
+
+import argparse
+import html
+import io
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+# Same tooltip prefixes the real Drive UI uses for the item kinds we generate
+FILE_KINDS = [
+    ("PDF", "pdf", "application/pdf"),
+    ("Image", "png", "image/png"),
+    ("Text", "txt", "text/plain"),
+]
+
+# Google Workspace kinds: tooltip prefix, editor path, MIME type and export formats (the first is the default)
+GOOGLE_KINDS = [
+    ("Google Docs", "document", "application/vnd.google-apps.document", ["docx", "pdf", "odt"]),
+    ("Google Sheets", "spreadsheets", "application/vnd.google-apps.spreadsheet", ["xlsx", "csv", "pdf"]),
+    ("Google Slides", "presentation", "application/vnd.google-apps.presentation", ["pptx", "pdf"]),
+]
+
+FORMAT_LABELS = {
+    "docx": "Microsoft Word (.docx)", "odt": "OpenDocument Format (.odt)", "pdf": "PDF Document (.pdf)",
+    "xlsx": "Microsoft Excel (.xlsx)", "csv": "Comma Separated Values (.csv)", "pptx": "Microsoft PowerPoint (.pptx)",
+}
+
+ROW_HEIGHT = 28 # Pixels; fixed so the virtualized list can compute its window from scrollTop
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%TITLE% - Google Drive</title>
+<style>
+  [role=row] { display: flex; gap: 2em; padding: 4px; height: %ROW_HEIGHT%px; box-sizing: border-box; }
+  [role=row].selected { background: #e8f0fe; }
+  #grid.virtual { height: 600px; overflow-y: auto; }
+  #ctx { position: absolute; display: none; background: #fff; border: 1px solid #999; }
+  #ctx [role=menuitem].active { background: #ddd; }
+</style></head>
+<body>
+<div role="navigation">
+  <div data-tooltip="My Drive" aria-label="My Drive"><a href="/drive/my-drive">My Drive</a></div>
+  <div data-tooltip="Shared with me" aria-label="Shared with me">Shared with me</div>
+</div>
+<div role="main">
+  <div data-tooltip="Sort direction" aria-label="Sort direction">&uarr;</div>
+  <div role="grid" id="grid"><div id="pad-top"></div><div id="pad-bottom"></div></div>
+</div>
+<div id="ctx" role="menu"><div role="menuitem" data-action="download">Download</div></div>
+<script>
+  const ITEMS = %ITEMS%;
+  const CONFIG = %CONFIG%;
+  const grid = document.getElementById("grid");
+  const padTop = document.getElementById("pad-top"), padBottom = document.getElementById("pad-bottom");
+  const ctx = document.getElementById("ctx");
+  const selected = new Set();
+  const rendered = new Map(); // item ID -> row element; rows that stay in the window keep their element
+  let loaded = CONFIG.virtualize ? Math.min(ITEMS.length, CONFIG.virtualize * 2) : ITEMS.length;
+  let loading = false, ctxTarget = null, ctxIndex = -1;
+  if (CONFIG.virtualize) grid.classList.add("virtual");
+
+  function cell(text) {
+    const el = document.createElement("div");
+    el.setAttribute("role", "gridcell"); el.textContent = text;
+    return el;
+  }
+  function renderRow(item) {
+    const row = document.createElement("div");
+    row.setAttribute("role", "row"); row.dataset.id = item.id;
+    if (item.href) row.dataset.href = item.href;
+    if (item.editor) row.dataset.editor = item.editor;
+    row.classList.toggle("selected", selected.has(item.id));
+    const icon = document.createElement("img");
+    icon.src = "/icons/16/type/" + item.mime; icon.alt = ""; icon.width = 16; icon.height = 16;
+    const name = document.createElement("div");
+    name.dataset.tooltip = item.tooltip; name.setAttribute("aria-label", item.label); name.tabIndex = 0;
+    name.textContent = item.name;
+    row.append(icon, name, cell(item.modified), cell(item.size));
+    return row;
+  }
+  function render() {
+    const first = CONFIG.virtualize ? Math.max(0, Math.floor(grid.scrollTop / CONFIG.rowHeight) - 5) : 0;
+    const last = CONFIG.virtualize ? Math.min(loaded, first + CONFIG.virtualize) : loaded;
+    const wanted = ITEMS.slice(first, last);
+    const wantedIds = new Set(wanted.map(item => item.id));
+    for (const [id, row] of rendered) {
+      if (!wantedIds.has(id)) { row.remove(); rendered.delete(id); }
+    }
+    let previous = padTop;
+    for (const item of wanted) {
+      let row = rendered.get(item.id);
+      if (!row) { row = renderRow(item); rendered.set(item.id, row); }
+      if (previous.nextSibling !== row) previous.after(row);
+      previous = row;
+    }
+    padTop.style.height = first * CONFIG.rowHeight + "px";
+    padBottom.style.height = (loaded - last) * CONFIG.rowHeight + "px";
+    // Like Drive, fetch the next page of items once the list is scrolled to the bottom
+    if (loaded < ITEMS.length && !loading && grid.scrollTop + grid.clientHeight >= grid.scrollHeight - CONFIG.rowHeight) {
+      loading = true;
+      setTimeout(() => { loaded = Math.min(ITEMS.length, loaded + CONFIG.virtualize); loading = false; render(); },
+                 CONFIG.lazyDelay);
+    }
+  }
+  grid.addEventListener("scroll", render);
+  render();
+
+  function rowOf(ev) {
+    const el = ev.target.closest("[role=row] [data-tooltip]");
+    return el ? el.closest("[role=row]") : null;
+  }
+  function setSelected(id, on) {
+    if (on) selected.add(id); else selected.delete(id);
+    const row = rendered.get(id);
+    if (row) row.classList.toggle("selected", on);
+  }
+  function clearSelection() { Array.from(selected).forEach(id => setSelected(id, false)); }
+  function closeMenu() { ctx.style.display = "none"; ctxTarget = null; ctxIndex = -1; }
+
+  grid.addEventListener("click", ev => {
+    const row = rowOf(ev);
+    if (!row) return;
+    if (ev.ctrlKey || ev.metaKey) { setSelected(row.dataset.id, !selected.has(row.dataset.id)); return; }
+    clearSelection();
+    setSelected(row.dataset.id, true);
+  });
+  grid.addEventListener("dblclick", ev => {
+    const row = rowOf(ev);
+    if (!row) return;
+    if (row.dataset.href) window.location.href = row.dataset.href;
+    else if (row.dataset.editor) window.open(row.dataset.editor, "_blank"); // Drive opens editors in a new tab
+  });
+  grid.addEventListener("contextmenu", ev => {
+    const row = rowOf(ev);
+    if (!row) return;
+    ev.preventDefault();
+    ctxTarget = row.dataset.id;
+    if (!selected.has(ctxTarget)) { clearSelection(); setSelected(ctxTarget, true); }
+    ctx.style.left = ev.pageX + "px"; ctx.style.top = ev.pageY + "px";
+    ctx.style.display = "block";
+  });
+  document.addEventListener("keydown", ev => {
+    if (ev.key === "Escape") { closeMenu(); clearSelection(); return; }
+    if (!ctxTarget) return;
+    const entries = ctx.querySelectorAll("[role=menuitem]");
+    if (ev.key === "ArrowDown") {
+      ctxIndex = Math.min(ctxIndex + 1, entries.length - 1);
+      entries.forEach((e, i) => e.classList.toggle("active", i === ctxIndex));
+    } else if (ev.key === "Enter" && ctxIndex >= 0) {
+      const ids = Array.from(selected);
+      const a = document.createElement("a");
+      a.href = ids.length > 1 ? "/download-zip?ids=" + ids.join(",") : "/download/" + ctxTarget;
+      document.body.appendChild(a); a.click(); a.remove();
+      closeMenu();
+    }
+  });
+  document.addEventListener("click", closeMenu);
+</script>
+</body></html>
+"""
+
+EDITOR_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%TITLE% - %APP%</title>
+<style>
+  .menu { position: absolute; display: none; background: #fff; border: 1px solid #999; }
+  .menu.open { display: block; }
+  .goog-menuitem-highlight { background: #ddd; }
+</style></head>
+<body>
+<div id="docs-menubar"><div id="docs-file-menu" role="menuitem" aria-label="File">File</div></div>
+<div id="title"></div>
+<div id="file-menu" class="menu" role="menu">
+  <div role="menuitem" class="goog-menuitem" id="download-item"><span>Download</span></div>
+</div>
+<div id="download-menu" class="menu" role="menu">
+%FORMATS%
+</div>
+<script>
+  const CONFIG = %CONFIG%;
+  const fileMenu = document.getElementById("file-menu"), downloadMenu = document.getElementById("download-menu");
+  let highlighted = -1;
+  function closeMenus() { fileMenu.classList.remove("open"); downloadMenu.classList.remove("open"); highlighted = -1; }
+  // The title element the crawler waits for only appears once the "editor" has loaded
+  setTimeout(() => {
+    const title = document.createElement("div");
+    title.className = "docs-title-inner"; title.textContent = CONFIG.title;
+    document.getElementById("title").appendChild(title);
+  }, CONFIG.editorDelay);
+  document.getElementById("docs-file-menu").addEventListener("click", ev => {
+    ev.stopPropagation(); fileMenu.classList.add("open");
+  });
+  document.getElementById("download-item").addEventListener("click", ev => {
+    ev.stopPropagation(); downloadMenu.classList.add("open"); downloadMenu.style.left = "200px";
+  });
+  function startExport(entry) {
+    const a = document.createElement("a");
+    a.href = entry.dataset.href;
+    document.body.appendChild(a); a.click(); a.remove();
+    closeMenus();
+  }
+  downloadMenu.querySelectorAll("[role=menuitem]").forEach(entry => entry.addEventListener("click", ev => {
+    ev.stopPropagation(); startExport(entry);
+  }));
+  document.addEventListener("click", closeMenus);
+  document.addEventListener("keydown", ev => {
+    if (!downloadMenu.classList.contains("open")) return;
+    const entries = downloadMenu.querySelectorAll("[role=menuitem]");
+    if (ev.key === "ArrowDown") {
+      highlighted = Math.min(highlighted + 1, entries.length - 1);
+      entries.forEach((e, i) => e.classList.toggle("goog-menuitem-highlight", i === highlighted));
+    } else if (ev.key === "Enter" && highlighted >= 0) {
+      startExport(entries[highlighted]);
+    } else if (ev.key === "Escape") {
+      closeMenus();
+    }
+  });
+</script>
+</body></html>
+"""
+
+def build_tree(depth, fanout, files_per_folder, file_size, seed=0, docs_per_folder=0):
+    """
+    Generates a deterministic synthetic tree.
+    Returns a dict of node ID -> node dict; the root node has ID "my-drive".
+    Every folder gets files_per_folder plain files and docs_per_folder Docs/Sheets/Slides (in turn).
+    """
+    rng = random.Random(seed)
+    nodes = {}
+    counter = [0]
+
+    def new_id(prefix):
+        counter[0] += 1
+        return f"{prefix}{counter[0]:06d}"
+
+    def add_folder(folder_id, name, level):
+        node = {"id": folder_id, "name": name, "kind": "folder", "children": []}
+        nodes[folder_id] = node
+        # Item names must not contain SYSTEM_UI_ELEMENTS_TO_SKIP words such as "my drive"
+        prefix = name if level else "Root"
+        for file_idx in range(files_per_folder):
+            tooltip_kind, ext, mime = FILE_KINDS[file_idx % len(FILE_KINDS)]
+            file_id = new_id("file")
+            nodes[file_id] = {
+                "id": file_id,
+                "name": f"{prefix} file {file_idx}.{ext}",
+                "kind": "file",
+                "tooltip_kind": tooltip_kind,
+                "mime": mime,
+                "size": max(1, int(file_size * rng.uniform(0.5, 1.5))),
+            }
+            node["children"].append(file_id)
+        for doc_idx in range(docs_per_folder):
+            tooltip_kind, editor, mime, formats = GOOGLE_KINDS[doc_idx % len(GOOGLE_KINDS)]
+            doc_id = new_id("doc")
+            nodes[doc_id] = {
+                "id": doc_id,
+                "name": f"{prefix} {editor} {doc_idx}",
+                "kind": "file",
+                "tooltip_kind": tooltip_kind,
+                "mime": mime,
+                "editor": editor,
+                "formats": formats,
+                "size": max(1, int(file_size * rng.uniform(0.5, 1.5))),
+            }
+            node["children"].append(doc_id)
+        if level < depth:
+            for sub_idx in range(fanout):
+                sub_id = new_id("fold")
+                add_folder(sub_id, f"{name} {sub_idx}" if level else f"Folder {sub_idx}", level + 1)
+                node["children"].append(sub_id)
+        return node
+
+    add_folder("my-drive", "My Drive", 0)
+    return nodes
+
+def editor_path(node):
+    return f"/{node['editor']}/d/{node['id']}/edit"
+
+def export_path(node, export_format):
+    """Export URL of one format, in the shape http_engine.stand_in_urls uses"""
+    if node["editor"] == "presentation":
+        return f"/presentation/d/{node['id']}/export/{export_format}"
+    return f"/{node['editor']}/d/{node['id']}/export?format={export_format}"
+
+def row_item(node):
+    """What the folder page script needs to render the node's row"""
+    item = {"id": node["id"], "name": node["name"], "modified": "Jan 1, 2025",
+            "mime": node.get("mime", "application/vnd.google-apps.folder")}
+    if node["kind"] == "folder":
+        item["tooltip"] = item["label"] = f"Google Drive Folder: {node['name']}"
+        item["href"] = f"/drive/folders/{node['id']}"
+        item["size"] = "—"
+    else:
+        item["tooltip"] = f"{node['tooltip_kind']}: {node['name']}"
+        item["label"] = node["name"]
+        if node.get("editor"):
+            item["editor"] = editor_path(node)
+            item["size"] = "—" # Drive shows no size for Workspace files
+        else:
+            item["size"] = f"{node['size']} bytes"
+    return item
+
+def script_json(value):
+    """JSON that is safe to embed in a <script> element"""
+    return json.dumps(value).replace("</", "<\\/")
+
+def render_folder(nodes, folder_id, virtualize=0, lazy_delay=0.0):
+    folder = nodes[folder_id]
+    items = [row_item(nodes[child_id]) for child_id in folder["children"]]
+    config = {"virtualize": virtualize, "lazyDelay": int(lazy_delay * 1000), "rowHeight": ROW_HEIGHT}
+    return (PAGE_TEMPLATE.replace("%TITLE%", html.escape(folder["name"]))
+            .replace("%ROW_HEIGHT%", str(ROW_HEIGHT))
+            .replace("%ITEMS%", script_json(items))
+            .replace("%CONFIG%", script_json(config)))
+
+def render_editor(node, editor_delay=0.0):
+    formats = "\n".join(
+        f'  <div role="menuitem" class="goog-menuitem" data-href="{html.escape(export_path(node, f), quote=True)}">'
+        f'<span>{html.escape(FORMAT_LABELS[f])}</span></div>'
+        for f in node["formats"])
+    config = {"title": node["name"], "editorDelay": int(editor_delay * 1000)}
+    return (EDITOR_TEMPLATE.replace("%TITLE%", html.escape(node["name"]))
+            .replace("%APP%", node["tooltip_kind"])
+            .replace("%FORMATS%", formats)
+            .replace("%CONFIG%", script_json(config)))
+
+def blob_bytes(node):
+    """Deterministic file content of the node's size"""
+    pattern = f"{node['id']}:{node['name']}\n".encode()
+    repeats = node["size"] // len(pattern) + 1
+    return (pattern * repeats)[:node["size"]]
+
+SESSION_COOKIE = "SID=fake-drive-session"
+
+FOLDER_PATH_RE = re.compile(r"^/drive/(?:my-drive|folders/([\w-]+))/?$")
+DOWNLOAD_PATH_RE = re.compile(r"^/download/([\w-]+)$")
+EDITOR_PATH_RE = re.compile(r"^/(?:document|spreadsheets|presentation)/d/([\w-]+)/edit$")
+# Export endpoints, mirroring http_engine.stand_in_urls; the second group is the format when it is in the path
+EXPORT_PATH_RES = [
+    re.compile(r"^/document/d/([\w-]+)/export()$"),
+    re.compile(r"^/spreadsheets/d/([\w-]+)/export()$"),
+    re.compile(r"^/presentation/d/([\w-]+)/export/(\w+)$"),
+]
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    # Replaced per server in make_server
+    nodes = {}
+    latency = 0.0
+    virtualize = 0
+    lazy_delay = 0.0
+    editor_delay = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path, _, query = self.path.partition("?")
+        params = parse_qs(query)
+        folder_match = FOLDER_PATH_RE.match(path)
+        if folder_match:
+            folder_id = folder_match.group(1) or "my-drive"
+            node = self.nodes.get(folder_id)
+            if not node or node["kind"] != "folder":
+                return self.send_error(404)
+            page = render_folder(self.nodes, folder_id, self.virtualize, self.lazy_delay)
+            return self.send_body(page.encode(), "text/html; charset=utf-8",
+                                  {"Set-Cookie": f"{SESSION_COOKIE}; Path=/; HttpOnly"})
+        editor_match = EDITOR_PATH_RE.match(path)
+        if editor_match:
+            node = self.nodes.get(editor_match.group(1))
+            if not node or not node.get("editor"):
+                return self.send_error(404)
+            return self.send_body(render_editor(node, self.editor_delay).encode(), "text/html; charset=utf-8")
+        download_match = DOWNLOAD_PATH_RE.match(path)
+        if download_match:
+            return self.send_file(download_match.group(1))
+        if path == "/download-zip":
+            return self.send_zip(params.get("ids", [""])[0].split(","))
+        if path == "/download":
+            return self.send_direct(params.get("id", [""])[0])
+        for pattern in EXPORT_PATH_RES:
+            export_match = pattern.match(path)
+            if export_match:
+                export_format = export_match.group(2) or params.get("format", [None])[0]
+                return self.send_direct(export_match.group(1), export_format)
+        self.send_error(404)
+
+    def send_direct(self, item_id, export_format=None):
+        """Direct fetches need the session cookie, as with Google"""
+        if SESSION_COOKIE not in (self.headers.get("Cookie") or ""):
+            # Google sends unauthenticated requests to an HTML login page
+            return self.send_body(b"<html><body>Sign in</body></html>", "text/html; charset=utf-8")
+        return self.send_file(item_id, export_format)
+
+    def send_file(self, item_id, export_format=None):
+        node = self.nodes.get(item_id)
+        if not node or node["kind"] != "file":
+            return self.send_error(404)
+        filename = node["name"]
+        if node.get("editor"):
+            # Workspace files only exist as exports, named after the chosen format
+            filename = f"{node['name']}.{export_format or node['formats'][0]}"
+        return self.send_body(blob_bytes(node), node["mime"],
+                              {"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    def send_zip(self, item_ids):
+        """Several selected files come back as one zip, as in Drive's multi-file download"""
+        files = [self.nodes.get(item_id) for item_id in item_ids]
+        if not files or any(not node or node["kind"] != "file" for node in files):
+            return self.send_error(404)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for node in files:
+                archive.writestr(node["name"], blob_bytes(node))
+        return self.send_body(buffer.getvalue(), "application/zip",
+                              {"Content-Disposition": 'attachment; filename="drive-download-001.zip"'})
+
+    def send_body(self, body, content_type, extra_headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet; the crawler does the talking
+
+def make_server(nodes, host="127.0.0.1", port=0, latency=0.0, virtualize=0, lazy_delay=0.0, editor_delay=0.0):
+    """
+    Creates (but does not start) a fake Drive server; port 0 picks a free port.
+    latency delays every response (seconds). virtualize > 0 keeps only that many rows of a
+    folder in the DOM and loads more lazy_delay seconds after the list reaches its bottom.
+    editor_delay is how long the fake editors take to become ready.
+    """
+    handler = type("BoundFakeDriveHandler", (FakeDriveHandler,), {
+        "nodes": nodes, "latency": latency, "virtualize": virtualize,
+        "lazy_delay": lazy_delay, "editor_delay": editor_delay,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+def start_in_background(nodes, host="127.0.0.1", port=0, **options):
+    """Starts a fake Drive server on a daemon thread and returns (server, base_url); options go to make_server"""
+    server = make_server(nodes, host, port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def add_tree_arguments(parser):
+    """Tree and server options, shared with bench.py"""
+    parser.add_argument("--depth", type=int, default=3, help="Levels of sub-folders below My Drive")
+    parser.add_argument("--fanout", type=int, default=3, help="Sub-folders per folder")
+    parser.add_argument("--files", type=int, default=5, help="Plain files per folder")
+    parser.add_argument("--docs", type=int, default=0, help="Google Docs/Sheets/Slides per folder")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="Average file size in bytes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--virtualize", type=int, default=0,
+                        help="Rows of a folder kept in the DOM; more load when the list is scrolled to the bottom "
+                             "(0: render every row)")
+    parser.add_argument("--lazy-delay", type=float, default=0.3,
+                        help="Seconds until the next rows of a virtualized list appear")
+    parser.add_argument("--editor-delay", type=float, default=0.5, help="Seconds until a fake editor is ready")
+
+def tree_from_args(cli_args):
+    return build_tree(cli_args.depth, cli_args.fanout, cli_args.files, cli_args.file_size, cli_args.seed,
+                      cli_args.docs)
+
+def server_options(cli_args):
+    return {"latency": cli_args.latency, "virtualize": cli_args.virtualize,
+            "lazy_delay": cli_args.lazy_delay, "editor_delay": cli_args.editor_delay}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic Drive-like folder tree for testing clone.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_tree_arguments(parser)
+    cli_args = parser.parse_args()
+
+    tree = tree_from_args(cli_args)
+    folder_count = sum(1 for n in tree.values() if n["kind"] == "folder")
+    print(f"Serving fake Drive with {folder_count} folders and {len(tree) - folder_count} files "
+          f"at http://{cli_args.host}:{cli_args.port}/drive/my-drive")
+    make_server(tree, cli_args.host, cli_args.port, **server_options(cli_args)).serve_forever()
@@ -0,0 +1,266 @@
+"""
+Direct HTTP export/download engine.
+
+Fetches Google Workspace exports and regular file downloads straight from their
+URLs by item ID, authenticated with the cookies of the logged-in browser, instead
+of opening editors and clicking through menus. Connections are kept alive and
+pooled per host, concurrency is bounded by a thread pool and every response is
+streamed to a .part file that is renamed into place once complete. The SHA-256
+of the content is computed while it streams.
+"""
+
+import hashlib
+import http.client
+import os
+import queue
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+# URL templates per item kind; "file" is any non-Google file, the others take an export {format}
+GOOGLE_URLS = {
+    "doc": "https://docs.google.com/document/d/{id}/export?format={format}",
+    "sheet": "https://docs.google.com/spreadsheets/d/{id}/export?format={format}",
+    "slide": "https://docs.google.com/presentation/d/{id}/export/{format}",
+    "file": "https://drive.usercontent.google.com/download?id={id}&export=download&confirm=t",
+}
+DEFAULT_EXPORT_FORMATS = {"doc": "docx", "sheet": "xlsx", "slide": "pptx"}
+
+def stand_in_urls(base_url):
+    """The same endpoints on a local stand-in server such as fake_drive.py"""
+    return {
+        "doc": f"{base_url}/document/d/{{id}}/export?format={{format}}",
+        "sheet": f"{base_url}/spreadsheets/d/{{id}}/export?format={{format}}",
+        "slide": f"{base_url}/presentation/d/{{id}}/export/{{format}}",
+        "file": f"{base_url}/download?id={{id}}&export=download&confirm=t",
+    }
+
+def export_url(url_templates, kind, item_id, export_format=None):
+    """URL of an item in url_templates (GOOGLE_URLS or stand_in_urls), in export_format for Workspace kinds"""
+    return url_templates[kind].format(id=urllib.parse.quote(item_id, safe=""),
+                                      format=export_format or DEFAULT_EXPORT_FORMATS.get(kind, ""))
+
+CHUNK_SIZE = 256 * 1024
+MAX_REDIRECTS = 5
+COOKIE_REFRESH_INTERVAL = 600 # Seconds before cookies are re-read from the browser
+
+class FetchError(Exception):
+    """A direct fetch failed; the message says why"""
+
+def safe_filename(name):
+    """Makes a server-supplied file name safe to use as a single path component"""
+    name = re.sub(r'[\x00-\x1f/\\]', "_", name).strip().strip(".")
+    return name or None
+
+def content_disposition_filename(header):
+    """File name from a Content-Disposition header, preferring the RFC 5987 filename* form"""
+    if not header:
+        return None
+    match = re.search(r"filename\*\s*=\s*([^']*)'[^']*'([^;]+)", header)
+    if match:
+        return urllib.parse.unquote(match.group(2).strip(), encoding=match.group(1) or "utf-8")
+    match = re.search(r'filename\s*=\s*"([^"]*)"', header) or re.search(r"filename\s*=\s*([^;]+)", header)
+    return match.group(1).strip() if match else None
+
+def cookie_matches(cookie, host, path, secure):
+    domain = cookie.get("domain", "")
+    if domain.startswith("."):
+        if not (host == domain[1:] or host.endswith(domain)):
+            return False
+    elif host != domain:
+        return False
+    if not path.startswith(cookie.get("path", "/")):
+        return False
+    return secure or not cookie.get("secure")
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)."""
+
+    def __init__(self, max_idle_per_host=8, timeout=60):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+        try:
+            return idle.get_nowait()
+        except queue.Empty:
+            return self.connect(scheme, host, port)
+
+    def connect(self, scheme, host, port):
+        """A new connection, bypassing the idle ones"""
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+
+    def put(self, scheme, host, port, connection):
+        idle = self._idle[(scheme, host, port)]
+        if idle.qsize() >= self.max_idle_per_host:
+            connection.close()
+        else:
+            idle.put(connection)
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().close()
+
+class HttpFetchEngine:
+    """Fetches exports/downloads by Drive item ID on a bounded pool of background threads."""
+
+    def __init__(self, url_templates=None, max_workers=4):
+        self.url_templates = url_templates or GOOGLE_URLS
+        self.pool = ConnectionPool(max_idle_per_host=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-fetch")
+        self._cookies = []
+        self._cookies_loaded_at = 0
+        self._cookie_lock = threading.Lock()
+        self._futures = []
+        self._futures_lock = threading.Lock()
+
+    # --- cookies ----------------------------------------------------------
+
+    def load_cookies(self, driver):
+        """Copies every cookie (including HttpOnly ones) out of the browser via CDP"""
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+        with self._cookie_lock:
+            self._cookies = cookies
+            self._cookies_loaded_at = time.monotonic()
+        return len(cookies)
+
+    def refresh_cookies_if_stale(self, driver):
+        """Re-reads cookies from the browser when they are older than COOKIE_REFRESH_INTERVAL"""
+        if time.monotonic() - self._cookies_loaded_at >= COOKIE_REFRESH_INTERVAL:
+            self.load_cookies(driver)
+
+    def _cookie_header(self, host, path, secure):
+        with self._cookie_lock:
+            pairs = [f"{c['name']}={c['value']}" for c in self._cookies if cookie_matches(c, host, path, secure)]
+        return "; ".join(pairs)
+
+    # --- fetching ---------------------------------------------------------
+
+    def url_for(self, kind, item_id, export_format=None):
+        return export_url(self.url_templates, kind, item_id, export_format)
+
+    def submit(self, kind, item_id, dest_dir, filename=None, on_done=None, export_format=None):
+        """
+        Queues a fetch and returns immediately with a Future of (path, byte_count, digest).
+        filename fixes the output name; otherwise it comes from Content-Disposition
+        (falling back to the item ID). on_done(path, byte_count, digest, error) runs on
+        the fetch thread when the fetch ends; error is None on success. export_format
+        picks the format of a Docs/Sheets/Slides export (default: DEFAULT_EXPORT_FORMATS).
+        """
+        url = self.url_for(kind, item_id, export_format)
+        future = self._executor.submit(self._fetch_with_callback, url, dest_dir, filename or None, item_id, on_done)
+        with self._futures_lock:
+            if len(self._futures) >= 1000:
+                self._futures = [f for f in self._futures if not f.done()]
+            self._futures.append(future)
+        return future
+
+    def _fetch_with_callback(self, url, dest_dir, filename, fallback_name, on_done):
+        try:
+            path, byte_count, digest = self.fetch_to_file(url, dest_dir, filename, fallback_name)
+        except Exception as e:
+            if on_done:
+                on_done(None, 0, None, f"{e.__class__.__name__}: {e}")
+            raise
+        if on_done:
+            on_done(path, byte_count, digest, None)
+        return path, byte_count, digest
+
+    def fetch_to_file(self, url, dest_dir, filename=None, fallback_name="download"):
+        """Fetches url (following redirects) and streams the body to dest_dir; returns (path, byte_count, sha256 hex)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parsed = urllib.parse.urlsplit(url)
+            scheme = parsed.scheme
+            port = parsed.port or (443 if scheme == "https" else 80)
+            path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+            connection, response = self._request(scheme, parsed.hostname, port, path)
+            try:
+                if response.status in (301, 302, 303, 307, 308):
+                    location = response.getheader("Location")
+                    response.read()
+                    if not location:
+                        raise FetchError(f"HTTP {response.status} without Location for {url}")
+                    url = urllib.parse.urljoin(url, location)
+                    continue
+                if response.status != 200:
+                    response.read()
+                    raise FetchError(f"HTTP {response.status} for {url}")
+                disposition = response.getheader("Content-Disposition")
+                if not disposition and (response.getheader("Content-Type") or "").startswith("text/html"):
+                    # Google answers with a login or interstitial page instead of the file
+                    response.read()
+                    raise FetchError(f"Got an HTML page instead of a file for {url} (session expired?)")
+                name = filename or safe_filename(content_disposition_filename(disposition) or "") or fallback_name
+                return self._stream_to_disk(response, os.path.join(dest_dir, name))
+            finally:
+                if response.isclosed() and not response.will_close:
+                    self.pool.put(scheme, parsed.hostname, port, connection)
+                else:
+                    connection.close()
+        raise FetchError(f"Too many redirects for {url}")
+
+    def _request(self, scheme, host, port, path):
+        headers = {"Connection": "keep-alive", "Accept-Encoding": "identity"}
+        cookie_header = self._cookie_header(host, urllib.parse.urlsplit(path).path, scheme == "https")
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+        for attempt in (1, 2):
+            # The retry must not take another idle connection, which may be just as stale
+            connection = self.pool.get(scheme, host, port) if attempt == 1 else self.pool.connect(scheme, host, port)
+            try:
+                connection.request("GET", path, headers=headers)
+                return connection, connection.getresponse()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                connection.close()
+                if attempt == 2:
+                    raise
+                # A pooled keep-alive connection may have been closed by the server; retry on a fresh one
+
+    def _stream_to_disk(self, response, out_path):
+        part_path = out_path + ".part"
+        byte_count = 0
+        digest = hashlib.sha256()
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        try:
+            with open(part_path, "wb") as out:
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    digest.update(chunk)
+                    byte_count += len(chunk)
+            expected = response.getheader("Content-Length")
+            if expected is not None and int(expected) != byte_count:
+                raise FetchError(f"Truncated response: {byte_count} of {expected} bytes")
+            os.replace(part_path, out_path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return out_path, byte_count, digest.hexdigest()
+
+    def wait(self):
+        """Blocks until every submitted fetch has finished"""
+        with self._futures_lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass # Already reported through on_done
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+        self.pool.close()
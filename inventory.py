@@ -0,0 +1,180 @@
+"""
+Inventory totals, runtime projection and scheduling of the real run.
+
+An --inventory run walks the tree without fetching anything, so the manifest
+ends up listing every folder and file with its size. This module sums the
+manifest up per subtree and projects how long the backup will take from
+per-item costs: folder scans as measured by the inventory itself, exports,
+downloads and transfer rates as measured by earlier runs in the trace file
+(defaults where there are too few samples yet).
+
+The same numbers order a scheduled run: priority paths first, then the most
+expensive folders, so no worker is left alone with one huge folder at the end,
+and inside a folder slow exports are interleaved with cheap downloads.
+"""
+
+import json
+import os
+import statistics
+
+EXPORT_PREFIXES = ("Google Docs:", "Google Sheets:", "Google Slides:")
+DEFAULT_COSTS = {
+    "folder": 3.0, # Seconds to open and scan a folder view
+    "export": 10.0, # Seconds until an export's download has started
+    "download": 2.0, # Seconds until a file's download has started
+    "bytes_per_second": 5 * 1024 * 1024,
+}
+MIN_SAMPLES = 5 # Samples of a phase needed before its measured cost replaces the default
+KIND_FIELDS = {"export": "exports", "download": "downloads", "other": "other"}
+
+def file_kind(tooltip):
+    """"export" (Docs/Sheets/Slides), "other" (Forms, Drawings, Sites) or "download" (any other file)"""
+    tooltip = tooltip or ""
+    if tooltip.startswith(EXPORT_PREFIXES):
+        return "export"
+    if tooltip.startswith("Google ") and not tooltip.startswith("Google Drive"):
+        return "other"
+    return "download"
+
+def measured_costs(trace_path):
+    """
+    Per-item costs (see DEFAULT_COSTS) from the median folder/export/download spans of a
+    trace file and the transfer rate of the downloads and fetches it recorded. Only folder
+    spans of inventory runs count, as those of real runs include fetching the files.
+    """
+    samples = {"folder": [], "export": [], "download": []}
+    transferred = transfer_seconds = 0.0
+    if trace_path and os.path.exists(trace_path):
+        with open(trace_path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # A line cut short by an interrupted run
+                phase = record.get("phase")
+                if phase == "folder" and not record.get("inventory"):
+                    continue
+                if phase in samples:
+                    samples[phase].append(record.get("duration", 0.0))
+                elif phase in ("download_complete", "fetch") and record.get("bytes"):
+                    transferred += record["bytes"]
+                    transfer_seconds += record.get("duration", 0.0)
+    costs = dict(DEFAULT_COSTS)
+    for phase, values in samples.items():
+        if len(values) >= MIN_SAMPLES:
+            costs[phase] = statistics.median(values)
+    if transferred and transfer_seconds:
+        costs["bytes_per_second"] = transferred / transfer_seconds
+    return costs
+
+def new_totals():
+    return {"folders": 0, "files": 0, "exports": 0, "downloads": 0, "other": 0, "bytes": 0,
+            "unknown_sizes": 0, "pending_files": 0, "own_seconds": 0.0, "seconds": 0.0}
+
+def subtree_totals(manifest, costs):
+    """
+    Folder ID -> totals of the folder and everything below it (see new_totals). "seconds" is the
+    projected time for the files not done yet; "own_seconds" the part of the folder itself.
+    Returns (totals by folder ID, folder rows of the manifest).
+    """
+    folders = manifest.folder_rows()
+    totals = {}
+    for folder in folders:
+        totals[folder["id"]] = new_totals()
+        totals[folder["id"]]["folders"] = 1
+        totals[folder["id"]]["own_seconds"] = costs["folder"]
+    for row in manifest.file_rows():
+        folder_totals = totals.get(row["folder_id"])
+        if folder_totals is None:
+            continue
+        kind = file_kind(row["tooltip"])
+        folder_totals["files"] += 1
+        folder_totals[KIND_FIELDS[kind]] += 1
+        if row["size"] is None:
+            folder_totals["unknown_sizes"] += 1 # Google files show no size in the list
+        else:
+            folder_totals["bytes"] += row["size"]
+        if row["status"] != "done":
+            folder_totals["pending_files"] += 1
+            folder_totals["own_seconds"] += costs["export" if kind == "export" else "download"]
+            folder_totals["own_seconds"] += (row["size"] or 0) / costs["bytes_per_second"]
+    for folder_totals in totals.values():
+        folder_totals["seconds"] = folder_totals["own_seconds"]
+    # Deepest first, so each folder is complete before it is added to its parent
+    for folder in sorted(folders, key=lambda f: f["depth"], reverse=True):
+        parent_totals = totals.get(folder["parent_id"])
+        if parent_totals is None:
+            continue
+        for field, value in totals[folder["id"]].items():
+            if field != "own_seconds":
+                parent_totals[field] += value
+    return totals, folders
+
+def write_report(path, manifest, costs, workers, root):
+    """
+    Writes the per-subtree totals as JSON and returns (totals of the whole tree, projected seconds).
+    The projection divides the work by the number of browser sessions, which assumes they stay busy.
+    """
+    totals, folders = subtree_totals(manifest, costs)
+    tops = [f for f in folders if f["parent_id"] is None]
+    overall = new_totals()
+    for folder in tops:
+        for field, value in totals[folder["id"]].items():
+            overall[field] += value
+    projected = overall["seconds"] / max(1, workers)
+    report = {
+        "costs": costs,
+        "workers": workers,
+        "projected_seconds": round(projected),
+        "totals": overall,
+        "subtrees": [
+            dict(totals[f["id"]], id=f["id"], path=os.path.relpath(f["path"], root), depth=f["depth"])
+            for f in sorted(folders, key=lambda f: f["path"])
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=1)
+    return overall, projected
+
+def largest_subtrees(manifest, costs, count=10):
+    """(projected seconds, path, totals) of the subtrees with the most work, below the top level"""
+    totals, folders = subtree_totals(manifest, costs)
+    ranked = [(totals[f["id"]]["seconds"], f["path"], totals[f["id"]]) for f in folders if f["parent_id"] is not None]
+    return sorted(ranked, key=lambda entry: entry[0], reverse=True)[:count]
+
+def is_priority(path, root, priority_paths):
+    """True if path is one of priority_paths (relative to root) or below one"""
+    relative = os.path.relpath(path, root)
+    for prefix in priority_paths:
+        prefix = os.path.normpath(prefix.strip("/"))
+        if relative == prefix or relative.startswith(prefix + os.sep):
+            return True
+    return False
+
+def schedule_folders(rows, manifest, costs, root, priority_paths=()):
+    """
+    Orders folder rows (with id and path) for a LIFO frontier, which takes the last one first:
+    priority paths come out first, then the folders with the most work of their own.
+    """
+    totals, _ = subtree_totals(manifest, costs)
+
+    def weight(row):
+        own = totals.get(row["id"], {}).get("own_seconds", costs["folder"])
+        return (is_priority(row["path"], root, priority_paths), own)
+    return sorted(rows, key=weight)
+
+def interleave_exports(work, is_export, costs):
+    """
+    Orders a folder's files so each slow export is followed by roughly as many cheap files
+    as fit in its time, instead of all exports back to back.
+    """
+    per_export = max(1, round(costs["export"] / max(costs["download"], 0.1)))
+    exports = [entry for entry in work if is_export(entry)]
+    others = [entry for entry in work if not is_export(entry)]
+    ordered = []
+    while exports or others:
+        if exports:
+            ordered.append(exports.pop(0))
+        ordered.extend(others[:per_export])
+        others = others[per_export:]
+    return ordered
@@ -0,0 +1,313 @@
+"""
+On-disk crawl manifest (SQLite) keyed by Drive item ID.
+
+Records the scan state of every folder and the status of every file so that an
+interrupted backup can resume from its frontier instead of starting again at
+My Drive. Failed files waiting for another attempt are kept in a retries table
+(see retry_queue.py). Updates are buffered in memory, coalesced per item and written in
+batched transactions; reads see buffered updates immediately.
+
+With a root, folder and file paths are stored relative to it (as in
+work_queue.py), so hosts sharing one manifest may keep their backups in
+different places; each reads them back joined with its own root.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+FOLDER_STATES = ("pending", "scanning", "done", "failed")
+FILE_STATES = ("pending", "started", "done", "failed")
+RETRY_STATES = ("waiting", "done", "exhausted")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    path TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    item_count INTEGER,
+    modified TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    folder_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tooltip TEXT,
+    path TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    size INTEGER,
+    modified TEXT,
+    bytes INTEGER,
+    digest TEXT,
+    attrs TEXT,
+    error TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS retries (
+    id TEXT PRIMARY KEY,
+    reason TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL,
+    state TEXT NOT NULL DEFAULT 'waiting',
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS files_folder_status ON files (folder_id, status);
+CREATE INDEX IF NOT EXISTS folders_state ON folders (state);
+CREATE INDEX IF NOT EXISTS folders_parent ON folders (parent_id);
+CREATE INDEX IF NOT EXISTS retries_due ON retries (state, next_attempt);
+"""
+
+# Columns added after the first manifest version; older manifest files get them on open
+ADDED_COLUMNS = {
+    "folders": [("modified", "TEXT")],
+    "files": [("modified", "TEXT"), ("digest", "TEXT"), ("attrs", "TEXT")],
+}
+
+def file_key(item_attrs, folder_id):
+    """Manifest key of a harvested file: its Drive ID, or folder ID + name when the view had no ID"""
+    return item_attrs["id"] or f"{folder_id}:{item_attrs['clean_name']}"
+
+class CrawlManifest:
+    """Thread-safe, batch-writing manifest shared by all crawl workers."""
+
+    def __init__(self, db_path, batch_size=200, flush_interval=5.0, shared=False, root=None):
+        self.db_path = db_path
+        self.root = root
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # The timeout lets hosts sharing the manifest through a work queue (see work_queue.py) wait out each other's writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if shared:
+            # Several hosts use the file through a work queue; WAL does not work across hosts (see work_queue.py)
+            self._conn.execute("PRAGMA journal_mode=TRUNCATE")
+        else:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.RLock()
+        self._buffer = {} # (table, id) -> column values, merged until the next flush
+        self._last_flush = time.monotonic()
+
+    def _migrate(self):
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if not existing:
+                continue # Fresh database; SCHEMA creates the table with every column
+            for column, column_type in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def _stored_path(self, path):
+        return os.path.relpath(path, self.root) if self.root and path else path
+
+    def _local_path(self, path):
+        # Absolute paths of manifests written before the root was stored relative stay as they are
+        return os.path.normpath(os.path.join(self.root, path)) if self.root and path else path
+
+    # --- writes -----------------------------------------------------------
+
+    def _update(self, table, row_id, **values):
+        values["updated_at"] = time.time()
+        with self._lock:
+            self._buffer.setdefault((table, row_id), {}).update(values)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Writes all buffered updates in one transaction"""
+        with self._lock:
+            if not self._buffer:
+                self._last_flush = time.monotonic()
+                return
+            with self._conn: # commits, or rolls back on error
+                for (table, row_id), values in self._buffer.items():
+                    # Partial updates of existing rows must not go through INSERT, which checks NOT NULL columns first
+                    assignments = ", ".join(f"{c} = ?" for c in values)
+                    cursor = self._conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?",
+                                                list(values.values()) + [row_id])
+                    if cursor.rowcount == 0:
+                        columns = ["id"] + list(values)
+                        placeholders = ", ".join("?" for _ in columns)
+                        self._conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                                           [row_id] + list(values.values()))
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+
+    def add_folder(self, folder, parent_id=None):
+        """Records a newly discovered folder (a frontier entry) as pending"""
+        self._update("folders", folder["id"], parent_id=parent_id, path=self._stored_path(folder["path"]),
+                     depth=folder["depth"], state="pending")
+
+    def set_folder_state(self, folder_id, state, item_count=None, modified=None):
+        """Updates a folder's scan state; the modified stamp should only be stored once the folder is done"""
+        values = {"state": state}
+        if item_count is not None:
+            values["item_count"] = item_count
+        if modified is not None:
+            values["modified"] = modified
+        self._update("folders", folder_id, **values)
+
+    def add_file(self, key, folder_id, item_attrs, path):
+        """
+        Records a harvested file with its current modified stamp and size; keeps its previous status.
+        The harvested attributes are kept as JSON so a later retry can find the item again.
+        """
+        values = {"folder_id": folder_id, "name": item_attrs["clean_name"], "tooltip": item_attrs["tooltip"],
+                  "path": self._stored_path(path), "size": item_attrs.get("size"), "modified": item_attrs.get("modified"),
+                  "attrs": json.dumps(item_attrs)}
+        if self.file_status(key) is None:
+            values["status"] = "pending"
+        self._update("files", key, **values)
+
+    def set_file_status(self, key, status, error=None, byte_count=None, path=None, digest=None):
+        values = {"status": status, "error": error}
+        if byte_count is not None:
+            values["bytes"] = byte_count
+        if path is not None:
+            values["path"] = self._stored_path(path)
+        if digest is not None:
+            values["digest"] = digest
+        self._update("files", key, **values)
+
+    def set_file_digest(self, key, digest):
+        """Records the content-store digest of a file that was hashed after it finished"""
+        self._update("files", key, digest=digest)
+
+    def set_retry(self, key, reason, attempts, next_attempt, state="waiting"):
+        """Schedules (or closes) a retry of a file; None leaves reason, attempts and next_attempt as they are"""
+        values = {"state": state}
+        if reason is not None:
+            values["reason"] = reason
+        if attempts is not None:
+            values["attempts"] = attempts
+        if next_attempt is not None:
+            values["next_attempt"] = next_attempt
+        self._update("retries", key, **values)
+
+    # --- reads ------------------------------------------------------------
+
+    def _lookup(self, table, row_id, column):
+        with self._lock:
+            buffered = self._buffer.get((table, row_id))
+            if buffered and column in buffered:
+                return buffered[column]
+            row = self._conn.execute(f"SELECT {column} FROM {table} WHERE id = ?", (row_id,)).fetchone()
+            return row[0] if row else None
+
+    def _record(self, table, row_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+            buffered = self._buffer.get((table, row_id))
+            if row is None and buffered is None:
+                return None
+            record = dict(row) if row else {}
+            record.update(buffered or {})
+            if "path" in record:
+                record["path"] = self._local_path(record["path"])
+            return record
+
+    def folder_state(self, folder_id):
+        return self._lookup("folders", folder_id, "state")
+
+    def folder_record(self, folder_id):
+        """All stored columns of a folder (buffered updates included), or None"""
+        return self._record("folders", folder_id)
+
+    def file_status(self, key):
+        return self._lookup("files", key, "status")
+
+    def file_record(self, key):
+        """All stored columns of a file (buffered updates included), or None"""
+        return self._record("files", key)
+
+    def retry_record(self, key):
+        """The retries row of a file (buffered updates included), or None if it never failed"""
+        return self._record("retries", key)
+
+    def due_retries(self, now):
+        """
+        Waiting retries whose time has come, grouped by folder: each row has the file's id,
+        reason, attempts, folder_id and attrs (the harvested attributes as a dict).
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT retries.id, retries.reason, retries.attempts, files.folder_id, files.attrs "
+                "FROM retries JOIN files ON files.id = retries.id "
+                "WHERE retries.state = 'waiting' AND retries.next_attempt <= ? "
+                "ORDER BY files.folder_id, retries.next_attempt", (now,)).fetchall()
+        return [dict(row, attrs=json.loads(row["attrs"]) if row["attrs"] else None) for row in rows]
+
+    def next_retry_time(self):
+        """Earliest next_attempt of the waiting retries, or None if none is waiting"""
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT MIN(next_attempt) FROM retries WHERE state = 'waiting'").fetchone()[0]
+
+    def subtree_complete(self, folder_id):
+        """True if the folder and every folder and file recorded below it are done"""
+        with self._lock:
+            self.flush()
+            row = self._conn.execute(
+                "WITH RECURSIVE subtree(id) AS ("
+                "  SELECT ? UNION ALL SELECT folders.id FROM folders JOIN subtree ON folders.parent_id = subtree.id"
+                ") "
+                "SELECT EXISTS (SELECT 1 FROM folders WHERE id IN subtree AND state != 'done') "
+                "OR EXISTS (SELECT 1 FROM files WHERE folder_id IN subtree AND status != 'done') "
+                "OR NOT EXISTS (SELECT 1 FROM folders WHERE id = ?)",
+                (folder_id, folder_id)).fetchone()
+            return not row[0]
+
+    def resume_frontier(self):
+        """
+        Folders that still need a visit: every folder not marked done, plus done
+        folders that own a file which never finished. Returned as frontier entry
+        fields (id, path, depth), shallowest first.
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT id, path, depth FROM folders WHERE state != 'done' "
+                "OR id IN (SELECT DISTINCT folder_id FROM files WHERE status != 'done') "
+                "ORDER BY depth").fetchall()
+            return [dict(row, path=self._local_path(row["path"])) for row in rows]
+
+    def folder_rows(self):
+        """id, parent_id, path, depth and state of every folder"""
+        with self._lock:
+            self.flush()
+            return [dict(row, path=self._local_path(row["path"]))
+                    for row in self._conn.execute("SELECT id, parent_id, path, depth, state FROM folders")]
+
+    def file_rows(self):
+        """folder_id, tooltip, size and status of every file"""
+        with self._lock:
+            self.flush()
+            return [dict(row) for row in self._conn.execute("SELECT folder_id, tooltip, size, status FROM files")]
+
+    def is_empty(self):
+        with self._lock:
+            return not self._buffer and self._conn.execute("SELECT 1 FROM folders LIMIT 1").fetchone() is None
+
+    def counts(self):
+        """Per-state folder and file counts, e.g. {"folders": {"done": 3}, "files": {"done": 40}}"""
+        with self._lock:
+            self.flush()
+            return {
+                "folders": dict(self._conn.execute("SELECT state, COUNT(*) FROM folders GROUP BY state").fetchall()),
+                "files": dict(self._conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall()),
+                "retries": dict(self._conn.execute("SELECT state, COUNT(*) FROM retries GROUP BY state").fetchall()),
+            }
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
@@ -0,0 +1,258 @@
+"""
+Where finished files end up: the backup directory tree, or rolling tar volumes.
+
+Both sinks answer the crawler's skip-if-exists checks and receive every file
+once its download or fetch has finished. DirectorySink leaves the files where
+they are, as the crawler always did.
+
+ArchiveSink streams them on a background thread into size-capped tar volumes
+(volume-00001.tar, ... in its own directory) and removes them from the tree,
+so a backup is a handful of large files instead of hundreds of thousands of
+small ones. index.jsonl next to the volumes maps each file's path (relative to
+the backup root) and Drive ID to its volume and data offset, so one file can be
+read back without scanning the volumes. Each run starts a new volume; a path
+archived again (a changed file in --sync) is found at its newest entry.
+
+With zstd compression (needs the zstandard package) every member is its own
+zstd frame, so the volumes are ordinary .tar.zst files and still seekable:
+the index records where a member's frame starts and the data offset inside it.
+"""
+
+import fnmatch
+import glob
+import json
+import os
+import queue
+import tarfile
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError: # Optional; only compressed archive volumes need it
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+VOLUME_BYTES = 1024 * 1024 * 1024 # Default cap; a volume is closed once it reaches it
+INDEX_NAME = "index.jsonl"
+ZSTD_LEVEL = 3
+
+class DirectorySink:
+    """Files stay in the backup tree; skip checks look at the filesystem."""
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def glob(self, pattern):
+        """Paths matching a glob pattern (absolute, with literal parts escaped by glob.escape)"""
+        return glob.glob(pattern)
+
+    def add(self, path, item_id=None):
+        pass
+
+    def discard(self, path):
+        """Drops an outdated copy so the fresh one is not skipped"""
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def summary(self):
+        return None
+
+    def close(self):
+        pass
+
+class ArchiveSink:
+    """Thread-safe sink streaming finished files into tar volumes on one background thread."""
+
+    def __init__(self, archive_dir, root, volume_bytes=VOLUME_BYTES, compress=False):
+        if compress and zstandard is None:
+            raise RuntimeError("Compressed archive volumes need the zstandard package (pip install zstandard)")
+        self.archive_dir = archive_dir
+        self.root = root
+        self.volume_bytes = volume_bytes
+        self.compress = compress
+        os.makedirs(archive_dir, exist_ok=True)
+        self.index_path = os.path.join(archive_dir, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._entries = load_index(self.index_path) # relative path -> newest index entry
+        self._pending = set() # relative paths queued but not archived yet
+        self._volume_number = next_volume_number(archive_dir)
+        self._volume = None # Open file of the current volume
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+        self._queue = queue.Queue()
+        self.file_count = 0 # Files archived during this run
+        self.byte_count = 0
+        self._thread = threading.Thread(target=self._archive_loop, name="archive-sink", daemon=True)
+        self._thread.start()
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.root)
+
+    def exists(self, path):
+        relative = self._relative(path)
+        with self._lock:
+            if relative in self._entries or relative in self._pending:
+                return True
+        return os.path.exists(path) # Finished but not queued yet
+
+    def glob(self, pattern):
+        relative_pattern = self._relative(pattern)
+        with self._lock:
+            archived = [os.path.join(self.root, p) for p in list(self._entries) + list(self._pending)
+                        if fnmatch.fnmatchcase(p, relative_pattern)]
+        return sorted(set(archived) | set(glob.glob(pattern)))
+
+    def add(self, path, item_id=None):
+        """Queues a finished file; it is removed from the tree once it is in a volume"""
+        with self._lock:
+            self._pending.add(self._relative(path))
+        self._queue.put((path, item_id))
+
+    def discard(self, path):
+        """Marks an archived path as outdated (and removes a copy still on disk) so it is fetched again"""
+        relative = self._relative(path)
+        with self._lock:
+            if self._entries.pop(relative, None):
+                self._write_index({"path": relative, "removed": True, "time": time.time()})
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def _archive_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            path, item_id = job
+            try:
+                entry = self._append(path, item_id)
+            except OSError as e:
+                print(f"Could not archive {path}: {e.__class__.__name__} - {e}")
+                self._close_volume() # Later members must not follow a partly written one
+                entry = None
+            else:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Archived {path} but could not remove it: {e.__class__.__name__} - {e}")
+            with self._lock:
+                self._pending.discard(self._relative(path))
+                if entry:
+                    self._entries[entry["path"]] = entry
+                    self._write_index(entry)
+                    self.file_count += 1
+                    self.byte_count += entry["size"]
+        self._close_volume()
+
+    def _append(self, path, item_id):
+        """Writes one file as a tar member of the current volume and returns its index entry"""
+        if self._volume is None:
+            self._open_volume()
+        stat = os.stat(path)
+        info = tarfile.TarInfo(self._relative(path))
+        info.size = stat.st_size
+        info.mtime = stat.st_mtime
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        padding = -info.size % tarfile.BLOCKSIZE
+        member_offset = self._volume.tell()
+        with open(path, "rb") as source:
+            writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._volume, closefd=False) \
+                if self.compress else self._volume
+            writer.write(header)
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            writer.write(b"\0" * padding)
+            if self.compress:
+                writer.close() # Ends the member's frame
+        self._volume.flush()
+        entry = {
+            "path": info.name,
+            "id": item_id,
+            "volume": os.path.basename(self._volume.name),
+            # Uncompressed: data starts at offset. Compressed: the member's frame starts at offset
+            # and its data at data_offset within the decompressed frame
+            "offset": member_offset + (0 if self.compress else len(header)),
+            "size": info.size,
+            "time": time.time(),
+        }
+        if self.compress:
+            entry["data_offset"] = len(header)
+        if self._volume.tell() >= self.volume_bytes:
+            self._close_volume()
+        return entry
+
+    def _open_volume(self):
+        name = f"volume-{self._volume_number:05d}.tar{'.zst' if self.compress else ''}"
+        self._volume_number += 1
+        self._volume = open(os.path.join(self.archive_dir, name), "xb")
+        print(f"Writing archive volume {self._volume.name}")
+
+    def _close_volume(self):
+        """Ends the current volume with the two zero blocks of a tar end-of-archive marker"""
+        if self._volume is None:
+            return
+        end = b"\0" * (2 * tarfile.BLOCKSIZE)
+        self._volume.write(zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(end) if self.compress else end)
+        self._volume.close()
+        self._volume = None
+
+    def _write_index(self, entry):
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+
+    def summary(self):
+        return f"Archive {self.archive_dir}: {self.file_count} files ({self.byte_count} bytes) archived this run"
+
+    def close(self):
+        """Archives the files still queued and closes the current volume and the index"""
+        self._queue.put(None)
+        self._thread.join()
+        self._index_file.close()
+
+def load_index(index_path):
+    """Relative path -> newest entry of an index file; later lines win, removals drop the path"""
+    entries = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as index_file:
+            for line in index_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # A line cut short by an interrupted run
+                if entry.get("removed"):
+                    entries.pop(entry["path"], None)
+                else:
+                    entries[entry["path"]] = entry
+    return entries
+
+def next_volume_number(archive_dir):
+    numbers = [int(name[7:12]) for name in os.listdir(archive_dir)
+               if name.startswith("volume-") and name[7:12].isdigit()]
+    return max(numbers, default=0) + 1
+
+def read_member(archive_dir, entry, dest):
+    """Copies the file of an index entry out of its volume to dest, without reading the rest of the volume"""
+    with open(os.path.join(archive_dir, entry["volume"]), "rb") as volume, open(dest, "wb") as out:
+        volume.seek(entry["offset"])
+        if "data_offset" in entry:
+            if zstandard is None:
+                raise RuntimeError("Reading compressed archive volumes needs the zstandard package")
+            source = zstandard.ZstdDecompressor().stream_reader(volume) # Stops at the end of the member's frame
+            skip = entry["data_offset"]
+            while skip:
+                skipped = len(source.read(skip))
+                if not skipped:
+                    raise OSError(f"{entry['volume']} ends inside the header of {entry['path']}")
+                skip -= skipped
+        else:
+            source = volume
+        remaining = entry["size"]
+        while remaining:
+            chunk = source.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise OSError(f"{entry['volume']} ends inside {entry['path']}")
+            out.write(chunk)
+            remaining -= len(chunk)
@@ -0,0 +1,138 @@
+"""
+Deferred retries of failed files, with exponential backoff and circuit breakers.
+
+A file that fails (element not clickable, editor not loading, menu missing,
+download not starting, ...) is not given up on. Its failure reason is recorded
+in the manifest's retries table together with the time of its next attempt, so
+the queue survives an interrupted run. Retries happen after the main crawl.
+
+Failure reasons are grouped into classes. A circuit breaker per class opens
+after several consecutive failures, which is what throttling by Drive looks
+like from here. While a breaker is open, items of that class are deferred
+without being tried and without using up an attempt. After a cooldown one trial
+item is let through: a success closes the breaker, and a failure reopens it
+with a longer cooldown.
+"""
+
+import random
+import threading
+import time
+
+# Failure reason -> failure class; reasons not listed (e.g. HTTP errors) fall back by prefix in failure_class()
+FAILURE_CLASSES = {
+    "element not found": "view",
+    "not clickable": "view",
+    "editor timeout": "editor",
+    "file menu missing": "editor",
+    "download menu missing": "editor",
+    "export menu error": "editor",
+    "export error": "editor",
+    "export not started": "export",
+    "download not started": "download",
+    "download error": "download",
+}
+
+MAX_ATTEMPTS = 4 # Attempts per file, the first one in the main crawl included
+BASE_DELAY = 30.0 # Seconds before the first retry; doubles with every further failure
+MAX_DELAY = 900.0
+BREAKER_THRESHOLD = 5 # Consecutive failures of one class that open its breaker
+BREAKER_COOLDOWN = 60.0 # Seconds an opened breaker stays open; doubles each time it reopens
+BREAKER_MAX_COOLDOWN = 900.0
+
+def failure_class(reason):
+    if reason in FAILURE_CLASSES:
+        return FAILURE_CLASSES[reason]
+    if reason.startswith("download "): # Download states reported by the tracker (canceled, interrupted, ...)
+        return "download"
+    return "http" # Errors of the direct HTTP engine
+
+def backoff_delay(attempts):
+    """Delay before the next try of an item that has failed attempts times, with +-20% jitter"""
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+class CircuitBreaker:
+    """Thread-safe breaker per failure class."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {} # class -> consecutive failures
+        self._open_until = {} # class -> monotonic time the breaker stays open until
+        self._cooldowns = {} # class -> cooldown used the next time it opens
+        self._trial = set() # classes whose half-open trial is under way
+
+    def allow(self, failure_classes):
+        """True if no breaker of the given classes is open; claims the half-open trial where a cooldown ran out"""
+        now = time.monotonic()
+        with self._lock:
+            for cls in failure_classes:
+                open_until = self._open_until.get(cls)
+                if open_until is None:
+                    continue
+                if now < open_until or cls in self._trial:
+                    return False
+            for cls in failure_classes:
+                if cls in self._open_until:
+                    self._trial.add(cls)
+            return True
+
+    def record_success(self, failure_classes):
+        with self._lock:
+            for cls in failure_classes:
+                if cls in self._open_until:
+                    print(f"Circuit breaker '{cls}' closed after a successful trial.")
+                self._failures.pop(cls, None)
+                self._open_until.pop(cls, None)
+                self._cooldowns.pop(cls, None)
+                self._trial.discard(cls)
+
+    def abandon(self, failure_classes):
+        """Gives up trials claimed by allow() without a verdict, so the next item may try instead"""
+        with self._lock:
+            self._trial.difference_update(failure_classes)
+
+    def record_failure(self, cls):
+        with self._lock:
+            self._failures[cls] = self._failures.get(cls, 0) + 1
+            if cls not in self._trial and self._failures[cls] < self.threshold:
+                return
+            cooldown = self._cooldowns.get(cls, self.cooldown)
+            self._open_until[cls] = time.monotonic() + cooldown
+            self._cooldowns[cls] = min(BREAKER_MAX_COOLDOWN, cooldown * 2)
+            self._trial.discard(cls)
+            print(f"Circuit breaker '{cls}' open for {cooldown:.0f}s after {self._failures[cls]} consecutive failures.")
+
+class RetryQueue:
+    """Schedules failed files for later attempts in the manifest and decides when to give up."""
+
+    def __init__(self, manifest, max_attempts=MAX_ATTEMPTS):
+        self.manifest = manifest
+        self.max_attempts = max_attempts
+        self.breaker = CircuitBreaker()
+
+    def defer(self, key, reason, count_attempt=True):
+        """
+        Queues a file for another attempt and returns True, or returns False once it has used
+        up its attempts. count_attempt=False defers it without a failed try (breaker open).
+        """
+        record = self.manifest.retry_record(key)
+        attempts = (record["attempts"] if record else 0) + (1 if count_attempt else 0)
+        if count_attempt:
+            self.breaker.record_failure(failure_class(reason))
+        if attempts >= self.max_attempts:
+            self.manifest.set_retry(key, reason, attempts, None, state="exhausted")
+            return False
+        delay = backoff_delay(attempts) if count_attempt else BASE_DELAY
+        self.manifest.set_retry(key, reason, attempts, time.time() + delay)
+        return True
+
+    def resolve(self, key):
+        """The file was fetched (or found on disk); drops it from the queue"""
+        if self.manifest.retry_record(key):
+            self.manifest.set_retry(key, None, None, None, state="done")
+
+    def is_last_attempt(self, key):
+        record = self.manifest.retry_record(key)
+        return bool(record) and record["attempts"] + 1 >= self.max_attempts
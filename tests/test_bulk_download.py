@@ -0,0 +1,35 @@
+import zipfile
+
+from bulk_download import extract_members
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return str(path)
+
+def test_members_are_saved_under_their_planned_names(tmp_path):
+    dest = tmp_path / "folder"
+    dest.mkdir()
+    (dest / "notes.txt").write_bytes(b"the other notes.txt of the folder")
+    part = write_zip(tmp_path / "drive-download-001.zip", [("notes.txt", b"renamed duplicate")])
+
+    extracted, missing, unexpected = extract_members([part], str(dest), {"notes.txt": "notes_abcd1234.txt"})
+
+    assert extracted["notes.txt"][0] == str(dest / "notes_abcd1234.txt")
+    assert (dest / "notes_abcd1234.txt").read_bytes() == b"renamed duplicate"
+    assert (dest / "notes.txt").read_bytes() == b"the other notes.txt of the folder"
+    assert not missing and not unexpected
+
+def test_second_member_with_the_same_name_is_not_extracted_over_the_first(tmp_path):
+    dest = tmp_path / "folder"
+    dest.mkdir()
+    part = write_zip(tmp_path / "drive-download-001.zip",
+                     [("a/report.pdf", b"first"), ("b/report.pdf", b"second"), ("extra.bin", b"x")])
+
+    extracted, missing, unexpected = extract_members([part], str(dest), {"report.pdf": "report.pdf", "gone.txt": "gone.txt"})
+
+    assert (dest / "report.pdf").read_bytes() == b"first"
+    assert extracted["report.pdf"][1] == len(b"first")
+    assert missing == {"gone.txt"}
+    assert unexpected == ["b/report.pdf", "extra.bin"]
@@ -0,0 +1,22 @@
+import pytest
+
+import clone
+
+@pytest.fixture(autouse=True)
+def default_configuration():
+    yield
+    clone.configure([])
+
+def test_schedule_is_rejected_with_sync_and_inventory(tmp_path):
+    manifest_path = tmp_path / "manifest.sqlite"
+    manifest_path.write_bytes(b"")
+    for mode in ("--sync", "--inventory"):
+        with pytest.raises(SystemExit):
+            clone.configure(["--manifest", str(manifest_path), "--schedule", mode])
+
+def test_schedule_needs_an_existing_manifest(tmp_path):
+    with pytest.raises(SystemExit):
+        clone.configure(["--manifest", str(tmp_path / "missing.sqlite"), "--priority", "Projects"])
+    (tmp_path / "missing.sqlite").write_bytes(b"")
+    clone.configure(["--manifest", str(tmp_path / "missing.sqlite"), "--priority", "Projects"])
+    assert clone.SCHEDULE_MODE and clone.PRIORITY_PATHS == ["Projects"]
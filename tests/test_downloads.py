@@ -0,0 +1,98 @@
+import pytest
+
+from downloads import DownloadTracker
+
+class FakeConnection:
+    """Stands in for a CDPConnection: records commands and lets the test fire download events"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+
+    def on(self, event, callback):
+        self.handlers[event] = callback
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+
+    def fire(self, event, **params):
+        self.handlers[event](params, None)
+
+@pytest.fixture
+def connection():
+    return FakeConnection()
+
+def test_wait_all_can_wait_for_one_directory_only(connection, tmp_path):
+    tracker = DownloadTracker(connection, "main")
+    bulk_dir, other_dir = str(tmp_path / "bulk"), str(tmp_path / "other")
+    tracker.set_download_dir(other_dir)
+    tracker.expect("large.iso", other_dir)
+    connection.fire("Browser.downloadWillBegin", guid="g-large", suggestedFilename="large.iso")
+    tracker.set_download_dir(bulk_dir)
+    tracker.expect("2 files", bulk_dir)
+    connection.fire("Browser.downloadWillBegin", guid="g-zip", suggestedFilename="files-001.zip")
+    # A second zip part nobody asked for goes to the current download directory
+    connection.fire("Browser.downloadWillBegin", guid="g-zip2", suggestedFilename="files-002.zip")
+    connection.fire("Browser.downloadProgress", guid="g-zip", state="completed", receivedBytes=10)
+
+    assert not tracker.wait_all(0.05, bulk_dir)
+    connection.fire("Browser.downloadProgress", guid="g-zip2", state="completed", receivedBytes=10)
+    assert tracker.wait_all(0.05, bulk_dir) # The large download elsewhere is still running
+    assert not tracker.wait_all(0.05)
+
+def stage(tracker, guid, data):
+    with open(f"{tracker.staging_dir}/{guid}", "wb") as staged:
+        staged.write(data)
+
+def test_staged_downloads_are_moved_to_their_tickets_names(connection, tmp_path):
+    tracker = DownloadTracker(connection, "main", str(tmp_path / "staging"))
+    tracker.use_staging()
+    assert connection.sent[-1][1]["behavior"] == "allowAndName"
+    folder_a, folder_b = str(tmp_path / "backup" / "a"), str(tmp_path / "backup" / "b")
+    first = tracker.expect("report", folder_a, "file-1", "report.pdf")
+    second = tracker.expect("notes", folder_b, "file-2", "notes.txt")
+
+    connection.fire("Browser.downloadWillBegin", guid="g1", suggestedFilename="download.pdf")
+    connection.fire("Browser.downloadWillBegin", guid="g2", suggestedFilename="notes (server).txt")
+    stage(tracker, "g2", b"notes")
+    stage(tracker, "g1", b"report")
+    connection.fire("Browser.downloadProgress", guid="g2", state="completed", receivedBytes=5)
+    connection.fire("Browser.downloadProgress", guid="g1", state="completed", receivedBytes=6)
+
+    assert tracker.wait_for_end(first, 5) and tracker.wait_for_end(second, 5)
+    assert first["path"] == f"{folder_a}/report.pdf" and open(first["path"], "rb").read() == b"report"
+    assert second["path"] == f"{folder_b}/notes.txt" and open(second["path"], "rb").read() == b"notes"
+    assert {t["item_key"] for t in tracker.completed} == {"file-1", "file-2"}
+    assert not list((tmp_path / "staging").iterdir())
+
+def test_staged_download_does_not_overwrite_an_existing_file(connection, tmp_path):
+    tracker = DownloadTracker(connection, "main", str(tmp_path / "staging"))
+    tracker.use_staging()
+    folder = tmp_path / "backup"
+    folder.mkdir()
+    (folder / "report.pdf").write_bytes(b"older")
+    ticket = tracker.expect("report", str(folder), "file-1", "report.pdf")
+
+    connection.fire("Browser.downloadWillBegin", guid="g1", suggestedFilename="report.pdf")
+    stage(tracker, "g1", b"newer")
+    connection.fire("Browser.downloadProgress", guid="g1", state="completed", receivedBytes=5)
+
+    assert tracker.wait_for_end(ticket, 5) and ticket["state"] == "completed"
+    assert ticket["path"] == str(folder / "report (1).pdf")
+    assert (folder / "report.pdf").read_bytes() == b"older"
+    assert (folder / "report (1).pdf").read_bytes() == b"newer"
+
+def test_tickets_with_a_frame_only_take_downloads_from_it(connection, tmp_path):
+    tracker = DownloadTracker(connection, "main", str(tmp_path / "staging"))
+    tracker.use_staging()
+    tab_1 = tracker.expect("from tab 1", str(tmp_path), "file-1", "one.pdf", frame_id="frame-1")
+    tab_2 = tracker.expect("from tab 2", str(tmp_path), "file-2", "two.pdf", frame_id="frame-2")
+    connection.fire("Browser.downloadWillBegin", guid="g2", suggestedFilename="x.pdf", frameId="frame-2")
+    assert tab_2["guid"] == "g2" and tab_1["state"] == "expected"
+
+    tracker.cancel(tab_1)
+    assert tab_1["state"] == "not_started"
+    connection.fire("Browser.downloadWillBegin", guid="g1", suggestedFilename="y.pdf", frameId="frame-1")
+    assert tab_1["guid"] is None # A canceled ticket no longer claims downloads
+    connection.fire("Browser.downloadProgress", guid="g1", state="canceled")
+    assert tracker.failed[-1]["guid"] == "g1"
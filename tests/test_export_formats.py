@@ -0,0 +1,35 @@
+import pytest
+
+import clone
+
+SHEET = {"id": "sheet-1", "clean_name": "Budget", "file_name": "Budget", "tooltip": "Google Sheets: Budget"}
+
+@pytest.fixture(autouse=True)
+def sheet_formats(monkeypatch):
+    monkeypatch.setitem(clone.EXPORT_FORMATS, "sheet", ["xlsx", "csv"])
+
+def test_per_sheet_format_is_left_to_the_editor(tmp_path):
+    (tmp_path / "Budget.xlsx").write_bytes(b"xlsx")
+    assert clone.needs_sheet_tabs(SHEET, str(tmp_path))
+    # The direct engines would only get the first sheet; the item goes through the UI path instead
+    assert clone.fetch_file_directly(None, SHEET, str(tmp_path), 0, SHEET["id"]) is None
+
+def test_partly_exported_sheet_goes_back_to_the_editor(tmp_path):
+    (tmp_path / "Budget.xlsx").write_bytes(b"xlsx")
+    (tmp_path / "Budget - Sheet1.csv").write_bytes(b"a,b") # Sheet2's export failed
+    assert clone.needs_sheet_tabs(SHEET, str(tmp_path))
+    assert clone.missing_export_formats(SHEET, str(tmp_path)) == ["csv"]
+
+def test_sheet_done_in_the_manifest_keeps_its_per_sheet_files(tmp_path):
+    (tmp_path / "Budget.xlsx").write_bytes(b"xlsx")
+    (tmp_path / "Budget - Sheet1.csv").write_bytes(b"a,b")
+    assert clone.missing_export_formats(SHEET, str(tmp_path), item_done=True) == []
+    # A per-sheet format added since the item was exported is still missing
+    (tmp_path / "Budget - Sheet1.csv").unlink()
+    assert clone.missing_export_formats(SHEET, str(tmp_path), item_done=True) == ["csv"]
+
+def test_direct_outputs_cover_only_missing_formats(tmp_path, monkeypatch):
+    monkeypatch.setitem(clone.EXPORT_FORMATS, "doc", ["docx", "pdf"])
+    doc = {"id": "doc-1", "clean_name": "Notes", "file_name": "Notes", "tooltip": "Google Docs: Notes"}
+    (tmp_path / "Notes.docx").write_bytes(b"docx")
+    assert clone.direct_fetch_outputs(doc, "doc", str(tmp_path)) == [(str(tmp_path / "Notes.pdf"), "pdf")]
@@ -0,0 +1,53 @@
+import types
+
+import pytest
+
+import clone
+from downloads import new_ticket
+from manifest import CrawlManifest
+from retry_queue import RetryQueue
+
+ITEM = {"id": "file-1", "clean_name": "report.pdf", "file_name": "report.pdf", "tooltip": "PDF: report.pdf"}
+FOLDER = {"id": "folder-1", "path": "/backup/folder", "depth": 0}
+
+@pytest.fixture
+def retry_queue(tmp_path, monkeypatch):
+    manifest = CrawlManifest(str(tmp_path / "manifest.sqlite"))
+    queue = RetryQueue(manifest, max_attempts=4)
+    monkeypatch.setattr(clone, "manifest", manifest)
+    monkeypatch.setattr(clone, "retry_queue", queue)
+    monkeypatch.setattr(clone, "RETRY_ATTEMPTS", 3)
+    manifest.add_file(ITEM["id"], FOLDER["id"], ITEM, "/backup/folder/report.pdf")
+    yield queue
+    manifest.close()
+
+def test_download_that_never_begins_is_one_failed_attempt(retry_queue):
+    ticket = new_ticket("/backup/folder/report.pdf", FOLDER["path"], ITEM["id"], "report.pdf")
+    ticket["state"] = "not_started" # As DownloadTracker.cancel leaves it, before notifying its listeners
+    clone.record_download_result(ticket)
+    session = types.SimpleNamespace(name="main", items_since_launch=0)
+    clone.record_file_outcome(session, FOLDER, ITEM, ITEM["id"], "download not started", ("view", "download"))
+
+    assert retry_queue.manifest.retry_record(ITEM["id"])["attempts"] == 1
+    assert retry_queue.breaker._failures == {"download": 1}
+    assert retry_queue.manifest.file_status(ITEM["id"]) == "failed"
+
+def test_download_failing_after_it_began_is_recorded_by_the_listener(retry_queue):
+    ticket = new_ticket("/backup/folder/report.pdf", FOLDER["path"], ITEM["id"], "report.pdf")
+    ticket["state"] = "interrupted"
+    clone.record_download_result(ticket)
+
+    record = retry_queue.manifest.retry_record(ITEM["id"])
+    assert record["attempts"] == 1
+    assert record["reason"] == "download interrupted"
+
+def test_item_deferred_to_the_ui_gets_one_attempt_without_retries(retry_queue, monkeypatch):
+    monkeypatch.setattr(clone, "RETRY_ATTEMPTS", 0)
+    retry_queue.max_attempts = 1
+    retry_queue.defer(ITEM["id"], "needs ui", count_attempt=False) # As cdp_fetch_file does
+    assert retry_queue.manifest.retry_record(ITEM["id"])["state"] == "waiting"
+    assert retry_queue.is_last_attempt(ITEM["id"]) # The UI attempt keeps the full timeouts
+
+    assert not clone.record_file_failure(ITEM["id"], "download not started")
+    assert retry_queue.manifest.retry_record(ITEM["id"])["state"] == "exhausted"
+    assert retry_queue.manifest.next_retry_time() is None # The retry pass ends
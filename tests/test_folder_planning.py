@@ -0,0 +1,35 @@
+import types
+
+import pytest
+
+import clone
+from manifest import CrawlManifest
+
+def item(item_id, label, tooltip=None):
+    return {"id": item_id, "label": label, "tooltip": tooltip or f"PDF: {label}", "clean_name": clone.sanitize(label),
+            "file_name": clone.safe_filename(label), "mime": None, "modified": None, "size": None}
+
+@pytest.fixture
+def plan(tmp_path, monkeypatch):
+    manifest = CrawlManifest(str(tmp_path / "manifest.sqlite"))
+    monkeypatch.setattr(clone, "manifest", manifest)
+    folder = {"id": "folder-1", "path": str(tmp_path / "backup"), "depth": 0}
+    session = types.SimpleNamespace(name="main")
+    claimed_names = {}
+
+    def plan_items(items):
+        return clone.plan_folder_items(session, folder, None, items, 1, set(), claimed_names)
+    yield plan_items
+    manifest.close()
+
+def test_labels_saved_under_one_file_name_are_told_apart(plan):
+    # Different clean names ("abpdf", "a_bpdf"), but both are saved as "a_b.pdf"
+    work = plan([item("id-slash-0001", "a/b.pdf"), item("id-under-0002", "a_b.pdf")])
+    assert [w[1]["file_name"] for w in work] == ["a_b.pdf", "a_b_id-under.pdf"]
+
+def test_export_colliding_with_a_plain_file_is_renamed(plan, monkeypatch):
+    monkeypatch.setitem(clone.EXPORT_FORMATS, "doc", ["docx", "pdf"])
+    work = plan([item("id-file-0001", "Notes.pdf")])
+    work += plan([item("id-doc-00002", "Notes", tooltip="Google Docs: Notes")]) # A later batch of the folder
+    # The Doc's PDF export would be "Notes.pdf", the plain file's name; all its exports get the suffix
+    assert work[1][1]["clean_name"] == "Notes_id-doc-0"
@@ -0,0 +1,71 @@
+import http.client
+import types
+
+import pytest
+
+import fake_drive
+from http_engine import FetchError, HttpFetchEngine, stand_in_urls
+
+SESSION_COOKIES = [{"name": "SID", "value": "fake-drive-session", "domain": "127.0.0.1", "path": "/"}]
+
+@pytest.fixture(scope="module")
+def drive():
+    nodes = fake_drive.build_tree(depth=0, fanout=0, files_per_folder=2, file_size=300 * 1024, docs_per_folder=1)
+    server, base_url = fake_drive.start_in_background(nodes)
+    yield nodes, base_url
+    server.shutdown()
+    server.server_close()
+
+def node_named(nodes, prefix):
+    return next(node for node in nodes.values() if node["name"].startswith(prefix))
+
+@pytest.fixture
+def engine(drive):
+    _, base_url = drive
+    engine = HttpFetchEngine(stand_in_urls(base_url), max_workers=2)
+    browser = types.SimpleNamespace(execute_cdp_cmd=lambda method, params: {"cookies": SESSION_COOKIES})
+    assert engine.load_cookies(browser) == 1
+    yield engine
+    engine.close()
+
+def test_fetches_files_and_exports_with_the_session_cookie(drive, engine, tmp_path):
+    nodes, _ = drive
+    plain = node_named(nodes, "Root file 0")
+    path, byte_count, _ = engine.submit("file", plain["id"], str(tmp_path)).result()
+    assert path == str(tmp_path / plain["name"]) # Named by Content-Disposition
+    assert open(path, "rb").read() == fake_drive.blob_bytes(plain) and byte_count == plain["size"]
+
+    doc = node_named(nodes, "Root document")
+    done = []
+    path, _, digest = engine.submit("doc", doc["id"], str(tmp_path), "Notes.pdf",
+                                    lambda *result: done.append(result), "pdf").result()
+    assert path == str(tmp_path / "Notes.pdf")
+    assert open(path, "rb").read() == fake_drive.blob_bytes(doc)
+    assert done == [(path, doc["size"], digest, None)]
+    assert not list(tmp_path.glob("*.part"))
+
+def test_login_page_is_not_saved_as_the_file(drive, tmp_path):
+    nodes, base_url = drive
+    engine = HttpFetchEngine(stand_in_urls(base_url)) # No cookies: the server answers with its sign-in page
+    plain = node_named(nodes, "Root file 1")
+    with pytest.raises(FetchError, match="HTML page"):
+        engine.submit("file", plain["id"], str(tmp_path), "file.bin").result()
+    engine.close()
+    assert not list(tmp_path.iterdir())
+
+class StaleConnection(http.client.HTTPConnection):
+    """An idle keep-alive connection the server has closed meanwhile"""
+
+    def request(self, *args, **kwargs):
+        raise ConnectionResetError("connection reset by peer")
+
+def test_stale_pooled_connection_is_retried_on_a_new_one(drive, engine, tmp_path):
+    nodes, base_url = drive
+    host, port = base_url[len("http://"):].split(":")
+    pool_key = ("http", host, int(port))
+    engine.pool.get(*pool_key).close()
+    for _ in range(2):
+        engine.pool.put(*pool_key, StaleConnection(host, int(port)))
+    plain = node_named(nodes, "Root file 0")
+    path, byte_count, _ = engine.submit("file", plain["id"], str(tmp_path)).result()
+    assert byte_count == plain["size"]
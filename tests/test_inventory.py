@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from inventory import DEFAULT_COSTS, MIN_SAMPLES, interleave_exports, is_priority, measured_costs, schedule_folders, \
+    subtree_totals
+from manifest import CrawlManifest
+
+ROOT = "/backup"
+
+def file_attrs(name, tooltip, size):
+    return {"id": name, "clean_name": name, "tooltip": tooltip, "size": size, "modified": None}
+
+@pytest.fixture
+def manifest(tmp_path):
+    """my-drive with Big (many large files), Small (one file) and Projects/2024 (one export)"""
+    manifest = CrawlManifest(str(tmp_path / "manifest.sqlite"))
+    for folder_id, path, depth, parent in [("my-drive", ROOT, 0, None), ("big", f"{ROOT}/Big", 1, "my-drive"),
+                                           ("small", f"{ROOT}/Small", 1, "my-drive"),
+                                           ("projects", f"{ROOT}/Projects", 1, "my-drive"),
+                                           ("2024", f"{ROOT}/Projects/2024", 2, "projects")]:
+        manifest.add_folder({"id": folder_id, "path": path, "depth": depth}, parent_id=parent)
+    for idx in range(20):
+        manifest.add_file(f"big-{idx}", "big", file_attrs(f"big-{idx}", "PDF: x", 50 * 1024 * 1024), None)
+    manifest.add_file("small-0", "small", file_attrs("small-0", "PDF: x", 1024), None)
+    manifest.add_file("doc-0", "2024", file_attrs("doc-0", "Google Docs: x", None), None)
+    yield manifest
+    manifest.close()
+
+def test_subtree_totals_add_up_below_each_folder(manifest):
+    totals, _ = subtree_totals(manifest, DEFAULT_COSTS)
+    assert totals["projects"]["files"] == 1 and totals["projects"]["exports"] == 1
+    assert totals["projects"]["unknown_sizes"] == 1
+    assert totals["projects"]["own_seconds"] == DEFAULT_COSTS["folder"]
+    assert totals["projects"]["seconds"] == 2 * DEFAULT_COSTS["folder"] + DEFAULT_COSTS["export"]
+    assert totals["my-drive"]["folders"] == 5 and totals["my-drive"]["files"] == 22
+
+def test_is_priority_matches_the_path_and_everything_below():
+    assert is_priority(f"{ROOT}/Projects/2024", ROOT, ["Projects/2024"])
+    assert is_priority(f"{ROOT}/Projects/2024/Q1", ROOT, ["/Projects/2024/"])
+    assert not is_priority(f"{ROOT}/Projects/20245", ROOT, ["Projects/2024"])
+    assert not is_priority(f"{ROOT}/Projects", ROOT, ["Projects/2024"])
+
+def test_schedule_puts_priority_paths_then_the_most_work_last(manifest):
+    rows = [{"id": f, "path": p} for f, p in [("2024", f"{ROOT}/Projects/2024"), ("big", f"{ROOT}/Big"),
+                                              ("small", f"{ROOT}/Small")]]
+    # A LIFO frontier takes the last row first
+    assert [r["id"] for r in schedule_folders(rows, manifest, DEFAULT_COSTS, ROOT)] == ["small", "2024", "big"]
+    assert [r["id"] for r in schedule_folders(rows, manifest, DEFAULT_COSTS, ROOT, ["Projects/2024"])] == \
+        ["small", "big", "2024"]
+
+def test_exports_are_spread_among_cheap_files():
+    work = ["e1", "e2", "f1", "f2", "f3", "f4", "f5"]
+    costs = dict(DEFAULT_COSTS, export=4.0, download=2.0) # One export takes as long as two downloads
+    ordered = interleave_exports(work, lambda entry: entry.startswith("e"), costs)
+    assert ordered == ["e1", "f1", "f2", "e2", "f3", "f4", "f5"]
+    assert interleave_exports(work, lambda entry: False, costs) == work
+    assert interleave_exports(["e1", "e2"], lambda entry: True, costs) == ["e1", "e2"]
+
+def test_costs_are_measured_from_the_trace(tmp_path):
+    trace_path = tmp_path / "trace.jsonl"
+    records = [{"phase": "export", "duration": 6.0}] * MIN_SAMPLES
+    records += [{"phase": "download", "duration": 1.0}] * (MIN_SAMPLES - 1) # Too few; the default stays
+    records += [{"phase": "folder", "duration": 9.0}] * MIN_SAMPLES # A real run's folders include fetching
+    records += [{"phase": "fetch", "duration": 2.0, "bytes": 4 * 1024 * 1024}]
+    trace_path.write_text("".join(json.dumps(record) + "\n" for record in records) + '{"phase": "exp')
+    costs = measured_costs(str(trace_path))
+    assert costs == dict(DEFAULT_COSTS, export=6.0, bytes_per_second=2 * 1024 * 1024)
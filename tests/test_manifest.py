@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+
+from manifest import CrawlManifest
+
+ITEM = {"id": "file-1", "clean_name": "report.pdf", "tooltip": "PDF: report.pdf", "size": 10, "modified": "Jan 1"}
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "manifest.sqlite")
+
+def test_paths_are_stored_relative_to_the_root(db_path):
+    host_a = CrawlManifest(db_path, root="/hosts/a/backup")
+    host_a.add_folder({"id": "f1", "path": "/hosts/a/backup/Projects", "depth": 1}, parent_id="my-drive")
+    host_a.add_file("file-1", "f1", ITEM, "/hosts/a/backup/Projects/report.pdf")
+    host_a.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT path FROM folders").fetchone()[0] == "Projects"
+        assert conn.execute("SELECT path FROM files").fetchone()[0] == "Projects/report.pdf"
+
+    host_b = CrawlManifest(db_path, root="/hosts/b/backup")
+    assert host_b.folder_record("f1")["path"] == "/hosts/b/backup/Projects"
+    assert host_b.file_record("file-1")["path"] == "/hosts/b/backup/Projects/report.pdf"
+    assert host_b.resume_frontier() == [{"id": "f1", "path": "/hosts/b/backup/Projects", "depth": 1}]
+    host_b.close()
+
+def folder(folder_id, depth, path=None):
+    return {"id": folder_id, "path": path or f"/backup/{folder_id}", "depth": depth}
+
+def test_resume_frontier_is_shallowest_first_and_skips_finished_folders(db_path):
+    manifest = CrawlManifest(db_path)
+    manifest.add_folder(folder("my-drive", 0))
+    manifest.add_folder(folder("deep", 2), parent_id="mid")
+    manifest.add_folder(folder("mid", 1), parent_id="my-drive")
+    manifest.add_folder(folder("finished", 1), parent_id="my-drive")
+    manifest.add_folder(folder("unfinished-file", 1), parent_id="my-drive")
+    for folder_id in ("my-drive", "finished", "unfinished-file"):
+        manifest.set_folder_state(folder_id, "done")
+    manifest.add_file("file-1", "unfinished-file", ITEM, "/backup/unfinished-file/report.pdf")
+
+    frontier = manifest.resume_frontier()
+    ids = [row["id"] for row in frontier]
+    # Not "my-drive" or "finished"; a done folder with a pending file comes back
+    assert sorted(ids[:2]) == ["mid", "unfinished-file"] and ids[2:] == ["deep"]
+    assert frontier[2] == {"id": "deep", "path": "/backup/deep", "depth": 2}
+    manifest.close()
+
+def test_subtree_is_complete_only_once_every_descendant_is_done(db_path):
+    manifest = CrawlManifest(db_path)
+    manifest.add_folder(folder("top", 0))
+    manifest.add_folder(folder("child", 1), parent_id="top")
+    manifest.add_folder(folder("grandchild", 2), parent_id="child")
+    for folder_id in ("top", "child", "grandchild"):
+        manifest.set_folder_state(folder_id, "done")
+    manifest.add_file("file-1", "grandchild", ITEM, "/backup/grandchild/report.pdf")
+
+    assert not manifest.subtree_complete("top") # A file two levels down is pending
+    assert not manifest.subtree_complete("child")
+    manifest.set_file_status("file-1", "done")
+    assert manifest.subtree_complete("top")
+
+    manifest.add_folder(folder("new-child", 2), parent_id="child") # Found by a later sync
+    assert not manifest.subtree_complete("top")
+    assert manifest.subtree_complete("grandchild")
+    assert not manifest.subtree_complete("unknown") # Never recorded
+    manifest.close()
+
+def test_due_retries_come_with_their_folder_and_attributes(db_path):
+    manifest = CrawlManifest(db_path)
+    manifest.add_file("file-1", "folder-1", ITEM, "/backup/report.pdf")
+    manifest.add_file("file-2", "folder-1", dict(ITEM, id="file-2"), "/backup/other.pdf")
+    manifest.set_retry("file-1", "download not started", 1, 100.0)
+    manifest.set_retry("file-2", "editor timeout", 2, 200.0)
+
+    due = manifest.due_retries(150.0)
+    assert [(row["id"], row["folder_id"], row["attempts"]) for row in due] == [("file-1", "folder-1", 1)]
+    assert due[0]["attrs"] == ITEM
+    assert manifest.next_retry_time() == 100.0
+    manifest.set_retry("file-1", None, None, None, state="done")
+    assert manifest.next_retry_time() == 200.0
+    manifest.close()
+
+def test_buffered_writes_reach_the_database_on_flush_and_close(db_path):
+    manifest = CrawlManifest(db_path, batch_size=1000, flush_interval=3600)
+    manifest.add_folder(folder("f1", 0))
+    manifest.add_file("file-1", "f1", ITEM, "/backup/f1/report.pdf")
+    manifest.set_file_status("file-1", "done", byte_count=10)
+    assert manifest.file_status("file-1") == "done" # Reads see the buffer
+
+    def stored_status():
+        with sqlite3.connect(db_path) as conn:
+            row = conn.execute("SELECT status FROM files WHERE id = 'file-1'").fetchone()
+            return row[0] if row else None
+    assert stored_status() is None
+    manifest.flush()
+    assert stored_status() == "done"
+
+    manifest.set_file_status("file-1", "failed", error="download interrupted")
+    manifest.close()
+    reopened = CrawlManifest(db_path)
+    record = reopened.file_record("file-1")
+    assert (record["status"], record["error"], record["bytes"]) == ("failed", "download interrupted", 10)
+    reopened.close()
@@ -0,0 +1,78 @@
+import os
+import random
+import tarfile
+
+import pytest
+
+from output_sink import INDEX_NAME, ArchiveSink, load_index, read_member
+
+def write_files(root, names, size):
+    files = {}
+    for i, name in enumerate(names):
+        path = os.path.join(root, "folder", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = random.Random(name).randbytes(size + i * 100) # Incompressible, so zstd volumes roll over too
+        with open(path, "wb") as f:
+            f.write(data)
+        files[path] = data
+    return files
+
+def archive(archive_dir, root, files, compress=False):
+    sink = ArchiveSink(str(archive_dir), str(root), volume_bytes=4096, compress=compress)
+    for path in files:
+        sink.add(path, f"id-{os.path.basename(path)}")
+    sink.close()
+
+def assert_index_reads_back(archive_dir, root, files):
+    entries = load_index(os.path.join(archive_dir, INDEX_NAME))
+    assert {os.path.join(root, path) for path in entries} == set(files)
+    for path, entry in entries.items():
+        out = os.path.join(str(archive_dir), "restored")
+        read_member(str(archive_dir), entry, out)
+        with open(out, "rb") as f:
+            assert f.read() == files[os.path.join(root, path)]
+        assert entry["id"] == f"id-{os.path.basename(path)}"
+    return entries
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_volumes_roll_over_and_restart_appends_to_the_index(tmp_path, compress):
+    if compress:
+        pytest.importorskip("zstandard")
+    root = str(tmp_path / "backup")
+    archive_dir = tmp_path / "archive"
+    first = write_files(root, [f"a{i}.bin" for i in range(6)], 1500)
+    archive(archive_dir, root, first, compress)
+    assert not any(os.path.exists(path) for path in first) # Moved out of the tree
+
+    volumes = sorted(name for name in os.listdir(archive_dir) if name.startswith("volume-"))
+    assert len(volumes) > 1 # 4 KB cap, about 10 KB of files
+    entries = assert_index_reads_back(archive_dir, root, first)
+    assert {entry["volume"] for entry in entries.values()} == set(volumes)
+
+    # A second run starts a new volume and appends to the same index
+    second = write_files(root, ["b0.bin", "a0.bin"], 2000) # a0.bin changed since the first run
+    archive(archive_dir, root, second, compress)
+    later_volumes = sorted(name for name in os.listdir(archive_dir) if name.startswith("volume-"))
+    assert later_volumes[:len(volumes)] == volumes and len(later_volumes) > len(volumes)
+    assert_index_reads_back(archive_dir, root, {**first, **second})
+
+    if not compress:
+        with tarfile.open(os.path.join(archive_dir, volumes[0])) as volume:
+            assert volume.getnames()[0] == "folder/a0.bin"
+
+def test_archived_and_queued_files_count_as_existing(tmp_path):
+    root = str(tmp_path / "backup")
+    files = write_files(root, ["doc - Sheet1.csv", "doc - Sheet2.csv", "other.bin"], 100)
+    sink = ArchiveSink(str(tmp_path / "archive"), root, volume_bytes=4096)
+    for path in files:
+        sink.add(path)
+    sink.close()
+    sink = ArchiveSink(str(tmp_path / "archive"), root, volume_bytes=4096)
+    try:
+        assert sink.exists(os.path.join(root, "folder", "other.bin"))
+        assert len(sink.glob(os.path.join(root, "folder", "doc - *.csv"))) == 2
+        sink.discard(os.path.join(root, "folder", "other.bin"))
+        assert not sink.exists(os.path.join(root, "folder", "other.bin"))
+    finally:
+        sink.close()
+    assert "folder/other.bin" not in load_index(str(tmp_path / "archive" / INDEX_NAME))
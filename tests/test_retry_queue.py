@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import retry_queue
+from manifest import CrawlManifest
+from retry_queue import CircuitBreaker, RetryQueue, backoff_delay, failure_class
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = CrawlManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+def test_backoff_doubles_up_to_the_cap():
+    for attempts, base in ((1, 30.0), (2, 60.0), (3, 120.0)):
+        assert 0.8 * base <= backoff_delay(attempts) <= 1.2 * base
+    assert backoff_delay(50) <= 1.2 * retry_queue.MAX_DELAY
+
+def test_failure_classes():
+    assert failure_class("editor timeout") == "editor"
+    assert failure_class("download interrupted") == "download"
+    assert failure_class("HTTP 403") == "http"
+
+def test_attempts_stop_at_max_attempts(manifest):
+    queue = RetryQueue(manifest, max_attempts=3)
+    assert queue.defer("item", "download error")
+    assert not queue.is_last_attempt("item") # 1 failed, a 2nd and a 3rd to go
+    assert queue.defer("item", "download error")
+    assert queue.is_last_attempt("item")
+    assert not queue.defer("item", "download error")
+    record = manifest.retry_record("item")
+    assert record["attempts"] == 3
+    assert record["state"] == "exhausted"
+
+def test_deferral_without_a_try_uses_no_attempt(manifest):
+    queue = RetryQueue(manifest, max_attempts=2)
+    for _ in range(5):
+        assert queue.defer("item", "circuit open", count_attempt=False)
+    assert manifest.retry_record("item")["attempts"] == 0
+    assert queue.breaker._failures == {}
+
+def test_resolve_drops_the_file_from_the_queue(manifest):
+    queue = RetryQueue(manifest)
+    queue.defer("item", "export not started")
+    queue.resolve("item")
+    assert manifest.retry_record("item")["state"] == "done"
+
+def test_breaker_opens_at_threshold_and_closes_after_a_successful_trial():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.1)
+    for _ in range(2):
+        breaker.record_failure("editor")
+    assert breaker.allow(("view", "editor"))
+    breaker.record_failure("editor")
+    assert not breaker.allow(("view", "editor")) # Open
+    assert breaker.allow(("view", "download")) # Other classes are unaffected
+
+    time.sleep(0.15)
+    assert breaker.allow(("editor",)) # Half-open: one trial goes through
+    assert not breaker.allow(("editor",)) # ... and only one
+    breaker.record_success(("editor",))
+    assert breaker.allow(("editor",))
+    assert breaker.allow(("editor",))
+
+def test_failed_trial_reopens_the_breaker_for_longer():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    breaker.record_failure("export")
+    time.sleep(0.15)
+    assert breaker.allow(("export",))
+    breaker.record_failure("export") # The trial failed: open again, cooldown doubled
+    time.sleep(0.15)
+    assert not breaker.allow(("export",))
+    time.sleep(0.1)
+    assert breaker.allow(("export",))
+
+def test_abandoned_trial_lets_the_next_item_try():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    breaker.record_failure("view")
+    time.sleep(0.1)
+    assert breaker.allow(("view",))
+    breaker.abandon(("view",))
+    assert breaker.allow(("view",))
@@ -0,0 +1,54 @@
+import pytest
+
+import waits
+from waits import AdaptiveWaits, LatencyModel
+
+def test_timeout_is_learned_from_samples():
+    model = LatencyModel()
+    for _ in range(waits.MIN_SAMPLES - 1):
+        model.record("rows", 0.2)
+    assert model.timeout_for("rows", 3.0) == 3.0 # Not enough samples yet
+    model.record("rows", 0.2)
+    assert model.timeout_for("rows", 3.0) == pytest.approx(0.2 * waits.TIMEOUT_HEADROOM)
+    assert model.timeout_for("rows", 0.4) == 0.4 # Never above the default
+    model.record("fast", 0.01)
+    for _ in range(waits.MIN_SAMPLES):
+        model.record("fast", 0.01)
+    assert model.timeout_for("fast", 3.0) == waits.MIN_TIMEOUT
+    assert model.timeout_for("fast", 3.0, floor=2.0) == 2.0
+
+def test_streak_of_timeouts_shrinks_the_timeout_until_a_success():
+    model = LatencyModel()
+    for _ in range(waits.TIMEOUT_STREAK - 1):
+        model.record_timeout("virus_dialog", optional=True)
+    assert model.timeout_for("virus_dialog", 3.0) == 3.0
+    model.record_timeout("virus_dialog", optional=True)
+    assert model.timeout_for("virus_dialog", 3.0) == 1.5
+    model.record_timeout("virus_dialog", optional=True)
+    assert model.timeout_for("virus_dialog", 3.0) == 0.75
+    for _ in range(5):
+        model.record_timeout("virus_dialog", optional=True)
+    assert model.timeout_for("virus_dialog", 3.0) == 3.0 * waits.STREAK_MIN_FRACTION
+    model.record("virus_dialog", 1.0) # It showed up after all
+    assert model.timeout_for("virus_dialog", 3.0) == 3.0
+
+def test_required_timeouts_do_not_shrink_the_timeout():
+    model = LatencyModel()
+    for _ in range(waits.TIMEOUT_STREAK + 2):
+        model.record_timeout("editor_load")
+    assert model.timeout_for("editor_load", 60) == 60
+
+def test_optional_call_passes_the_learned_timeout_and_records_the_outcome():
+    adaptive = AdaptiveWaits()
+    timeouts = []
+
+    def never(timeout):
+        timeouts.append(timeout)
+        return None
+    for _ in range(waits.TIMEOUT_STREAK + 1):
+        assert adaptive.optional_call("lazy_load", never, 3.0) is None
+    assert timeouts == [3.0] * waits.TIMEOUT_STREAK + [1.5]
+    assert "lazy_load: 0 waits, no samples, 4 timeouts" in adaptive.model.summary()
+
+    assert adaptive.optional_call("lazy_load", lambda timeout: "rows", 3.0) == "rows"
+    assert adaptive.model.timeout_for("lazy_load", 3.0) == 3.0
@@ -0,0 +1,71 @@
+import queue
+import time
+
+import pytest
+
+import work_queue
+from work_queue import SharedFrontier
+
+def folder(folder_id, root, depth=0):
+    return {"id": folder_id, "path": f"{root}/{folder_id}", "depth": depth, "url": f"https://drive/{folder_id}"}
+
+@pytest.fixture
+def frontiers(tmp_path):
+    """Two hosts on one queue file; their leases run out after 0.2s, as no heartbeat comes in time"""
+    db_path = str(tmp_path / "queue.sqlite")
+    root = str(tmp_path / "backup")
+    hosts = [SharedFrontier(db_path, root, owner=name, lease_seconds=0.2) for name in ("host-a", "host-b")]
+    yield root, hosts
+    for host in hosts:
+        host.close()
+
+def test_expired_lease_is_leased_to_another_host(frontiers):
+    root, (host_a, host_b) = frontiers
+    assert host_a.seed([folder("f1", root)])
+    assert not host_b.seed([folder("f2", root)]) # Seeded once per queue
+
+    leased = host_a.get(0)
+    assert leased["id"] == "f1"
+    assert leased["path"] == f"{root}/f1"
+    with pytest.raises(queue.Empty):
+        host_b.get(0) # Still leased by host-a
+
+    time.sleep(0.3) # host-a "crashed": its lease runs out
+    reclaimed = host_b.get(0)
+    assert reclaimed["id"] == "f1"
+    assert host_b.counts() == {"leased": 1}
+
+    host_a.task_done(leased) # Too late: host-a no longer owns it
+    assert host_b.counts() == {"leased": 1}
+    host_b.task_done(reclaimed)
+    assert host_b.counts() == {"done": 1}
+
+def test_finished_folder_does_not_come_back(frontiers):
+    root, (host_a, host_b) = frontiers
+    host_a.seed([folder("f1", root)])
+    leased = host_a.get(0)
+    assert host_a.put(folder("f2", root, 1))
+    assert not host_b.put(folder("f2", root, 1)) # Queued once, whoever finds it
+    host_a.task_done(leased)
+
+    time.sleep(0.3)
+    assert host_b.get(0)["id"] == "f2"
+    with pytest.raises(queue.Empty):
+        host_b.get(0)
+    assert host_a.counts() == {"done": 1, "leased": 1}
+
+def test_folder_is_given_up_after_max_leases(frontiers, monkeypatch):
+    monkeypatch.setattr(work_queue, "MAX_LEASES", 2)
+    root, (host_a, host_b) = frontiers
+    host_a.seed([folder("f1", root)])
+    host_a.get(0)
+    time.sleep(0.3)
+    host_b.get(0)
+    time.sleep(0.3)
+    with pytest.raises(queue.Empty):
+        host_a.get(0)
+    assert host_a.counts() == {"abandoned": 1}
+
+def test_queue_uses_a_rollback_journal(frontiers):
+    _, (host_a, _) = frontiers
+    assert host_a._conn.execute("PRAGMA journal_mode").fetchone()[0] == "truncate"
@@ -0,0 +1,177 @@
+"""
+Span tracing for crawl runs.
+
+Every timed phase (folder navigation, view scans, element relocation, exports,
+downloads, ...) becomes a span record written as one JSON line:
+
+    {"phase": "export", "start": 1760000000.12, "duration": 4.81, "session": "worker1",
+     "item_id": "1AbC...", "outcome": "started", "commands": 14}
+
+Records are buffered and appended in batches. The tracer also keeps per-phase
+durations in memory for the end-of-run summary, and can count the WebDriver
+commands (round trips) issued inside each span.
+"""
+
+import collections
+import json
+import threading
+import time
+
+from waits import percentile
+
+class SpanWriter:
+    """Appends JSON-line records to a file in batches; a None path keeps nothing."""
+
+    def __init__(self, path, batch_size=500, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def write(self, record):
+        if not self._file:
+            return
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        if self._file:
+            with self._lock:
+                self._flush_locked()
+
+    def close(self):
+        if self._file:
+            with self._lock:
+                self._flush_locked()
+                self._file.close()
+                self._file = None
+
+class Span:
+    """An open span; set fields on it (outcome, bytes, ...) with span[key] = value."""
+
+    def __init__(self, tracer, phase, fields):
+        self.tracer = tracer
+        self.record = {"phase": phase, **fields}
+        self.commands = 0
+
+    def __setitem__(self, key, value):
+        self.record[key] = value
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.record["start"] = time.time()
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record["duration"] = round(time.monotonic() - self._started, 4)
+        self.record["commands"] = self.commands
+        if exc_type is not None:
+            self.record.setdefault("outcome", "error")
+            self.record["error"] = f"{exc_type.__name__}: {exc}"
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._finish(self.record)
+        return False
+
+class Tracer:
+    """Creates spans, writes them through a SpanWriter and aggregates them for summary()."""
+
+    def __init__(self, path=None, batch_size=500):
+        self.writer = SpanWriter(path, batch_size)
+        self.started = time.monotonic()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._durations = collections.defaultdict(list) # phase -> durations
+        self._commands = collections.Counter() # phase -> WebDriver commands
+        self._outcomes = collections.Counter() # outcomes of "file" spans
+        self._folders = [] # (duration, path, items) of "folder" spans
+        self._bytes = 0
+        self.command_counts = collections.Counter() # WebDriver command name -> count
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def span(self, phase, **fields):
+        """Context manager timing one phase; fields (item_id, folder, ...) go into the record"""
+        if "session" not in fields:
+            fields["session"] = threading.current_thread().name
+        return Span(self, phase, fields)
+
+    def event(self, phase, duration=0.0, **fields):
+        """Records a span that was timed elsewhere, such as a download confirmed on the CDP thread"""
+        if "session" not in fields:
+            fields["session"] = threading.current_thread().name
+        record = {"phase": phase, "start": time.time() - duration, "duration": round(duration, 4), **fields}
+        self._finish(record)
+
+    def _finish(self, record):
+        phase = record["phase"]
+        with self._lock:
+            self._durations[phase].append(record["duration"])
+            self._commands[phase] += record.get("commands", 0)
+            self._bytes += record.get("bytes") or 0
+            if phase == "file":
+                self._outcomes[record.get("outcome")] += 1
+            elif phase == "folder":
+                self._folders.append((record["duration"], record.get("folder"), record.get("items")))
+        self.writer.write(record)
+
+    def count_commands(self, driver):
+        """Counts every WebDriver command sent through driver, charging it to every span open on the calling thread"""
+        execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            with self._lock:
+                self.command_counts[driver_command] += 1
+            for span in self._stack():
+                span.commands += 1
+            return execute(driver_command, params)
+        driver.execute = counting_execute
+
+    def summary(self, top_folders=5):
+        """Throughput, p50/p95 per phase and the slowest folders, as printable text"""
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        with self._lock:
+            durations = {phase: sorted(values) for phase, values in self._durations.items()}
+            commands = dict(self._commands)
+            outcomes = dict(self._outcomes)
+            folders = sorted(self._folders, key=lambda f: f[0], reverse=True)[:top_folders]
+            byte_count = self._bytes
+            total_commands = sum(self.command_counts.values())
+        file_count = sum(outcomes.values())
+        lines = [
+            f"Run summary ({elapsed / 60:.1f} min):",
+            f"  Files: {file_count} ({file_count / elapsed * 60:.1f}/min) {outcomes}",
+            f"  Bytes: {byte_count} ({byte_count / elapsed / 1024 / 1024:.2f} MB/s)",
+            f"  WebDriver commands: {total_commands}",
+            f"  {'phase':<18}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'total s':>10}{'cmds/span':>11}",
+        ]
+        for phase in sorted(durations, key=lambda p: sum(durations[p]), reverse=True):
+            values = durations[phase]
+            lines.append(f"  {phase:<18}{len(values):>7}{percentile(values, 50):>9.2f}{percentile(values, 95):>9.2f}"
+                         f"{sum(values):>10.1f}{commands.get(phase, 0) / len(values):>11.1f}")
+        if folders:
+            lines.append("  Slowest folders:")
+            for duration, path, items in folders:
+                lines.append(f"    {duration:8.1f}s  {path} ({items} items)")
+        return "\n".join(lines)
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,194 @@
+"""
+Condition-based waits with timeouts learned from the latencies seen during the run.
+
+Every wait belongs to a named operation ("editor_load", "context_menu", ...) and
+records how long its condition took to hold. Required waits keep their full
+timeout and return as soon as the condition holds. Optional waits (for things
+that may legitimately never happen, such as a virus scan dialog or more rows
+after the end of a list) give up after a multiple of the operation's observed
+p95, so on a fast connection they stop costing the worst-case time. An optional
+wait that keeps timing out never gets a sample to learn from; after
+TIMEOUT_STREAK timeouts in a row its timeout halves with each further one,
+down to STREAK_MIN_FRACTION of the default, until it succeeds again. Inside
+fail_fast(), required waits use the learned timeouts too; that is for work
+whose failures are retried later anyway.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+SAMPLE_WINDOW = 200 # Latest samples kept per operation
+MIN_SAMPLES = 5 # Samples needed before an operation's timeout is learned
+TIMEOUT_HEADROOM = 3.0 # Learned timeout = p95 * headroom
+MIN_TIMEOUT = 0.3 # Seconds; learned timeouts never go below this
+REQUIRED_MIN_TIMEOUT = 2.0 # Floor of learned timeouts for required waits under fail_fast()
+POLL_FREQUENCY = 0.1
+TIMEOUT_STREAK = 3 # Optional-wait timeouts in a row after which an operation's timeout starts shrinking
+STREAK_MIN_FRACTION = 0.25 # A shrinking timeout stops at this fraction of the wait's default
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q in 0..100) of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class LatencyModel:
+    """Thread-safe rolling latency samples and timeout counts per operation."""
+
+    def __init__(self, window=SAMPLE_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._timeouts = collections.Counter()
+        self._streaks = collections.Counter() # Optional-wait timeouts since the operation last succeeded
+        self._lock = threading.Lock()
+
+    def record(self, op, seconds):
+        with self._lock:
+            self._samples.setdefault(op, collections.deque(maxlen=self.window)).append(seconds)
+            self._streaks.pop(op, None)
+
+    def record_timeout(self, op, optional=False):
+        """Counts a timeout; those of optional waits also extend op's streak of timeouts"""
+        with self._lock:
+            self._timeouts[op] += 1
+            if optional:
+                self._streaks[op] += 1
+
+    def percentile(self, op, q):
+        """The q-th percentile latency of op, or None until MIN_SAMPLES have been recorded"""
+        with self._lock:
+            samples = sorted(self._samples.get(op, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return percentile(samples, q)
+
+    def timeout_for(self, op, default, floor=MIN_TIMEOUT):
+        """
+        default until op has enough samples, then p95 * TIMEOUT_HEADROOM clamped to [floor, default];
+        shorter still while op is on a streak of optional-wait timeouts
+        """
+        p95 = self.percentile(op, 95)
+        timeout = default if p95 is None else min(default, max(floor, p95 * TIMEOUT_HEADROOM))
+        with self._lock:
+            streak = self._streaks[op]
+        if streak >= TIMEOUT_STREAK:
+            shrunk = default / 2 ** (streak - TIMEOUT_STREAK + 1)
+            timeout = min(timeout, max(floor, default * STREAK_MIN_FRACTION, shrunk))
+        return timeout
+
+    def summary(self):
+        """One line per operation: sample count, p50/p95 and timeouts"""
+        with self._lock:
+            ops = sorted(set(self._samples) | set(self._timeouts))
+        lines = []
+        for op in ops:
+            with self._lock:
+                samples = sorted(self._samples.get(op, ()))
+                timeouts = self._timeouts[op]
+            p50, p95 = percentile(samples, 50), percentile(samples, 95)
+            latency = f"p50 {p50:.2f}s, p95 {p95:.2f}s" if samples else "no samples"
+            lines.append(f"  {op}: {len(samples)} waits, {latency}, {timeouts} timeouts")
+        return "\n".join(lines)
+
+class AdaptiveWaits:
+    """WebDriver and event waits that feed and use a shared LatencyModel."""
+
+    def __init__(self, model=None, poll_frequency=POLL_FREQUENCY):
+        self.model = model or LatencyModel()
+        self.poll_frequency = poll_frequency
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def fail_fast(self):
+        """Within this block (on the calling thread), required waits give up after their learned timeout"""
+        previous = getattr(self._local, "fail_fast", False)
+        self._local.fail_fast = True
+        try:
+            yield
+        finally:
+            self._local.fail_fast = previous
+
+    def until(self, driver, op, condition, timeout):
+        """
+        Required wait: returns the condition's value, or raises TimeoutException after the full timeout
+        (the learned one inside fail_fast()). Its latency is still recorded, so the model reports
+        required operations too.
+        """
+        if getattr(self._local, "fail_fast", False):
+            timeout = self.model.timeout_for(op, timeout, REQUIRED_MIN_TIMEOUT)
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(driver, timeout, self.poll_frequency).until(condition)
+        except TimeoutException:
+            self.model.record_timeout(op)
+            raise
+        self.model.record(op, time.monotonic() - started)
+        return result
+
+    def optional(self, driver, op, condition, default_timeout):
+        """Optional wait: returns the condition's value, or None once the learned timeout for op expires"""
+        return self.optional_call(op, lambda timeout: self._poll(driver, condition, timeout), default_timeout)
+
+    def optional_call(self, op, wait, default_timeout):
+        """Like optional() for any blocking wait(timeout) that returns a falsy value on timeout"""
+        started = time.monotonic()
+        result = wait(self.model.timeout_for(op, default_timeout))
+        if result:
+            self.model.record(op, time.monotonic() - started)
+            return result
+        self.model.record_timeout(op, optional=True)
+        return None
+
+    def _poll(self, driver, condition, timeout):
+        try:
+            return WebDriverWait(driver, timeout, self.poll_frequency).until(condition)
+        except TimeoutException:
+            return None
+
+# --- conditions -----------------------------------------------------------
+
+def script_value_stable(script, accept=None):
+    """
+    Condition that holds once script returns the same value on two consecutive polls
+    (and accept(value) is true); it returns that value.
+    """
+    last = [object()]
+
+    def condition(driver):
+        value = driver.execute_script(script)
+        stable = value == last[0] and (accept is None or accept(value))
+        last[0] = value
+        return value if stable else False
+    return condition
+
+def script_value_changed(script, before):
+    """Condition that holds once script returns something other than before; it returns the new value"""
+    def condition(driver):
+        value = driver.execute_script(script)
+        return value if value != before else False
+    return condition
+
+def any_clickable(xpath_selectors):
+    """
+    Condition that holds once any of the XPath selectors finds a clickable element.
+    Checking all fallbacks on every poll means a stale selector no longer costs its own timeout.
+    Returns (selector, element).
+    """
+    def condition(driver):
+        for selector in xpath_selectors:
+            try:
+                element = EC.element_to_be_clickable((By.XPATH, selector))(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                continue
+            if element:
+                return selector, element
+        return False
+    return condition
@@ -0,0 +1,205 @@
+"""
+Folder frontier shared by several hosts through a SQLite file.
+
+Each host runs its own browser session(s) and leases folders from the queue.
+A lease lasts LEASE_SECONDS and is renewed by a heartbeat thread while the host
+works on the folder; sub-folders found there go back into the queue, so the
+tree is sharded among the hosts folder by folder. A folder whose lease ran out
+(its host crashed, lost the network or was stopped) is handed to the next host
+that asks, up to MAX_LEASES times.
+
+The queue file can live on shared storage, or on a local disk for several
+processes on one machine. It uses a rollback journal, not WAL: WAL keeps its
+index in shared memory, which processes on different hosts do not share, so
+over a network file system they would read stale pages or corrupt the file.
+SQLite's locking is still only as good as the file system's: a local disk is
+safe; on network storage (NFS, SMB) byte-range locks must work reliably, which
+many NFS setups do not.
+
+Paths are stored relative to the backup root, so hosts may keep their backups
+in different places. Every row stays in the queue once done, which is how a
+folder reachable twice is crawled once; use a fresh queue file for each run.
+"""
+
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+
+LEASE_SECONDS = 120.0
+HEARTBEAT_INTERVAL = 30.0 # Seconds between lease renewals; well below LEASE_SECONDS
+MAX_LEASES = 3 # Leases of one folder before it is given up as the one crashing its hosts
+POLL_INTERVAL = 1.0 # Seconds between looks at the queue while it has nothing to lease
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    leases INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS folders_lease ON folders (state, lease_until);
+"""
+
+def host_owner_id():
+    """Name of this process in the owner column"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class SharedFrontier:
+    """
+    Drop-in for FolderFrontier backed by a shared SQLite queue (put, get, task_done, join).
+    Safe for the worker threads of one process and for any number of processes.
+    """
+
+    def __init__(self, db_path, root, owner=None, lease_seconds=LEASE_SECONDS):
+        self.db_path = db_path
+        self.root = root
+        self.owner = owner or host_owner_id()
+        self.lease_seconds = lease_seconds
+        # Autocommit mode; leases are taken inside explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=TRUNCATE") # WAL does not work across hosts
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_leases, name="queue-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _to_row(self, folder):
+        entry = dict(folder, path=os.path.relpath(folder["path"], self.root))
+        return json.dumps(entry)
+
+    def _from_row(self, entry):
+        folder = json.loads(entry)
+        folder["path"] = os.path.normpath(os.path.join(self.root, folder["path"]))
+        return folder
+
+    def seed(self, folders):
+        """
+        Puts the first folders of a run, once per queue: returns False (and puts nothing)
+        if another host seeded it already.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM meta WHERE key = 'seeded_by'").fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('seeded_by', ?)", (self.owner,))
+                for folder in folders:
+                    self._insert(folder)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _insert(self, folder):
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO folders (id, seq, entry, updated_at) "
+            "VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM folders), ?, ?)",
+            (folder["id"], self._to_row(folder), time.time()))
+        return cursor.rowcount == 1
+
+    def put(self, folder):
+        """Queues a folder for any host; False if the folder was queued before (by anyone)"""
+        with self._lock:
+            return self._insert(folder)
+
+    def get(self, timeout):
+        """
+        Leases the next folder (newest first, which keeps each host roughly depth-first),
+        raising queue.Empty if none becomes available within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            folder = self._lease_one()
+            if folder is not None:
+                return folder
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise queue.Empty
+            time.sleep(min(POLL_INTERVAL, remaining))
+
+    def _lease_one(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT id, entry, state, owner, leases FROM folders "
+                        "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                        "ORDER BY seq DESC LIMIT 1", (now,)).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    if row["state"] == "pending":
+                        break
+                    if row["leases"] < MAX_LEASES:
+                        print(f"Reclaiming folder {row['id']} from {row['owner']}, whose lease expired.")
+                        break
+                    print(f"Giving up folder {row['id']} after {row['leases']} expired leases.")
+                    self._conn.execute("UPDATE folders SET state = 'abandoned', owner = NULL, updated_at = ? "
+                                       "WHERE id = ?", (now, row["id"]))
+                self._conn.execute(
+                    "UPDATE folders SET state = 'leased', owner = ?, lease_until = ?, leases = leases + 1, "
+                    "updated_at = ? WHERE id = ?", (self.owner, now + self.lease_seconds, now, row["id"]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._from_row(row["entry"])
+
+    def task_done(self, folder):
+        """Marks a leased folder finished (crawled or failed; the manifest has the details)"""
+        with self._lock:
+            self._conn.execute("UPDATE folders SET state = 'done', owner = NULL, lease_until = NULL, updated_at = ? "
+                               "WHERE id = ? AND owner = ?", (time.time(), folder["id"], self.owner))
+
+    def join(self):
+        """Blocks until the queue has been seeded and no host has a folder pending or leased"""
+        while True:
+            with self._lock:
+                seeded = self._conn.execute("SELECT 1 FROM meta WHERE key = 'seeded_by'").fetchone()
+                open_count = self._conn.execute(
+                    "SELECT COUNT(*) FROM folders WHERE state IN ('pending', 'leased')").fetchone()[0]
+            if seeded and not open_count:
+                return
+            time.sleep(POLL_INTERVAL)
+
+    def _renew_leases(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                with self._lock:
+                    self._conn.execute("UPDATE folders SET lease_until = ? WHERE state = 'leased' AND owner = ?",
+                                       (time.time() + self.lease_seconds, self.owner))
+            except sqlite3.Error as e:
+                # A missed heartbeat is survivable as long as a later one gets through before the lease runs out
+                print(f"Could not renew folder leases in {self.db_path}: {e.__class__.__name__} - {e}")
+
+    def counts(self):
+        """Per-state folder counts of the shared queue"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM folders GROUP BY state").fetchall())
+
+    def close(self):
+        """Stops the heartbeat and hands folders still leased by this process back to the queue"""
+        self._stop.set()
+        self._heartbeat.join()
+        with self._lock:
+            self._conn.execute("UPDATE folders SET state = 'pending', owner = NULL, lease_until = NULL "
+                               "WHERE state = 'leased' AND owner = ?", (self.owner,))
+            self._conn.close()